@@ -0,0 +1,437 @@
+"""Offline benchmark of the Qwen3 Speech entities.
+
+Drives Qwen3TTSEntity or Qwen3STTEntity at a given concurrency against the
+stand-in server in fake_dashscope.py, so no network or API key is needed,
+and writes the results as JSON for comparison between versions:
+
+    python benchmarks/bench.py tts --requests 200 --concurrency 8 \\
+        --latency 0.3 --error-rate 0.02 --output before.json
+
+Scenarios:
+    tts           one-shot synthesis (async_get_tts_audio)
+    tts_stream    streaming synthesis over SSE (async_stream_tts_audio)
+    tts_download  streaming option off, audio streamed from the file host
+    stt           one-shot recognition of a WAV upload
+    stt_realtime  recognition over the realtime websocket
+
+Reported are request latency percentiles (and time to first audio for the
+streaming TTS scenarios), throughput, failed requests, peak RSS and event
+loop lag of this process, plus the integration's own request metrics. The
+stand-in server runs in a subprocess so it does not skew the last two.
+
+Needs the Home Assistant version from manifest.json installed in the
+Python environment.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections.abc import AsyncGenerator, Awaitable, Callable
+import json
+import math
+from pathlib import Path
+import platform
+import resource
+import struct
+import sys
+import tempfile
+import time
+from types import MappingProxyType
+from typing import Any
+
+from aiohttp import ClientSession
+
+from homeassistant.components.stt import (
+    AudioBitRates,
+    AudioChannels,
+    AudioCodecs,
+    AudioFormats,
+    AudioSampleRates,
+    SpeechMetadata,
+    SpeechResultState,
+)
+from homeassistant.components.tts import TTSAudioRequest
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import __version__ as HA_VERSION
+from homeassistant.core import HomeAssistant
+
+BENCH_DIR = Path(__file__).resolve().parent
+sys.path.insert(0, str(BENCH_DIR.parent))
+
+from custom_components.qwen3_speech.api import DashScopeClient
+from custom_components.qwen3_speech.cache import TTSCache
+from custom_components.qwen3_speech.const import (
+    CONF_API_KEY,
+    CONF_CACHE_SIZE,
+    CONF_MAX_CONCURRENT,
+    CONF_STREAMING,
+    CONF_STT_STREAMING,
+    CONF_VAD,
+    DATA_CACHE,
+    DATA_CLIENT,
+    DOMAIN,
+)
+from custom_components.qwen3_speech.router import Endpoint
+from custom_components.qwen3_speech.scheduler import RequestScheduler
+from custom_components.qwen3_speech.stt import Qwen3STTEntity
+from custom_components.qwen3_speech.tts import Qwen3TTSEntity
+
+sys.path.insert(0, str(BENCH_DIR))
+import fake_dashscope
+
+SCENARIOS = ("tts", "tts_stream", "tts_download", "stt", "stt_realtime")
+MESSAGE = "客厅的灯已经打开，今天室外温度二十三度，适合开窗通风。"
+STT_SAMPLE_RATE = 16000
+STT_CHUNK_MS = 100
+WAV_HEADER_SIZE = 44
+LOOP_LAG_INTERVAL = 0.01
+
+
+def _percentiles(values: list[float]) -> dict[str, float | None]:
+    """Return nearest-rank percentiles of values in milliseconds."""
+    if not values:
+        return {"p50": None, "p90": None, "p99": None, "max": None, "mean": None}
+    ordered = sorted(values)
+
+    def rank(fraction: float) -> float:
+        index = max(math.ceil(fraction * len(ordered)) - 1, 0)
+        return round(ordered[index] * 1000, 2)
+
+    return {
+        "p50": rank(0.5),
+        "p90": rank(0.9),
+        "p99": rank(0.99),
+        "max": round(ordered[-1] * 1000, 2),
+        "mean": round(sum(ordered) / len(ordered) * 1000, 2),
+    }
+
+
+def _peak_rss_mb() -> float:
+    """Return the peak resident set size of this process."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    if sys.platform == "darwin":
+        peak //= 1024
+    return round(peak / 1024, 1)
+
+
+class LoopLagMonitor:
+    """Measure how late the event loop runs a callback scheduled on time."""
+
+    def __init__(self) -> None:
+        """Initialize the monitor."""
+        self.lags: list[float] = []
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        """Start sampling."""
+        self._task = asyncio.create_task(self._async_run())
+
+    async def async_stop(self) -> None:
+        """Stop sampling."""
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+
+    async def _async_run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            due = loop.time() + LOOP_LAG_INTERVAL
+            await asyncio.sleep(LOOP_LAG_INTERVAL)
+            self.lags.append(max(loop.time() - due, 0.0))
+
+
+def _speech_pcm(seconds: float, lead_seconds: float = 0.25) -> bytes:
+    """Return 16 kHz mono PCM of a tone between silence, which VAD keeps.
+
+    With lead_seconds 0 the tone starts at the first sample, like a push to
+    talk command.
+    """
+    lead = b"\0\0" * int(STT_SAMPLE_RATE * lead_seconds)
+    silence = b"\0\0" * (STT_SAMPLE_RATE // 4)
+    samples = int(STT_SAMPLE_RATE * seconds)
+    step = 2 * math.pi * 300 / STT_SAMPLE_RATE
+    tone = struct.pack(
+        f"<{samples}h", *(int(6000 * math.sin(step * i)) for i in range(samples))
+    )
+    return lead + tone + silence
+
+
+async def _async_chunks(pcm: bytes) -> AsyncGenerator[bytes]:
+    size = STT_SAMPLE_RATE * 2 * STT_CHUNK_MS // 1000
+    for index in range(0, len(pcm), size):
+        yield pcm[index : index + size]
+        await asyncio.sleep(0)
+
+
+async def _async_text(message: str) -> AsyncGenerator[str]:
+    yield message
+
+
+class Benchmark:
+    """One benchmark run of a scenario against a running stand-in server."""
+
+    def __init__(self, hass: HomeAssistant, args: argparse.Namespace) -> None:
+        """Initialize the run."""
+        self.hass = hass
+        self.args = args
+        self.latencies: list[float] = []
+        self.first_audio: list[float] = []
+        self.failures: dict[str, int] = {}
+        self.audio_bytes = 0
+        self._pcm = _speech_pcm(args.stt_seconds, args.stt_lead_silence)
+
+    def _entry(self) -> ConfigEntry:
+        scenario = self.args.scenario
+        return ConfigEntry(
+            data={
+                CONF_API_KEY: "benchmark",
+                CONF_STREAMING: scenario != "tts_download",
+                CONF_STT_STREAMING: scenario == "stt_realtime",
+                CONF_CACHE_SIZE: self.args.cache_mb,
+                CONF_MAX_CONCURRENT: self.args.max_concurrent,
+                CONF_VAD: True,
+            },
+            discovery_keys=MappingProxyType({}),
+            domain=DOMAIN,
+            minor_version=1,
+            options={},
+            source="user",
+            subentries_data=None,
+            title="Qwen3 Speech benchmark",
+            unique_id=None,
+            version=1,
+        )
+
+    async def async_run(self, urls: dict[str, str]) -> dict[str, Any]:
+        """Set up the entities like the integration does and run the requests."""
+        args = self.args
+        entry = self._entry()
+        cache = TTSCache(self.hass, entry.entry_id, args.cache_mb * 1024 * 1024)
+        await cache.async_load()
+        client = DashScopeClient(
+            self.hass,
+            entry.data[CONF_API_KEY],
+            scheduler=RequestScheduler(args.max_concurrent),
+            endpoints=[Endpoint.from_base(urls["base_url"])],
+        )
+        self.hass.data.setdefault(DOMAIN, {})[entry.entry_id] = {
+            DATA_CACHE: cache,
+            DATA_CLIENT: client,
+        }
+        await client.async_start()
+
+        if args.scenario.startswith("tts"):
+            entity: Qwen3TTSEntity | Qwen3STTEntity = Qwen3TTSEntity(self.hass, entry)
+        else:
+            entity = Qwen3STTEntity(self.hass, entry)
+        request = self._request_factory(entity)
+
+        monitor = LoopLagMonitor()
+        monitor.start()
+        semaphore = asyncio.Semaphore(args.concurrency)
+
+        async def run_one(index: int) -> None:
+            async with semaphore:
+                start = time.perf_counter()
+                try:
+                    await request(index, start)
+                except Exception as err:  # counted, not raised
+                    name = type(err).__name__
+                    self.failures[name] = self.failures.get(name, 0) + 1
+                else:
+                    self.latencies.append(time.perf_counter() - start)
+
+        # Warm up connections and code paths, not measured
+        for index in range(args.warmup):
+            await run_one(-1 - index)
+        self.latencies.clear()
+        self.first_audio.clear()
+        self.failures.clear()
+        self.audio_bytes = 0
+
+        start = time.perf_counter()
+        await asyncio.gather(*(run_one(index) for index in range(args.requests)))
+        elapsed = time.perf_counter() - start
+        await monitor.async_stop()
+
+        metrics = client.metrics.as_dict()
+        await client.async_close()
+        await cache.async_flush()
+        return {
+            "requests": args.requests,
+            "succeeded": len(self.latencies),
+            "failed": self.failures,
+            "elapsed_s": round(elapsed, 3),
+            "throughput_rps": round(len(self.latencies) / elapsed, 2),
+            "latency_ms": _percentiles(self.latencies),
+            "first_audio_ms": _percentiles(self.first_audio),
+            "audio_bytes": self.audio_bytes,
+            "loop_lag_ms": _percentiles(monitor.lags),
+            "peak_rss_mb": _peak_rss_mb(),
+            "client_metrics": metrics,
+        }
+
+    def _message(self, index: int) -> str:
+        # Distinct messages, unless asked to repeat some, so that caching and
+        # coalescing only come into play when they are meant to
+        if self.args.distinct:
+            index %= self.args.distinct
+        return f"{MESSAGE}{index}"
+
+    def _request_factory(
+        self, entity: Qwen3TTSEntity | Qwen3STTEntity
+    ) -> Callable[[int, float], Awaitable[None]]:
+        async def get_tts_audio(index: int, start: float) -> None:
+            assert isinstance(entity, Qwen3TTSEntity)
+            _, data = await entity.async_get_tts_audio(self._message(index), "zh", {})
+            if not data:
+                raise RuntimeError("No audio")
+            self.audio_bytes += len(data)
+
+        async def stream_tts_audio(index: int, start: float) -> None:
+            assert isinstance(entity, Qwen3TTSEntity)
+            response = await entity.async_stream_tts_audio(
+                TTSAudioRequest("zh", {}, _async_text(self._message(index)))
+            )
+            received = 0
+            async for chunk in response.data_gen:
+                # Audio starts after the WAV header, which may come on its own
+                if received <= WAV_HEADER_SIZE < received + len(chunk):
+                    self.first_audio.append(time.perf_counter() - start)
+                received += len(chunk)
+            if received <= WAV_HEADER_SIZE:
+                raise RuntimeError("No audio")
+            self.audio_bytes += received
+
+        async def process_audio(index: int, start: float) -> None:
+            assert isinstance(entity, Qwen3STTEntity)
+            metadata = SpeechMetadata(
+                language="zh",
+                format=AudioFormats.WAV,
+                codec=AudioCodecs.PCM,
+                bit_rate=AudioBitRates.BITRATE_16,
+                sample_rate=AudioSampleRates.SAMPLERATE_16000,
+                channel=AudioChannels.CHANNEL_MONO,
+            )
+            result = await entity.async_process_audio_stream(
+                metadata, _async_chunks(self._pcm)
+            )
+            if result.result is not SpeechResultState.SUCCESS:
+                raise RuntimeError("Recognition failed")
+
+        if self.args.scenario == "tts":
+            return get_tts_audio
+        if self.args.scenario.startswith("tts"):
+            return stream_tts_audio
+        return process_audio
+
+
+async def _async_start_server(
+    args: argparse.Namespace,
+) -> tuple[asyncio.subprocess.Process, dict[str, str]]:
+    server_args = [
+        f"--latency={args.latency}",
+        f"--jitter={args.jitter}",
+        f"--download-latency={args.download_latency}",
+        f"--error-rate={args.error_rate}",
+        f"--rate-limit-rate={args.rate_limit_rate}",
+        f"--quota-per-minute={args.quota_per_minute}",
+        f"--audio-seconds={args.audio_seconds}",
+        f"--stream-chunks={args.stream_chunks}",
+        f"--stream-interval={args.stream_interval}",
+    ]
+    if args.seed is not None:
+        server_args.append(f"--seed={args.seed}")
+    process = await asyncio.create_subprocess_exec(
+        sys.executable,
+        str(BENCH_DIR / "fake_dashscope.py"),
+        *server_args,
+        stdout=asyncio.subprocess.PIPE,
+    )
+    assert process.stdout is not None
+    line = await asyncio.wait_for(process.stdout.readline(), 30)
+    if not line:
+        raise RuntimeError("Stand-in server failed to start")
+    return process, json.loads(line)
+
+
+async def _async_main(args: argparse.Namespace) -> dict[str, Any]:
+    process, urls = await _async_start_server(args)
+    try:
+        with tempfile.TemporaryDirectory() as config_dir:
+            hass = HomeAssistant(config_dir)
+            try:
+                results = await Benchmark(hass, args).async_run(urls)
+            finally:
+                await hass.async_stop(force=True)
+        async with ClientSession() as session:
+            async with session.get(urls["stats_url"]) as response:
+                server = await response.json()
+    finally:
+        process.terminate()
+        await process.wait()
+
+    return {
+        "scenario": args.scenario,
+        "concurrency": args.concurrency,
+        "max_concurrent": args.max_concurrent,
+        "cache_mb": args.cache_mb,
+        "distinct": args.distinct,
+        "server": server,
+        "environment": {
+            "python": platform.python_version(),
+            "homeassistant": HA_VERSION,
+            "platform": platform.platform(),
+        },
+        **results,
+    }
+
+
+def main() -> None:
+    """Run a benchmark and write its results."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("scenario", choices=SCENARIOS)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument(
+        "--max-concurrent",
+        type=int,
+        default=4,
+        help="the integration's own limit of concurrent API requests",
+    )
+    parser.add_argument(
+        "--cache-mb", type=int, default=0, help="TTS cache size, off by default"
+    )
+    parser.add_argument(
+        "--distinct",
+        type=int,
+        default=0,
+        help="number of distinct TTS messages, 0 for a new one every request",
+    )
+    parser.add_argument(
+        "--stt-seconds", type=float, default=3.0, help="length of STT audio"
+    )
+    parser.add_argument(
+        "--stt-lead-silence",
+        type=float,
+        default=0.25,
+        help="silence before the STT speech, 0 to start speaking right away",
+    )
+    parser.add_argument("--output", type=Path, help="JSON file, stdout if omitted")
+    fake_dashscope.add_arguments(parser)
+    args = parser.parse_args()
+
+    results = asyncio.run(_async_main(args))
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output is None:
+        print(output)
+    else:
+        args.output.write_text(output + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,343 @@
+"""Local stand-in for the DashScope endpoints used by Qwen3 Speech.
+
+Serves the generation API (one-shot and SSE TTS, one-shot ASR), the model
+list, the realtime ASR websocket and a separate host for synthesized audio
+files, with configurable latency, jitter, error rates, a request quota per
+API key and audio sizes. Nothing is synthesized or recognized: TTS returns
+a tone of the configured length and ASR a fixed transcript.
+
+Run on its own to point a development setup at it, bench.py starts it in a
+subprocess:
+
+    python benchmarks/fake_dashscope.py --latency 0.3 --error-rate 0.05
+
+The first line printed is a JSON object with the URLs to use.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+from collections import Counter, defaultdict, deque
+from dataclasses import asdict, dataclass
+import io
+import itertools
+import json
+import math
+import random
+import socket
+import struct
+import time
+import wave
+
+from aiohttp import WSMsgType, web
+
+API_PATH = "/api/v1/services/aigc/multimodal-generation/generation"
+REALTIME_PATH = "/api-ws/v1/realtime"
+MODELS_PATH = "/compatible-mode/v1/models"
+MODELS = ("qwen3-tts-flash", "qwen3-asr-flash", "qwen3-asr-flash-realtime")
+TTS_SAMPLE_RATE = 24000
+TRANSCRIPT = "今天天气怎么样"
+
+
+@dataclass
+class ServerConfig:
+    """Behavior of the stand-in server, all times in seconds."""
+
+    latency: float = 0.2
+    jitter: float = 0.05
+    download_latency: float = 0.02
+    error_rate: float = 0.0
+    rate_limit_rate: float = 0.0
+    quota_per_minute: int = 0
+    audio_seconds: float = 3.0
+    stream_chunks: int = 10
+    stream_interval: float = 0.02
+    seed: int | None = None
+
+
+def _tone(seconds: float) -> bytes:
+    """Return 16-bit mono PCM of a 440 Hz tone."""
+    samples = int(TTS_SAMPLE_RATE * seconds)
+    step = 2 * math.pi * 440 / TTS_SAMPLE_RATE
+    return struct.pack(
+        f"<{samples}h", *(int(8000 * math.sin(step * i)) for i in range(samples))
+    )
+
+
+def _wav(pcm: bytes) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wav:
+        wav.setnchannels(1)
+        wav.setsampwidth(2)
+        wav.setframerate(TTS_SAMPLE_RATE)
+        wav.writeframes(pcm)
+    return buffer.getvalue()
+
+
+class FakeDashScope:
+    """The stand-in server: an API host and a separate audio file host."""
+
+    def __init__(self, config: ServerConfig) -> None:
+        """Initialize the server."""
+        self.config = config
+        self.stats: Counter[str] = Counter()
+        self._random = random.Random(config.seed)
+        self._pcm = _tone(config.audio_seconds)
+        self._wav = _wav(self._pcm)
+        self._ids = itertools.count()
+        self._sent: defaultdict[str, deque[float]] = defaultdict(deque)
+        self._runners: list[web.AppRunner] = []
+        self.api_origin = ""
+        self.download_origin = ""
+
+    @property
+    def urls(self) -> dict[str, str]:
+        """Return the URLs to configure the client with."""
+        return {
+            "base_url": self.api_origin,
+            "api_url": self.api_origin + API_PATH,
+            "realtime_url": self.api_origin.replace("http", "ws", 1) + REALTIME_PATH,
+            "models_url": self.api_origin + MODELS_PATH,
+            "stats_url": self.api_origin + "/_stats",
+        }
+
+    async def async_start(self, host: str = "127.0.0.1", port: int = 0) -> None:
+        """Start both hosts, on free ports unless port is given."""
+        api = web.Application(client_max_size=64 * 1024 * 1024)
+        api.router.add_post(API_PATH, self._handle_generation)
+        api.router.add_get(REALTIME_PATH, self._handle_realtime)
+        api.router.add_get(MODELS_PATH, self._handle_models)
+        api.router.add_get("/_stats", self._handle_stats)
+        api.router.add_route("HEAD", "/", self._handle_ping)
+        download = web.Application()
+        download.router.add_get("/audio/{name}", self._handle_download)
+        download.router.add_route("HEAD", "/", self._handle_ping)
+
+        self.api_origin = await self._async_serve(api, host, port)
+        self.download_origin = await self._async_serve(
+            download, host, port + 1 if port else 0
+        )
+
+    async def _async_serve(self, app: web.Application, host: str, port: int) -> str:
+        runner = web.AppRunner(app, access_log=None)
+        await runner.setup()
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        await web.SockSite(runner, sock).start()
+        self._runners.append(runner)
+        return f"http://{host}:{sock.getsockname()[1]}"
+
+    async def async_stop(self) -> None:
+        """Stop both hosts."""
+        for runner in self._runners:
+            await runner.cleanup()
+
+    async def _async_delay(self, latency: float) -> None:
+        jitter = self.config.jitter
+        await asyncio.sleep(max(latency + self._random.uniform(-jitter, jitter), 0))
+
+    def _injected_error(self, request: web.Request) -> web.Response | None:
+        if (error := self._quota_error(request)) is not None:
+            return error
+        roll = self._random.random()
+        if roll < self.config.rate_limit_rate:
+            self.stats["rate_limited"] += 1
+            return web.json_response(
+                {"code": "Throttling", "message": "Requests rate limit exceeded"},
+                status=429,
+                headers={"Retry-After": "0"},
+            )
+        if roll < self.config.rate_limit_rate + self.config.error_rate:
+            self.stats["errors"] += 1
+            return web.json_response(
+                {"code": "InternalError", "message": "Injected failure"}, status=503
+            )
+        return None
+
+    def _quota_error(self, request: web.Request) -> web.Response | None:
+        """Reject requests over the quota of their API key in the last minute."""
+        if not (quota := self.config.quota_per_minute):
+            return None
+        now = time.monotonic()
+        sent = self._sent[request.headers.get("Authorization", "")]
+        while sent and sent[0] <= now - 60:
+            sent.popleft()
+        if len(sent) < quota:
+            sent.append(now)
+            return None
+        self.stats["over_quota"] += 1
+        reset = sent[0] + 60 - now
+        return web.json_response(
+            {"code": "Throttling.RateQuota", "message": "Requests rate limit exceeded"},
+            status=429,
+            headers={
+                "Retry-After": str(math.ceil(reset)),
+                "X-RateLimit-Limit-Requests": str(quota),
+                "X-RateLimit-Remaining-Requests": "0",
+                "X-RateLimit-Reset-Requests": f"{reset:.3f}s",
+            },
+        )
+
+    async def _handle_ping(self, request: web.Request) -> web.Response:
+        return web.Response()
+
+    async def _handle_stats(self, request: web.Request) -> web.Response:
+        return web.json_response(
+            {"config": asdict(self.config), "counts": dict(self.stats)}
+        )
+
+    async def _handle_models(self, request: web.Request) -> web.Response:
+        self.stats["models"] += 1
+        return web.json_response(
+            {"object": "list", "data": [{"id": model} for model in MODELS]}
+        )
+
+    async def _handle_generation(self, request: web.Request) -> web.StreamResponse:
+        body = await request.json()
+        request_id = f"fake-{next(self._ids)}"
+        await self._async_delay(self.config.latency)
+        if (error := self._injected_error(request)) is not None:
+            return error
+
+        if "messages" in body.get("input", {}):
+            self.stats["asr"] += 1
+            return web.json_response(
+                {
+                    "output": {
+                        "choices": [
+                            {"message": {"content": [{"text": TRANSCRIPT}]}}
+                        ]
+                    },
+                    "request_id": request_id,
+                }
+            )
+
+        if request.headers.get("X-DashScope-SSE") == "enable":
+            self.stats["tts_stream"] += 1
+            return await self._async_stream_pcm(request, request_id)
+
+        self.stats["tts"] += 1
+        return web.json_response(
+            {
+                "output": {
+                    "audio": {"url": f"{self.download_origin}/audio/{request_id}.wav"}
+                },
+                "request_id": request_id,
+            }
+        )
+
+    async def _async_stream_pcm(
+        self, request: web.Request, request_id: str
+    ) -> web.StreamResponse:
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream"})
+        await response.prepare(request)
+        chunks = max(self.config.stream_chunks, 1)
+        # Whole samples per chunk
+        size = math.ceil(len(self._pcm) / chunks / 2) * 2
+        for index in range(0, len(self._pcm), size):
+            if index:
+                await asyncio.sleep(self.config.stream_interval)
+            audio = base64.b64encode(self._pcm[index : index + size]).decode()
+            event = {"output": {"audio": {"data": audio}}, "request_id": request_id}
+            await response.write(f"data:{json.dumps(event)}\n\n".encode())
+        event = {"output": {"finish_reason": "stop"}, "request_id": request_id}
+        await response.write(f"data:{json.dumps(event)}\n\n".encode())
+        await response.write_eof()
+        return response
+
+    async def _handle_download(self, request: web.Request) -> web.Response:
+        await self._async_delay(self.config.download_latency)
+        self.stats["download"] += 1
+        return web.Response(body=self._wav, content_type="audio/wav")
+
+    async def _handle_realtime(self, request: web.Request) -> web.WebSocketResponse:
+        await self._async_delay(self.config.latency)
+        if (error := self._injected_error(request)) is not None:
+            return error
+        self.stats["realtime"] += 1
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        async for msg in ws:
+            if msg.type != WSMsgType.TEXT:
+                continue
+            if json.loads(msg.data).get("type") != "session.finish":
+                continue
+            await self._async_delay(self.config.latency)
+            await ws.send_json(
+                {
+                    "type": "conversation.item.input_audio_transcription.completed",
+                    "transcript": TRANSCRIPT,
+                }
+            )
+            await ws.send_json({"type": "session.finished"})
+            break
+        await ws.close()
+        return ws
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    """Add the server options to a command line parser."""
+    defaults = ServerConfig()
+    group = parser.add_argument_group("stand-in server")
+    group.add_argument("--latency", type=float, default=defaults.latency)
+    group.add_argument("--jitter", type=float, default=defaults.jitter)
+    group.add_argument(
+        "--download-latency", type=float, default=defaults.download_latency
+    )
+    group.add_argument("--error-rate", type=float, default=defaults.error_rate)
+    group.add_argument(
+        "--rate-limit-rate", type=float, default=defaults.rate_limit_rate
+    )
+    group.add_argument(
+        "--quota-per-minute", type=int, default=defaults.quota_per_minute
+    )
+    group.add_argument("--audio-seconds", type=float, default=defaults.audio_seconds)
+    group.add_argument("--stream-chunks", type=int, default=defaults.stream_chunks)
+    group.add_argument(
+        "--stream-interval", type=float, default=defaults.stream_interval
+    )
+    group.add_argument("--seed", type=int, default=defaults.seed)
+
+
+def config_from_args(args: argparse.Namespace) -> ServerConfig:
+    """Return the server config of parsed command line options."""
+    return ServerConfig(
+        latency=args.latency,
+        jitter=args.jitter,
+        download_latency=args.download_latency,
+        error_rate=args.error_rate,
+        rate_limit_rate=args.rate_limit_rate,
+        quota_per_minute=args.quota_per_minute,
+        audio_seconds=args.audio_seconds,
+        stream_chunks=args.stream_chunks,
+        stream_interval=args.stream_interval,
+        seed=args.seed,
+    )
+
+
+async def _async_main(args: argparse.Namespace) -> None:
+    server = FakeDashScope(config_from_args(args))
+    await server.async_start(args.host, args.port)
+    print(json.dumps(server.urls), flush=True)
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.async_stop()
+
+
+def main() -> None:
+    """Run the stand-in server until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=0)
+    add_arguments(parser)
+    try:
+        asyncio.run(_async_main(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,422 @@
+"""Replay a Qwen3 Speech traffic log against the stand-in server.
+
+Makes the TTS and STT calls of traffic logs written with the "Log traffic"
+option again, with the same spacing (or --speed times faster), against the
+stand-in server in fake_dashscope.py, so a load pattern seen in production
+can be reproduced offline and compared between versions:
+
+    python benchmarks/replay.py traffic/ENTRY.jsonl.1 traffic/ENTRY.jsonl \\
+        --speed 4 --latency 0.3 --output after.json
+
+TTS calls synthesize a message of the logged length in the logged format,
+voice, speed and priority; calls with the same logged key get the same
+message, so caching and coalescing come into play as they did. Text that
+was streamed in (a conversation agent's reply) comes in small pieces over
+the logged time, each call with a message of its own. STT calls
+stream a tone of the logged speech duration at the pace of a microphone
+(also sped up by --speed).
+
+Reported per kind of call are the logged and replayed latency percentiles
+(time to first audio for streaming TTS, time from the end of speech to the
+transcript for STT) and failures, plus event loop lag, peak RSS and the
+integration's own request metrics.
+
+Needs the Home Assistant version from manifest.json installed in the
+Python environment.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+from collections import Counter, defaultdict
+from collections.abc import AsyncGenerator
+import json
+from pathlib import Path
+import platform
+import tempfile
+import time
+from types import MappingProxyType
+from typing import Any
+
+from aiohttp import ClientSession
+
+from homeassistant.components.ffmpeg import DATA_FFMPEG, FFmpegManager
+from homeassistant.components.stt import (
+    AudioBitRates,
+    AudioChannels,
+    AudioCodecs,
+    AudioFormats,
+    AudioSampleRates,
+    SpeechMetadata,
+    SpeechResultState,
+)
+from homeassistant.components.tts import ATTR_PREFERRED_FORMAT, TTSAudioRequest
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import __version__ as HA_VERSION
+from homeassistant.core import HomeAssistant
+
+from bench import (
+    MESSAGE,
+    STT_CHUNK_MS,
+    STT_SAMPLE_RATE,
+    LoopLagMonitor,
+    _async_start_server,
+    _async_text,
+    _peak_rss_mb,
+    _percentiles,
+    _speech_pcm,
+)
+from custom_components.qwen3_speech.api import DashScopeClient
+from custom_components.qwen3_speech.cache import TTSCache
+from custom_components.qwen3_speech.const import (
+    CONF_API_KEY,
+    CONF_CACHE_SIZE,
+    CONF_MAX_CONCURRENT,
+    CONF_PRIORITY,
+    CONF_SPEED,
+    CONF_STREAMING,
+    CONF_STT_STREAMING,
+    CONF_TTS_SAMPLE_RATE,
+    CONF_VAD,
+    CONF_VOICE,
+    DATA_CACHE,
+    DATA_CLIENT,
+    DOMAIN,
+)
+from custom_components.qwen3_speech.router import Endpoint
+from custom_components.qwen3_speech.scheduler import RequestScheduler
+from custom_components.qwen3_speech.stt import Qwen3STTEntity
+from custom_components.qwen3_speech.tts import Qwen3TTSEntity
+import fake_dashscope
+
+TTS_KINDS = ("tts", "tts_stream", "tts_download", "tts_text")
+STT_KINDS = ("stt", "stt_realtime")
+KINDS = TTS_KINDS + STT_KINDS
+# Streamed text comes in pieces of about this size, like LLM deltas
+TEXT_PIECE_CHARS = 8
+# Silence _speech_pcm puts around the tone
+SPEECH_PADDING_S = 0.5
+DEFAULT_SPEECH_S = 3.0
+
+
+def read_calls(paths: list[Path]) -> list[dict[str, Any]]:
+    """Return the call records of traffic logs, oldest first."""
+    calls = []
+    for path in paths:
+        with path.open(encoding="utf-8") as file:
+            for line in file:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if record.get("type") == "call" and record.get("kind") in KINDS:
+                    calls.append(record)
+    calls.sort(key=lambda call: call["t"])
+    return calls
+
+
+def _speech_seconds(call: dict[str, Any]) -> float:
+    """Return how long the speech of a logged STT call lasted."""
+    # The call lasted as long as the audio came in, plus the wait after it
+    if call.get("after_audio_ms") is not None:
+        return max(call["ms"] - call["after_audio_ms"], 0.0) / 1000
+    if call.get("codec") == "pcm" and call.get("sample_rate"):
+        frame = call["sample_rate"] * call["bit_rate"] // 8 * call["channels"]
+        return call["bytes"] / frame
+    return DEFAULT_SPEECH_S
+
+
+class Replay:
+    """One replay of logged calls against a running stand-in server."""
+
+    def __init__(
+        self, hass: HomeAssistant, args: argparse.Namespace, calls: list[dict]
+    ) -> None:
+        """Initialize the replay."""
+        self.hass = hass
+        self.args = args
+        self.calls = calls
+        self.latencies: defaultdict[str, list[float]] = defaultdict(list)
+        self.first_audio: defaultdict[str, list[float]] = defaultdict(list)
+        self.failures: defaultdict[str, Counter[str]] = defaultdict(Counter)
+        self._messages: dict[str, str] = {}
+
+    def _entry(self, **data: Any) -> ConfigEntry:
+        sample_rates = Counter(
+            call["sample_rate"] for call in self.calls if call["kind"] in TTS_KINDS
+        )
+        return ConfigEntry(
+            data={
+                CONF_API_KEY: "replay",
+                CONF_CACHE_SIZE: self.args.cache_mb,
+                CONF_MAX_CONCURRENT: self.args.max_concurrent,
+                CONF_VAD: True,
+                # Not a request option, the most common one is used for all
+                CONF_TTS_SAMPLE_RATE: (
+                    sample_rates.most_common(1)[0][0] if sample_rates else 24000
+                ),
+                **data,
+            },
+            discovery_keys=MappingProxyType({}),
+            domain=DOMAIN,
+            minor_version=1,
+            options={},
+            source="user",
+            subentries_data=None,
+            title="Qwen3 Speech replay",
+            unique_id=None,
+            version=1,
+        )
+
+    async def async_run(self, urls: dict[str, str]) -> dict[str, Any]:
+        """Set up the entities like the integration does and replay the calls."""
+        args = self.args
+        self.hass.data[DATA_FFMPEG] = FFmpegManager(self.hass, "ffmpeg")
+        # One entry per way of handling a call, all sharing cache and client
+        entries = {
+            "tts": self._entry(),
+            "tts_download": self._entry(**{CONF_STREAMING: False}),
+            "stt": self._entry(**{CONF_STT_STREAMING: False}),
+            "stt_realtime": self._entry(**{CONF_STT_STREAMING: True}),
+        }
+        entries["tts_stream"] = entries["tts_text"] = entries["tts"]
+        cache = TTSCache(self.hass, "replay", args.cache_mb * 1024 * 1024)
+        await cache.async_load()
+        client = DashScopeClient(
+            self.hass,
+            "replay",
+            scheduler=RequestScheduler(args.max_concurrent),
+            endpoints=[Endpoint.from_base(urls["base_url"])],
+        )
+        entry_data = {DATA_CACHE: cache, DATA_CLIENT: client}
+        for entry in entries.values():
+            self.hass.data.setdefault(DOMAIN, {})[entry.entry_id] = entry_data
+        await client.async_start()
+        tts = {
+            kind: Qwen3TTSEntity(self.hass, entries[kind]) for kind in TTS_KINDS
+        }
+        stt = {kind: Qwen3STTEntity(self.hass, entries[kind]) for kind in STT_KINDS}
+
+        monitor = LoopLagMonitor()
+        monitor.start()
+        loop = asyncio.get_running_loop()
+        start = loop.time()
+        tasks = []
+        for call in self.calls:
+            due = start + (call["t"] - self.calls[0]["t"]) / args.speed
+            await asyncio.sleep(max(due - loop.time(), 0))
+            if call["kind"].startswith("tts"):
+                request = self._async_tts(tts[call["kind"]], call)
+            else:
+                request = self._async_stt(stt[call["kind"]], call)
+            tasks.append(asyncio.create_task(self._async_measure(call, request)))
+        await asyncio.gather(*tasks)
+        elapsed = loop.time() - start
+        await monitor.async_stop()
+
+        metrics = client.metrics.as_dict()
+        await client.async_close()
+        return {
+            "calls": len(self.calls),
+            "elapsed_s": round(elapsed, 3),
+            "kinds": self._summary(),
+            "loop_lag_ms": _percentiles(monitor.lags),
+            "peak_rss_mb": _peak_rss_mb(),
+            "client_metrics": metrics,
+        }
+
+    def _summary(self) -> dict[str, Any]:
+        summary = {}
+        for kind in KINDS:
+            calls = [call for call in self.calls if call["kind"] == kind]
+            if not calls:
+                continue
+            key = "after_audio_ms" if kind.startswith("stt") else "ms"
+            summary[kind] = {
+                "calls": len(calls),
+                "failed": dict(self.failures[kind]),
+                "logged_failed": sum(call.get("error") is not None for call in calls),
+                "logged_ms": _percentiles(
+                    [call[key] / 1000 for call in calls if call.get(key) is not None]
+                ),
+                "replayed_ms": _percentiles(self.latencies[kind]),
+            }
+            if kind in ("tts_stream", "tts_download", "tts_text"):
+                summary[kind]["logged_first_audio_ms"] = _percentiles(
+                    [
+                        call["first_ms"] / 1000
+                        for call in calls
+                        if call.get("first_ms") is not None
+                    ]
+                )
+                summary[kind]["replayed_first_audio_ms"] = _percentiles(
+                    self.first_audio[kind]
+                )
+        return summary
+
+    async def _async_measure(self, call: dict[str, Any], request: Any) -> None:
+        try:
+            latency = await request
+        except Exception as err:  # counted, not raised
+            self.failures[call["kind"]][type(err).__name__] += 1
+        else:
+            self.latencies[call["kind"]].append(latency)
+
+    def _message(self, call: dict[str, Any]) -> str:
+        """Return a message of the logged length, the same for the same key.
+
+        Streamed text has no key, every call gets a message of its own.
+        """
+        key = call.get("key") or f"text-{len(self._messages)}"
+        if (message := self._messages.get(key)) is None:
+            prefix = f"{len(self._messages)}"
+            repeat = call["chars"] // len(MESSAGE) + 1
+            message = (prefix + MESSAGE * repeat)[: max(call["chars"], len(prefix))]
+            self._messages[key] = message
+        return message
+
+    async def _async_text_stream(
+        self, message: str, call: dict[str, Any]
+    ) -> AsyncGenerator[str]:
+        """Stream a message in small pieces over the logged time."""
+        pieces = [
+            message[index : index + TEXT_PIECE_CHARS]
+            for index in range(0, len(message), TEXT_PIECE_CHARS)
+        ]
+        seconds = (call.get("text_ms") or 0.0) / 1000 / self.args.speed
+        interval = seconds / max(len(pieces) - 1, 1)
+        for index, piece in enumerate(pieces):
+            if index:
+                await asyncio.sleep(interval)
+            yield piece
+
+    async def _async_tts(self, entity: Qwen3TTSEntity, call: dict[str, Any]) -> float:
+        options = {
+            CONF_VOICE: call["voice"],
+            CONF_SPEED: call["speed"],
+            CONF_PRIORITY: call["priority"],
+            ATTR_PREFERRED_FORMAT: call["format"],
+        }
+        start = time.perf_counter()
+        if call["kind"] == "tts":
+            _, data = await entity.async_get_tts_audio(
+                self._message(call), call["language"], options
+            )
+            if not data:
+                raise RuntimeError("No audio")
+            return time.perf_counter() - start
+
+        if call["kind"] == "tts_text":
+            text = self._async_text_stream(self._message(call), call)
+        else:
+            text = _async_text(self._message(call))
+        response = await entity.async_stream_tts_audio(
+            TTSAudioRequest(call["language"], options, text)
+        )
+        received = 0
+        async for chunk in response.data_gen:
+            if not received:
+                self.first_audio[call["kind"]].append(time.perf_counter() - start)
+            received += len(chunk)
+        if not received:
+            raise RuntimeError("No audio")
+        return time.perf_counter() - start
+
+    async def _async_stt(self, entity: Qwen3STTEntity, call: dict[str, Any]) -> float:
+        seconds = max(_speech_seconds(call) - SPEECH_PADDING_S, 0.1)
+        pcm = _speech_pcm(seconds)
+        ended = 0.0
+
+        async def microphone() -> AsyncGenerator[bytes]:
+            nonlocal ended
+            size = STT_SAMPLE_RATE * 2 * STT_CHUNK_MS // 1000
+            for index in range(0, len(pcm), size):
+                yield pcm[index : index + size]
+                await asyncio.sleep(STT_CHUNK_MS / 1000 / self.args.speed)
+            ended = time.perf_counter()
+
+        metadata = SpeechMetadata(
+            language=call.get("language") or "zh",
+            format=AudioFormats.WAV,
+            codec=AudioCodecs.PCM,
+            bit_rate=AudioBitRates.BITRATE_16,
+            sample_rate=AudioSampleRates.SAMPLERATE_16000,
+            channel=AudioChannels.CHANNEL_MONO,
+        )
+        result = await entity.async_process_audio_stream(metadata, microphone())
+        if result.result is not SpeechResultState.SUCCESS:
+            raise RuntimeError("Recognition failed")
+        return time.perf_counter() - ended
+
+
+async def _async_main(
+    args: argparse.Namespace, calls: list[dict[str, Any]]
+) -> dict[str, Any]:
+    process, urls = await _async_start_server(args)
+    try:
+        with tempfile.TemporaryDirectory() as config_dir:
+            hass = HomeAssistant(config_dir)
+            try:
+                results = await Replay(hass, args, calls).async_run(urls)
+            finally:
+                await hass.async_stop(force=True)
+        async with ClientSession() as session:
+            async with session.get(urls["stats_url"]) as response:
+                server = await response.json()
+    finally:
+        process.terminate()
+        await process.wait()
+
+    return {
+        "logs": [str(path) for path in args.logs],
+        "speed": args.speed,
+        "logged_span_s": round(calls[-1]["t"] - calls[0]["t"], 3),
+        "max_concurrent": args.max_concurrent,
+        "cache_mb": args.cache_mb,
+        "server": server,
+        "environment": {
+            "python": platform.python_version(),
+            "homeassistant": HA_VERSION,
+            "platform": platform.platform(),
+        },
+        **results,
+    }
+
+
+def main() -> None:
+    """Replay traffic logs and write the results."""
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "logs", type=Path, nargs="+", help="traffic log files, rotated ones too"
+    )
+    parser.add_argument(
+        "--speed", type=float, default=1.0, help="pace relative to the log"
+    )
+    parser.add_argument(
+        "--max-concurrent",
+        type=int,
+        default=4,
+        help="the integration's own limit of concurrent API requests",
+    )
+    parser.add_argument(
+        "--cache-mb", type=int, default=0, help="TTS cache size, off by default"
+    )
+    parser.add_argument("--output", type=Path, help="JSON file, stdout if omitted")
+    fake_dashscope.add_arguments(parser)
+    args = parser.parse_args()
+    if args.speed <= 0:
+        parser.error("--speed must be positive")
+    if not (calls := read_calls(args.logs)):
+        parser.error("No TTS or STT calls in the logs")
+
+    results = asyncio.run(_async_main(args, calls))
+    output = json.dumps(results, indent=2, ensure_ascii=False)
+    if args.output is None:
+        print(output)
+    else:
+        args.output.write_text(output + "\n", encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,37 +1,268 @@
 """Qwen3 Speech integration for Home Assistant (TTS & STT)."""
 from __future__ import annotations
 
+import asyncio
 import logging
 
-from homeassistant.config_entries import ConfigEntry
-from homeassistant.const import Platform
-from homeassistant.core import HomeAssistant
+import voluptuous as vol
 
-from .const import DOMAIN
+from homeassistant.config_entries import ConfigEntry, ConfigEntryState
+from homeassistant.const import ATTR_CONFIG_ENTRY_ID, Platform
+from homeassistant.core import HomeAssistant, ServiceCall
+from homeassistant.exceptions import HomeAssistantError, ServiceValidationError
+from homeassistant.helpers import config_validation as cv
+from homeassistant.helpers.typing import ConfigType
+
+from .api import DashScopeClient
+from .cache import TTSCache, async_remove_cache
+from .const import (
+    ATTR_FILE,
+    ATTR_LANGUAGE,
+    ATTR_MESSAGES,
+    CONF_API_KEY,
+    CONF_CACHE_SIZE,
+    CONF_ENDPOINTS,
+    CONF_EXTRA_API_KEYS,
+    CONF_MAX_CONCURRENT,
+    CONF_VOICE,
+    DATA_CACHE,
+    DATA_CLIENT,
+    DATA_RECORDER,
+    DATA_SETUP_OPTIONS,
+    DATA_TTS_ENTITY,
+    DEFAULT_CACHE_SIZE,
+    DEFAULT_ENDPOINTS,
+    DEFAULT_EXTRA_API_KEYS,
+    DEFAULT_MAX_CONCURRENT,
+    DOMAIN,
+    PRELOAD_MAX_PARALLEL,
+    PRELOAD_PROGRESS_EVENT,
+    RELOAD_OPTIONS,
+    SERVICE_PRELOAD,
+    SUPPORT_LANGUAGES,
+    VOICES,
+)
+from .recorder import TrafficRecorder
+from .router import parse_endpoints, split_list
+from .scheduler import RequestScheduler
+from .text import normalize_text
 
 _LOGGER = logging.getLogger(__name__)
 
-PLATFORMS: list[Platform] = [Platform.TTS, Platform.STT]
+PLATFORMS: list[Platform] = [Platform.TTS, Platform.STT, Platform.SENSOR]
+
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+PRELOAD_SCHEMA = vol.All(
+    vol.Schema(
+        {
+            vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+            vol.Optional(ATTR_MESSAGES): vol.All(cv.ensure_list, [cv.string]),
+            vol.Optional(ATTR_FILE): cv.string,
+            vol.Optional(ATTR_LANGUAGE, default="zh"): vol.In(SUPPORT_LANGUAGES),
+            vol.Optional(CONF_VOICE): vol.In(VOICES),
+        }
+    ),
+    cv.has_at_least_one_key(ATTR_MESSAGES, ATTR_FILE),
+)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the Qwen3 Speech services."""
+
+    async def async_preload(call: ServiceCall) -> None:
+        """Synthesize messages into the audio cache in the background."""
+        messages = list(call.data.get(ATTR_MESSAGES, []))
+        if path := call.data.get(ATTR_FILE):
+            messages.extend(await _async_read_messages(hass, path))
+        # Drop duplicates, keeping the order
+        messages = list(
+            {normalize_text(msg): msg for msg in messages if msg.strip()}.values()
+        )
+
+        for entry in _preload_entries(hass, call.data.get(ATTR_CONFIG_ENTRY_ID)):
+            entry.async_create_background_task(
+                hass,
+                _async_preload_entry(
+                    hass,
+                    entry,
+                    messages,
+                    call.data[ATTR_LANGUAGE],
+                    call.data.get(CONF_VOICE),
+                ),
+                f"{DOMAIN} preload {entry.entry_id}",
+            )
+
+    hass.services.async_register(
+        DOMAIN, SERVICE_PRELOAD, async_preload, schema=PRELOAD_SCHEMA
+    )
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Set up Qwen3 Speech from a config entry."""
+    cache = TTSCache(
+        hass,
+        entry.entry_id,
+        entry.data.get(CONF_CACHE_SIZE, DEFAULT_CACHE_SIZE) * 1024 * 1024,
+    )
+    await cache.async_load()
+
+    # Connect to the API while the rest of the entry is set up
+    scheduler = RequestScheduler(
+        entry.data.get(CONF_MAX_CONCURRENT, DEFAULT_MAX_CONCURRENT)
+    )
+    client = DashScopeClient(
+        hass,
+        entry.data[CONF_API_KEY],
+        scheduler=scheduler,
+        endpoints=parse_endpoints(entry.data.get(CONF_ENDPOINTS, DEFAULT_ENDPOINTS)),
+        extra_api_keys=split_list(
+            entry.data.get(CONF_EXTRA_API_KEYS, DEFAULT_EXTRA_API_KEYS)
+        ),
+    )
+    entry.async_create_background_task(
+        hass, client.async_start(), f"{DOMAIN} connect {entry.entry_id}"
+    )
+    recorder = TrafficRecorder(hass, entry)
+    client.metrics.on_request = recorder.record_request
+
     hass.data.setdefault(DOMAIN, {})
-    hass.data[DOMAIN][entry.entry_id] = {}
+    hass.data[DOMAIN][entry.entry_id] = {
+        DATA_CACHE: cache,
+        DATA_CLIENT: client,
+        DATA_RECORDER: recorder,
+        DATA_SETUP_OPTIONS: {key: entry.data.get(key) for key in RELOAD_OPTIONS},
+    }
 
-    await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    try:
+        await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
+    except Exception:
+        # Setup is retried with a new client, do not leak this one's session
+        hass.data[DOMAIN].pop(entry.entry_id)
+        await client.async_close()
+        raise
+    _keep_critical_phrases(hass, entry)
 
     entry.async_on_unload(entry.add_update_listener(_async_update_listener))
     return True
 
 
+def _keep_critical_phrases(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Render critical phrases missing from the cache in the background."""
+    entity = hass.data[DOMAIN][entry.entry_id][DATA_TTS_ENTITY]
+    entry.async_create_background_task(
+        hass, entity.async_keep_critical(), f"{DOMAIN} critical {entry.entry_id}"
+    )
+
+
 async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
-    """Reload entry when options change."""
-    await hass.config_entries.async_reload(entry.entry_id)
+    """Reload entry when options change that are only read at setup.
+
+    Changes to the others, e.g. voice or speed, apply to the next request.
+    """
+    setup_options = hass.data[DOMAIN][entry.entry_id][DATA_SETUP_OPTIONS]
+    if any(entry.data.get(key) != setup_options[key] for key in RELOAD_OPTIONS):
+        await hass.config_entries.async_reload(entry.entry_id)
+    else:
+        _LOGGER.debug("Options of %s applied without reload", entry.title)
+        # The model, voice or the phrases themselves may have changed
+        _keep_critical_phrases(hass, entry)
 
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     if unload_ok := await hass.config_entries.async_unload_platforms(entry, PLATFORMS):
-        hass.data[DOMAIN].pop(entry.entry_id)
+        entry_data = hass.data[DOMAIN].pop(entry.entry_id)
+        await entry_data[DATA_CACHE].async_flush()
+        await entry_data[DATA_CLIENT].async_close()
+        await entry_data[DATA_RECORDER].async_flush()
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove cached audio when a config entry is deleted."""
+    await async_remove_cache(hass, entry.entry_id)
+
+
+async def _async_read_messages(hass: HomeAssistant, path: str) -> list[str]:
+    """Read messages from a text file, one per line.
+
+    Blank lines and lines starting with # are ignored.
+    """
+    path = hass.config.path(path)
+    if not hass.config.is_allowed_path(path):
+        raise ServiceValidationError(f"Access to {path} is not allowed")
+
+    def _read() -> list[str]:
+        with open(path, encoding="utf-8") as file:
+            return [
+                line.strip()
+                for line in file
+                if line.strip() and not line.lstrip().startswith("#")
+            ]
+
+    try:
+        return await hass.async_add_executor_job(_read)
+    except OSError as err:
+        raise ServiceValidationError(f"Cannot read {path}: {err}") from err
+
+
+def _preload_entries(
+    hass: HomeAssistant, entry_id: str | None
+) -> list[ConfigEntry]:
+    """Return the loaded entries a preload call applies to."""
+    entries = [
+        entry
+        for entry in hass.config_entries.async_entries(DOMAIN)
+        if entry.state is ConfigEntryState.LOADED
+        and (entry_id is None or entry.entry_id == entry_id)
+    ]
+    if not entries:
+        raise ServiceValidationError("No loaded Qwen3 Speech entry to preload")
+    return entries
+
+
+async def _async_preload_entry(
+    hass: HomeAssistant,
+    entry: ConfigEntry,
+    messages: list[str],
+    language: str,
+    voice: str | None,
+) -> None:
+    """Synthesize messages that are not cached yet, a few at a time.
+
+    Requests use the lowest scheduling priority, so preloading never holds
+    up interactive requests. Progress is fired as an event per message.
+    """
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    if not entry_data[DATA_CACHE].max_bytes:
+        _LOGGER.warning("Audio cache is disabled, nothing to preload")
+        return
+
+    entity = entry_data[DATA_TTS_ENTITY]
+    semaphore = asyncio.Semaphore(PRELOAD_MAX_PARALLEL)
+    progress = {"total": len(messages), "synthesized": 0, "skipped": 0, "failed": 0}
+
+    async def preload(message: str) -> None:
+        async with semaphore:
+            try:
+                synthesized = await entity.async_preload(message, language, voice)
+            except HomeAssistantError as err:
+                _LOGGER.warning("Preload failed: %s", err)
+                progress["failed"] += 1
+            else:
+                progress["synthesized" if synthesized else "skipped"] += 1
+        hass.bus.async_fire(
+            PRELOAD_PROGRESS_EVENT,
+            {ATTR_CONFIG_ENTRY_ID: entry.entry_id, **progress},
+        )
+
+    _LOGGER.info("Preloading %d message(s)", len(messages))
+    await asyncio.gather(*(preload(message) for message in messages))
+    _LOGGER.info(
+        "Preload finished: %d synthesized, %d already cached, %d failed",
+        progress["synthesized"],
+        progress["skipped"],
+        progress["failed"],
+    )
@@ -0,0 +1,508 @@
+"""DashScope API client for the Qwen3 Speech integration."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator, Callable, Sequence
+from contextlib import (
+    AbstractAsyncContextManager,
+    asynccontextmanager,
+    nullcontext,
+)
+from datetime import datetime, timedelta
+import json
+import logging
+import time
+from typing import Any
+
+import aiohttp
+from yarl import URL
+
+from homeassistant.const import EVENT_HOMEASSISTANT_CLOSE
+from homeassistant.core import CALLBACK_TYPE, Event, HomeAssistant, callback
+from homeassistant.helpers.aiohttp_client import SERVER_SOFTWARE
+from homeassistant.helpers.event import async_track_time_interval
+from homeassistant.util import ssl as ssl_util
+
+from .const import (
+    CLIENT_DNS_CACHE_TTL,
+    CLIENT_KEEPALIVE_TIMEOUT,
+    CLIENT_MAX_CONNECTIONS_PER_HOST,
+    CLIENT_PING_INTERVAL,
+    CLIENT_PING_TIMEOUT,
+    ERROR_BODY_MAX_CHARS,
+    PROBE_TIMEOUT,
+    RETRY_ATTEMPTS,
+    RETRY_DEADLINE,
+)
+from .metrics import EntryMetrics, RequestTimer, http_error_class, trace_config
+from .resilience import (
+    ApiError,
+    CircuitBreaker,
+    CircuitOpenError,
+    backoff_delay,
+    is_retryable_status,
+    parse_retry_after,
+)
+from .router import DEFAULT_ENDPOINT, Endpoint, Router, Target
+from .scheduler import Priority, RequestScheduler
+from .shaper import TokenBucket, parse_rate_limit
+
+# URL and headers of a request to a target
+Route = Callable[[Target], tuple[str, dict[str, str]]]
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class DashScopeClient:
+    """Client for the DashScope endpoints used by one config entry.
+
+    The client owns its connection pool, so connections to the API host and
+    to the hosts serving synthesized audio stay open between requests. They
+    are opened when the entry is set up and kept warm with a cheap request
+    every CLIENT_PING_INTERVAL, so a request after a long idle period does
+    not pay for DNS, TCP and TLS setup.
+
+    Transient failures are retried with backoff, and every host has a
+    circuit breaker so requests fail fast while it is down. Every request
+    attempt is timed per stage and counted in metrics.
+
+    API requests are spread over the configured endpoints and API keys by a
+    Router, which prefers the fastest and switches keys when one is rate
+    limited.
+    """
+
+    def __init__(
+        self,
+        hass: HomeAssistant,
+        api_key: str,
+        session: aiohttp.ClientSession | None = None,
+        scheduler: RequestScheduler | None = None,
+        endpoints: Sequence[Endpoint] = (DEFAULT_ENDPOINT,),
+        extra_api_keys: Sequence[str] = (),
+    ) -> None:
+        """Initialize the client.
+
+        Without a session a dedicated one is created, which must be closed
+        with async_close(). Without a scheduler requests are not limited.
+        """
+        self.hass = hass
+        self.scheduler = scheduler
+        self.router = Router(endpoints, [api_key, *extra_api_keys])
+        # Origins to keep warm, download hosts are added as they are seen
+        self._origins: set[URL] = {
+            URL(endpoint.api_url).origin() for endpoint in endpoints
+        }
+        self._unsub_ping: CALLBACK_TYPE | None = None
+        self._unsub_close: CALLBACK_TYPE | None = None
+        self._closed = False
+        self._breakers: dict[str, CircuitBreaker] = {}
+        self.metrics = EntryMetrics()
+
+        self._owns_session = session is None
+        if session is None:
+            connector = aiohttp.TCPConnector(
+                ssl=ssl_util.client_context(),
+                limit_per_host=CLIENT_MAX_CONNECTIONS_PER_HOST,
+                keepalive_timeout=CLIENT_KEEPALIVE_TIMEOUT,
+                ttl_dns_cache=CLIENT_DNS_CACHE_TTL,
+            )
+            # Only a dedicated session is traced, so connect, upload and
+            # server times are missing for a shared one
+            session = aiohttp.ClientSession(
+                connector=connector,
+                headers={"User-Agent": SERVER_SOFTWARE},
+                trace_configs=[trace_config()],
+            )
+        self.session = session
+
+    @asynccontextmanager
+    async def post(
+        self,
+        *,
+        sse: bool = False,
+        priority: Priority = Priority.INTERACTIVE,
+        deadline: float = RETRY_DEADLINE,
+        operation: str = "api",
+        **kwargs: Any,
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        """Send a request to the generation API.
+
+        The operation (e.g. tts or asr) only labels the request in metrics.
+        The deadline covers all attempts up to the response headers, so
+        including the upload and the server's processing; operations that
+        take long when healthy pass a longer one.
+        """
+
+        def route(target: Target) -> tuple[str, dict[str, str]]:
+            headers = target.sse_headers if sse else target.headers
+            return target.endpoint.api_url, headers
+
+        async with self._async_request(
+            "POST", route, priority, deadline, operation, **kwargs
+        ) as response:
+            yield response
+
+    @asynccontextmanager
+    async def download(
+        self,
+        url: str,
+        *,
+        priority: Priority = Priority.INTERACTIVE,
+        deadline: float = RETRY_DEADLINE,
+        **kwargs: Any,
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        """Download a file produced by the API, e.g. synthesized audio."""
+        self._origins.add(URL(url).origin())
+        async with self._async_request(
+            "GET", url, priority, deadline, "download", **kwargs
+        ) as response:
+            yield response
+
+    async def async_list_models(self) -> set[str]:
+        """Return the IDs of the models the API key has access to.
+
+        Unlike a synthesis request, listing models costs no quota, so this is
+        the way to check an API key.
+        """
+        async with self._async_request(
+            "GET",
+            lambda target: (target.endpoint.models_url, target.headers),
+            Priority.INTERACTIVE,
+            PROBE_TIMEOUT,
+            "probe",
+        ) as response:
+            data = await response.json()
+        return {model["id"] for model in data.get("data", []) if "id" in model}
+
+    async def ws_connect(
+        self, model: str, **kwargs: Any
+    ) -> aiohttp.ClientWebSocketResponse:
+        """Open a realtime API websocket for a model.
+
+        There is no retry, callers fall back to a one-shot request.
+        """
+        target = self.router.choose("realtime", self._usable)
+        breaker = self._breaker(URL(target.endpoint.api_url))
+        timer = RequestTimer("realtime")
+        try:
+            breaker.check()
+        except CircuitOpenError:
+            self.metrics.record_error("circuit_open")
+            raise
+        if (bucket := target.bucket("realtime")) is not None:
+            loop = asyncio.get_running_loop()
+            await self._async_acquire(
+                bucket, Priority.INTERACTIVE, loop.time() + RETRY_DEADLINE, target
+            )
+        started = time.monotonic()
+        try:
+            ws = await self.session.ws_connect(
+                target.endpoint.realtime_url,
+                params={"model": model},
+                headers=target.realtime_headers,
+                **kwargs,
+            )
+        except aiohttp.WSServerHandshakeError as err:
+            if is_retryable_status(err.status) and err.status != 429:
+                breaker.record_failure()
+            self._record_status(target, err.status, None)
+            if bucket is not None and err.status == 429:
+                bucket.record_rate_limited(None)
+            self.metrics.record_error(http_error_class(err.status))
+            self.metrics.record_request(timer, err.status)
+            raise
+        except aiohttp.ClientConnectionError:
+            breaker.record_failure()
+            self.router.record_failure(target)
+            self.metrics.record_error("connection")
+            self.metrics.record_request(timer, None)
+            raise
+        breaker.record_success()
+        self.router.record_success(target, "realtime", time.monotonic() - started)
+        if bucket is not None:
+            bucket.record_success()
+        # Only the handshake is timed, the session itself is open ended
+        self.metrics.record_request(timer, 101)
+        return ws
+
+    @property
+    def breakers(self) -> dict[str, dict[str, Any]]:
+        """Return the circuit breaker state of every host."""
+        return {
+            host: {"state": breaker.state, "failures": breaker.failures}
+            for host, breaker in self._breakers.items()
+        }
+
+    def _breaker(self, url: URL) -> CircuitBreaker:
+        origin = url.origin()
+        if (breaker := self._breakers.get(origin.host)) is None:
+            breaker = self._breakers[origin.host] = CircuitBreaker(str(origin.host))
+        return breaker
+
+    def _usable(self, target: Target) -> bool:
+        """Return whether the host of a target is not failing."""
+        return self._breaker(URL(target.endpoint.api_url)).state != "open"
+
+    def _record_status(
+        self, target: Target, status: int, retry_after: float | None
+    ) -> None:
+        """Tell the router about an error response of a target."""
+        if status == 429:
+            self.router.record_rate_limited(target, retry_after)
+        elif status in (401, 403):
+            self.router.record_rejected(target)
+        elif is_retryable_status(status):
+            self.router.record_failure(target)
+
+    async def _async_acquire(
+        self, bucket: TokenBucket, priority: Priority, end: float, target: Target
+    ) -> None:
+        """Wait for a token of a bucket, raising ApiError past the deadline.
+
+        A request the key is paused for longer than the deadline fails
+        right away.
+        """
+        loop = asyncio.get_running_loop()
+        try:
+            if loop.time() + bucket.wait_time() >= end:
+                raise asyncio.TimeoutError
+            async with asyncio.timeout_at(end):
+                await bucket.async_acquire(priority)
+        except asyncio.TimeoutError:
+            self.metrics.record_error("throttled")
+            raise ApiError(
+                f"Rate limit of {target.key_name} leaves no room before the deadline",
+                status=429,
+            ) from None
+
+    def _slot(self, priority: Priority) -> AbstractAsyncContextManager[None]:
+        if self.scheduler is None:
+            return nullcontext()
+        return self.scheduler.slot(priority)
+
+    @asynccontextmanager
+    async def _async_request(
+        self,
+        method: str,
+        url: str | Route,
+        priority: Priority,
+        deadline: float,
+        operation: str,
+        **kwargs: Any,
+    ) -> AsyncIterator[aiohttp.ClientResponse]:
+        """Send a request, retrying transient failures until the deadline.
+
+        Every attempt waits for a scheduler slot, which is held until the
+        response is released. Only getting a successful response is retried,
+        reading its body is up to the caller. Raises ApiError once the
+        request failed for good.
+
+        Given a route instead of a URL, the router picks the target of every
+        attempt. A rate limited or rejected API key is then replaced by
+        another one right away, without backing off. Shaped operations wait
+        for a token of the key's bucket before a slot, so requests a rate
+        limited key would reject are paced instead of sent.
+
+        An attempt is recorded in metrics when it ends, so the download
+        stage of a successful one covers reading the body.
+        """
+        loop = asyncio.get_running_loop()
+        end = loop.time() + deadline
+        attempts = RETRY_ATTEMPTS
+        if callable(url):
+            attempts += len(self.router.targets) - 1
+        attempt = 0
+        while True:
+            attempt += 1
+            timer = RequestTimer(operation)
+            target: Target | None = None
+            bucket: TokenBucket | None = None
+            if callable(url):
+                target = self.router.choose(operation, self._usable)
+                if (bucket := target.bucket(operation)) is not None:
+                    await self._async_acquire(bucket, priority, end, target)
+            async with self._slot(priority):
+                timer.slot_acquired = time.monotonic()
+                if target is not None:
+                    request_url, headers = url(target)
+                    request_kwargs = {**kwargs, "headers": headers}
+                else:
+                    request_url, request_kwargs = url, kwargs
+                breaker = self._breaker(URL(request_url))
+                try:
+                    breaker.check()
+                except CircuitOpenError:
+                    self.metrics.record_error("circuit_open")
+                    raise
+                started = time.monotonic()
+                try:
+                    async with asyncio.timeout_at(end):
+                        response = await self.session.request(
+                            method,
+                            request_url,
+                            trace_request_ctx=timer,
+                            **request_kwargs,
+                        )
+                except asyncio.TimeoutError:
+                    breaker.record_failure()
+                    if target is not None:
+                        self.router.record_failure(target)
+                    self.metrics.record_error("timeout")
+                    self.metrics.record_request(timer, None)
+                    error = ApiError("Request timed out", retryable=True)
+                except (
+                    aiohttp.ClientConnectionError,
+                    aiohttp.ClientPayloadError,
+                ) as err:
+                    breaker.record_failure()
+                    if target is not None:
+                        self.router.record_failure(target)
+                    self.metrics.record_error("connection")
+                    self.metrics.record_request(timer, None)
+                    error = ApiError(f"Connection error: {err}", retryable=True)
+                else:
+                    if bucket is not None:
+                        bucket.record_limit(parse_rate_limit(response.headers))
+                    if response.status < 400:
+                        breaker.record_success()
+                        if target is not None:
+                            self.router.record_success(
+                                target, operation, time.monotonic() - started
+                            )
+                        if bucket is not None:
+                            bucket.record_success()
+                        try:
+                            yield response
+                        finally:
+                            response.release()
+                            timer.bytes_in = response.content.total_bytes
+                            self.metrics.record_request(timer, response.status)
+                        return
+                    error = await _async_response_error(response)
+                    timer.bytes_in = response.content.total_bytes
+                    self.metrics.record_error(http_error_class(response.status))
+                    self.metrics.record_request(timer, response.status)
+                    if target is not None:
+                        self._record_status(
+                            target, response.status, error.retry_after
+                        )
+                    if bucket is not None and response.status == 429:
+                        bucket.record_rate_limited(error.retry_after)
+                    # Rate limiting means the backend is up, just busy
+                    if error.retryable and error.status != 429:
+                        breaker.record_failure()
+                    else:
+                        breaker.record_success()
+
+            # Another key or endpoint can take over a rate limited or
+            # rejected request at once
+            switch = (
+                target is not None
+                and error.status in (401, 403, 429)
+                and self.router.has_alternative(target, self._usable)
+            )
+            if not error.retryable and not switch:
+                raise error
+            # The bucket paces the retry of a rate limited request itself
+            paced = bucket is not None and error.status == 429
+            if switch or paced:
+                delay = 0.0
+            else:
+                delay = backoff_delay(attempt, error.retry_after)
+            if attempt >= attempts or loop.time() + delay >= end:
+                raise error
+            _LOGGER.debug(
+                "%s %s failed (%s), retry %d in %.2f s",
+                method,
+                target.name if target is not None else URL(request_url).host,
+                error,
+                attempt,
+                delay,
+            )
+            await asyncio.sleep(delay)
+
+    async def async_start(self) -> None:
+        """Open connections now and keep them warm from here on."""
+        await self.async_ping()
+        if self._closed:
+            return
+        self._unsub_ping = async_track_time_interval(
+            self.hass,
+            self._async_ping_interval,
+            timedelta(seconds=CLIENT_PING_INTERVAL),
+            name="Qwen3 Speech keep-alive",
+        )
+        if self._owns_session:
+            self._unsub_close = self.hass.bus.async_listen_once(
+                EVENT_HOMEASSISTANT_CLOSE, self._async_on_close
+            )
+
+    async def async_ping(self) -> None:
+        """Send a light request to every known host.
+
+        Any response leaves a reusable connection in the pool. Failures only
+        mean the next real request has to connect itself.
+        """
+        await asyncio.gather(*(self._async_ping(origin) for origin in self._origins))
+
+    async def _async_ping(self, origin: URL) -> None:
+        try:
+            async with asyncio.timeout(CLIENT_PING_TIMEOUT):
+                async with self.session.head(origin) as response:
+                    await response.read()
+        except (asyncio.TimeoutError, aiohttp.ClientError) as err:
+            _LOGGER.debug("Keep-alive request to %s failed: %s", origin, err)
+
+    async def _async_ping_interval(self, _now: datetime) -> None:
+        await self.async_ping()
+
+    @callback
+    def _async_on_close(self, _event: Event) -> None:
+        self._unsub_close = None
+        self.hass.async_create_task(self.async_close())
+
+    async def async_close(self) -> None:
+        """Stop the keep-alive and close the dedicated session."""
+        self._closed = True
+        for unsub in (self._unsub_ping, self._unsub_close):
+            if unsub is not None:
+                unsub()
+        self._unsub_ping = self._unsub_close = None
+        if self._owns_session:
+            await self.session.close()
+
+
+def describe_error(data: Any) -> str:
+    """Return the code, message and request ID of an API response.
+
+    Used instead of the whole response in logs and errors, which may be
+    large and contain the synthesized text.
+    """
+    if not isinstance(data, dict):
+        return type(data).__name__
+    parts = [
+        f"{key}={data[key]}"
+        for key in ("code", "message", "request_id")
+        if data.get(key) not in (None, "")
+    ]
+    return ", ".join(parts) or "no error details"
+
+
+async def _async_response_error(response: aiohttp.ClientResponse) -> ApiError:
+    """Return the error of a failed response and release it."""
+    try:
+        body = await response.text()
+    except (aiohttp.ClientError, asyncio.TimeoutError, UnicodeDecodeError):
+        body = ""
+    finally:
+        response.release()
+    try:
+        details = describe_error(json.loads(body))
+    except ValueError:
+        details = body[:ERROR_BODY_MAX_CHARS] or "no error details"
+    return ApiError(
+        f"API returned status {response.status}: {details}",
+        status=response.status,
+        retryable=is_retryable_status(response.status),
+        retry_after=parse_retry_after(response.headers.get("Retry-After")),
+    )
@@ -0,0 +1,830 @@
+"""Audio helpers for the Qwen3 Speech integration."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncGenerator, AsyncIterator
+from math import gcd
+import os
+import shutil
+import struct
+import tempfile
+from typing import IO, NamedTuple
+
+import numpy as np
+
+from .const import (
+    RESAMPLE_KAISER_BETA,
+    RESAMPLE_ZERO_CROSSINGS,
+    STRETCH_FRAME_MS,
+    STRETCH_SEARCH_MS,
+    STT_SEGMENT_MAX_SECONDS,
+    STT_SEGMENT_SECONDS,
+    STT_SEGMENT_SILENCE_MS,
+    STT_SPOOL_MEMORY_BYTES,
+    STT_SPOOL_WRITE_SIZE,
+    TTS_CROSSFADE_MS,
+    VAD_ENERGY_MARGIN_DB,
+    VAD_FRAME_MS,
+    VAD_MIN_ENERGY_DB,
+    VAD_NOISE_FLOOR_DB,
+    VAD_NOISE_FLOOR_RISE_DB,
+    VAD_ZCR_THRESHOLD,
+)
+
+# RIFF/data size used when the final length of a WAV stream is unknown
+WAV_UNKNOWN_SIZE = 0xFFFFFFFF
+
+# ffmpeg muxer and encoder of each output format
+_FFMPEG_CODECS = {
+    "wav": ("wav", "pcm_s16le"),
+    "mp3": ("mp3", "libmp3lame"),
+    "ogg": ("ogg", "libopus"),
+    "flac": ("flac", "flac"),
+}
+# Opus only encodes at these sample rates
+_OPUS_SAMPLE_RATES = (8000, 12000, 16000, 24000, 48000)
+_FFMPEG_READ_SIZE = 64 * 1024
+
+_WAV_HEADER = struct.Struct("<4sI4s4sIHHIIHH4sI")
+
+
+def wav_header(
+    sample_rate: int,
+    channels: int = 1,
+    sample_width: int = 2,
+    data_size: int | None = None,
+) -> bytes:
+    """Build a PCM WAV header.
+
+    Without a data size the header describes an open-ended stream, which
+    lets audio be emitted before synthesis has finished.
+    """
+    if data_size is None:
+        riff_size = data_size = WAV_UNKNOWN_SIZE
+    else:
+        riff_size = 36 + data_size
+    block_align = channels * sample_width
+    return _WAV_HEADER.pack(
+        b"RIFF",
+        riff_size,
+        b"WAVE",
+        b"fmt ",
+        16,
+        1,
+        channels,
+        sample_rate,
+        sample_rate * block_align,
+        block_align,
+        sample_width * 8,
+        b"data",
+        data_size,
+    )
+
+
+class WavInfo(NamedTuple):
+    """PCM format of a WAV file."""
+
+    sample_rate: int
+    channels: int
+    sample_width: int
+
+
+def parse_wav(data: bytes) -> tuple[WavInfo, memoryview]:
+    """Return the format and a view of the PCM payload of a WAV file."""
+    if len(data) < 12 or data[:4] != b"RIFF" or data[8:12] != b"WAVE":
+        raise ValueError("Not a WAV file")
+
+    view = memoryview(data)
+    info: WavInfo | None = None
+    pos = 12
+    while pos + 8 <= len(data):
+        chunk_id = data[pos : pos + 4]
+        size = int.from_bytes(data[pos + 4 : pos + 8], "little")
+        body = pos + 8
+        if chunk_id == b"fmt ":
+            _, channels, sample_rate, _, _, bits = struct.unpack_from(
+                "<HHIIHH", data, body
+            )
+            info = WavInfo(sample_rate, channels, bits // 8)
+        elif chunk_id == b"data":
+            if info is None:
+                raise ValueError("WAV data chunk before fmt chunk")
+            # Streaming encoders leave the size as 0 or 0xFFFFFFFF
+            if size in (0, WAV_UNKNOWN_SIZE):
+                return info, view[body:]
+            return info, view[body : body + size]
+        pos = body + size + (size & 1)
+
+    raise ValueError("WAV file has no data chunk")
+
+
+def sniff_audio_format(head: bytes, content_type: str = "") -> str:
+    """Return wav, mp3 or ogg for the first bytes of an audio file.
+
+    Magic bytes win over the Content-Type, which storage services do not
+    always set; without either the audio is assumed to be WAV.
+    """
+    if head[:4] == b"RIFF" and head[8:12] == b"WAVE":
+        return "wav"
+    if head[:4] == b"OggS":
+        return "ogg"
+    # ID3 tag, or an MPEG audio frame sync
+    if head[:3] == b"ID3" or (
+        len(head) >= 2 and head[0] == 0xFF and head[1] & 0xE0 == 0xE0
+    ):
+        return "mp3"
+    if "mp3" in content_type or "mpeg" in content_type:
+        return "mp3"
+    if "opus" in content_type or "ogg" in content_type:
+        return "ogg"
+    return "wav"
+
+
+def join_audio(audio_format: str, parts: list[bytes]) -> bytes:
+    """Join clips of the same format into one file without re-encoding."""
+    if len(parts) == 1:
+        return parts[0]
+    if audio_format != "wav":
+        # MP3 frames and chained Ogg streams can simply be concatenated
+        return b"".join(parts)
+
+    parsed = [parse_wav(part) for part in parts]
+    info = parsed[0][0]
+    if any(part_info != info for part_info, _ in parsed):
+        raise ValueError("Cannot join WAV clips with different formats")
+
+    data_size = sum(len(pcm) for _, pcm in parsed)
+    return b"".join(
+        [
+            wav_header(info.sample_rate, info.channels, info.sample_width, data_size),
+            *(pcm for _, pcm in parsed),
+        ]
+    )
+
+
+class VoiceActivityDetector:
+    """Energy and zero-crossing voice activity detection for 16-bit PCM.
+
+    Frames are analysed in bulk with numpy. A frame counts as speech when its
+    energy is well above the noise floor (voiced sounds), or somewhat above
+    it with a high zero-crossing rate (unvoiced consonants such as "s" and
+    "f", which are quiet but noisy). The noise floor starts at
+    VAD_NOISE_FLOOR_DB, follows quieter frames down and rises slowly
+    towards louder background noise.
+    """
+
+    def __init__(
+        self, sample_rate: int, channels: int = 1, frame_ms: int = VAD_FRAME_MS
+    ) -> None:
+        """Initialize the detector."""
+        self.frame_ms = frame_ms
+        self._channels = channels
+        self._frame_samples = sample_rate * frame_ms // 1000
+        self.frame_bytes = self._frame_samples * channels * 2
+        self._noise_floor_db = VAD_NOISE_FLOOR_DB
+
+    def classify(self, pcm: bytes | bytearray | memoryview) -> np.ndarray:
+        """Return a speech flag for each complete frame of pcm."""
+        return self.analyze(pcm)[0]
+
+    def analyze(
+        self, pcm: bytes | bytearray | memoryview
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """Return the speech flag and energy in dB of each complete frame."""
+        frame_count = len(pcm) // self.frame_bytes
+        samples = np.frombuffer(
+            pcm, dtype="<i2", count=frame_count * self.frame_bytes // 2
+        )
+        frames = samples.reshape(frame_count, self._frame_samples, self._channels)
+        frames = frames.mean(axis=2, dtype=np.float32)
+
+        rms = np.sqrt(np.mean(np.square(frames), axis=1))
+        energy_db = 20 * np.log10(np.maximum(rms, 1.0) / 32768)
+        signs = np.signbit(frames)
+        zcr = np.count_nonzero(signs[:, 1:] != signs[:, :-1], axis=1) / (
+            self._frame_samples - 1
+        )
+
+        # floor[i] = min(floor[i - 1] + rise, energy_db[i]), without a loop
+        rise = VAD_NOISE_FLOOR_RISE_DB * self.frame_ms / 1000
+        steps = rise * np.arange(1, frame_count + 1, dtype=np.float32)
+        floor = steps + np.minimum(
+            np.minimum.accumulate(energy_db - steps), self._noise_floor_db
+        )
+        if frame_count:
+            self._noise_floor_db = float(floor[-1])
+        voiced = energy_db > np.maximum(
+            floor + VAD_ENERGY_MARGIN_DB, VAD_MIN_ENERGY_DB
+        )
+        unvoiced = (
+            energy_db > np.maximum(floor + VAD_ENERGY_MARGIN_DB / 2, VAD_MIN_ENERGY_DB)
+        ) & (zcr > VAD_ZCR_THRESHOLD)
+        return voiced | unvoiced, energy_db
+
+
+class SilenceSegmenter:
+    """Find where to cut a 16-bit mono PCM stream into segments.
+
+    A segment is cut once it is at least min_seconds long, in the middle of
+    the first pause of silence_ms after that. Without such a pause by
+    max_seconds it is cut before its quietest frame past min_seconds, where a
+    word boundary is most likely.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        min_seconds: int = STT_SEGMENT_SECONDS,
+        max_seconds: int = STT_SEGMENT_MAX_SECONDS,
+        silence_ms: int = STT_SEGMENT_SILENCE_MS,
+    ) -> None:
+        """Initialize the segmenter."""
+        self._vad = VoiceActivityDetector(sample_rate)
+        frame_ms = self._vad.frame_ms
+        self._frame_bytes = self._vad.frame_bytes
+        self._min_frames = min_seconds * 1000 // frame_ms
+        self._max_frames = max(max_seconds * 1000 // frame_ms, self._min_frames + 1)
+        self._silence_frames = max(1, silence_ms // frame_ms)
+        self._pending = bytearray()
+        self._frames = 0
+        self._segment_start = 0
+        # Energy of every frame of the current segment
+        self._energy: list[float] = []
+        self._silence_run = 0
+
+    def feed(self, pcm: bytes) -> list[int]:
+        """Add audio, returning the byte offsets of the cuts it completes."""
+        self._pending += pcm
+        usable = len(self._pending) - len(self._pending) % self._frame_bytes
+        if not usable:
+            return []
+        with memoryview(self._pending) as view, view[:usable] as frames:
+            flags, energy = self._vad.analyze(frames)
+        del self._pending[:usable]
+
+        cuts: list[int] = []
+        for is_speech, level in zip(flags.tolist(), energy.tolist()):
+            self._energy.append(level)
+            self._frames += 1
+            self._silence_run = 0 if is_speech else self._silence_run + 1
+            if self._frames - self._segment_start < self._min_frames:
+                continue
+            if self._silence_run >= self._silence_frames:
+                cut = self._frames - self._silence_run // 2
+            elif self._frames - self._segment_start >= self._max_frames:
+                window = self._energy[self._min_frames :]
+                cut = (
+                    self._segment_start
+                    + self._min_frames
+                    + window.index(min(window))
+                )
+            else:
+                continue
+            cuts.append(cut * self._frame_bytes)
+            del self._energy[: cut - self._segment_start]
+            self._segment_start = cut
+            self._silence_run = 0
+        return cuts
+
+
+class PcmSpool:
+    """Append-only audio buffer that moves to a temporary file when large.
+
+    Once in the file, audio is written in blocks from the executor with
+    positional reads and writes, so parts of it can be read back while more
+    is being appended.
+    """
+
+    def __init__(
+        self,
+        memory_limit: int = STT_SPOOL_MEMORY_BYTES,
+        write_size: int = STT_SPOOL_WRITE_SIZE,
+    ) -> None:
+        """Initialize the spool."""
+        self.size = 0
+        self._memory_limit = memory_limit
+        self._write_size = write_size
+        self._buffer = bytearray()
+        self._file: IO[bytes] | None = None
+        # Bytes already in the file, the buffer holds the ones after them
+        self._written = 0
+        self._lock = asyncio.Lock()
+
+    @property
+    def spilled(self) -> bool:
+        """Return whether the audio has moved to a temporary file."""
+        return self._file is not None
+
+    async def async_write(self, data: bytes) -> None:
+        """Append audio."""
+        self._buffer += data
+        self.size += len(data)
+        if self._file is None:
+            if self.size <= self._memory_limit:
+                return
+            loop = asyncio.get_running_loop()
+            self._file = await loop.run_in_executor(None, tempfile.TemporaryFile)
+        if len(self._buffer) >= self._write_size:
+            await self._async_flush()
+
+    async def _async_flush(self) -> None:
+        assert self._file is not None
+        async with self._lock:
+            if not self._buffer:
+                return
+            data = bytes(self._buffer)
+            offset = self._written
+            self._buffer.clear()
+            self._written += len(data)
+            await asyncio.get_running_loop().run_in_executor(
+                None, os.pwrite, self._file.fileno(), data, offset
+            )
+
+    async def async_read(self, start: int, end: int) -> bytes:
+        """Return the audio from byte start up to byte end."""
+        end = min(end, self.size)
+        if self._file is None:
+            return bytes(self._buffer[start:end])
+        # The lock waits for a block still being written
+        async with self._lock:
+            written = self._written
+            buffered = bytes(
+                self._buffer[max(start - written, 0) : max(end - written, 0)]
+            )
+            if start >= written:
+                return buffered
+            stored = await asyncio.get_running_loop().run_in_executor(
+                None,
+                os.pread,
+                self._file.fileno(),
+                min(end, written) - start,
+                start,
+            )
+        return stored + buffered
+
+    async def async_close(self) -> None:
+        """Release the buffer and remove the temporary file."""
+        self._buffer = bytearray()
+        if (file := self._file) is not None:
+            self._file = None
+            await asyncio.get_running_loop().run_in_executor(None, file.close)
+
+
+class PcmConverter:
+    """Streaming downmix and polyphase resampler for 16-bit PCM.
+
+    The anti-aliasing filter is a Kaiser windowed sinc split into one
+    sub-filter per output phase, so each output sample costs only a short
+    dot product, computed for a whole chunk at once with numpy.
+    """
+
+    def __init__(self, from_rate: int, channels: int, to_rate: int) -> None:
+        """Initialize the converter."""
+        divisor = gcd(from_rate, to_rate)
+        self._up = to_rate // divisor
+        self._down = from_rate // divisor
+        self._channels = channels
+        self._frame_bytes = channels * 2
+
+        max_rate = max(self._up, self._down)
+        self._half_len = RESAMPLE_ZERO_CROSSINGS * max_rate
+        n = np.arange(-self._half_len, self._half_len + 1)
+        taps = (
+            np.sinc(n / max_rate)
+            * np.kaiser(len(n), RESAMPLE_KAISER_BETA)
+            * (self._up / max_rate)
+        )
+        taps = np.concatenate([taps, np.zeros(-len(taps) % self._up)])
+        # phases[p, j] = taps[j * up + p]
+        self._phases = taps.reshape(-1, self._up).T.astype(np.float32)
+        self._phase_len = self._phases.shape[1]
+
+        # Zero history so the first outputs have a full filter window
+        self._buffer = np.zeros(self._phase_len - 1, dtype=np.float32)
+        self._buffer_start = 1 - self._phase_len
+        self._pending = b""
+        self._samples_in = 0
+        self._next_out = 0
+
+    def convert(self, pcm: bytes) -> bytes:
+        """Convert a chunk, returning all output that can be produced yet."""
+        data = self._pending + pcm if self._pending else pcm
+        usable = len(data) - len(data) % self._frame_bytes
+        self._pending = data[usable:]
+        samples = np.frombuffer(data, dtype="<i2", count=usable // 2)
+        mono = samples.reshape(-1, self._channels).mean(axis=1, dtype=np.float32)
+        self._samples_in += len(mono)
+        return self._process(mono, self._samples_in)
+
+    def flush(self) -> bytes:
+        """Return the remaining output once the input has ended."""
+        if self._up == self._down:
+            return b""
+        padding = np.zeros(self._half_len // self._up + 2, dtype=np.float32)
+        return self._process(padding, self._samples_in)
+
+    def _process(self, mono: np.ndarray, samples_in: int) -> bytes:
+        if self._up == self._down:
+            return np.rint(mono).astype("<i2").tobytes()
+
+        self._buffer = np.concatenate([self._buffer, mono])
+        buffer_end = self._buffer_start + len(self._buffer)
+
+        # Output m needs input up to (m * down + half_len) // up, and no
+        # output beyond the length of the real input is produced
+        last_out = min(
+            (buffer_end * self._up - self._half_len - 1) // self._down,
+            -(-samples_in * self._up // self._down) - 1,
+        )
+        if last_out < self._next_out:
+            return b""
+
+        out_index = np.arange(self._next_out, last_out + 1)
+        upsampled = out_index * self._down + self._half_len
+        phase = upsampled % self._up
+        window = (upsampled // self._up - self._buffer_start)[:, None] - np.arange(
+            self._phase_len
+        )
+        result = np.einsum("ij,ij->i", self._buffer[window], self._phases[phase])
+        self._next_out = last_out + 1
+
+        keep_from = (
+            self._next_out * self._down + self._half_len
+        ) // self._up - (self._phase_len - 1)
+        if keep_from > self._buffer_start:
+            self._buffer = self._buffer[keep_from - self._buffer_start :]
+            self._buffer_start = keep_from
+
+        return np.clip(np.rint(result), -32768, 32767).astype("<i2").tobytes()
+
+
+class TimeStretcher:
+    """Streaming WSOLA time-stretch for 16-bit mono PCM.
+
+    Changes the tempo of speech by rate (2.0 is twice as fast) without
+    changing its pitch. Hann windowed frames are overlap-added at a fixed
+    synthesis hop while the analysis position advances rate times as fast;
+    each frame is shifted by up to STRETCH_SEARCH_MS to where it best lines
+    up with the natural continuation of the previous frame, found with one
+    numpy cross-correlation per frame.
+    """
+
+    def __init__(
+        self,
+        sample_rate: int,
+        rate: float,
+        frame_ms: int = STRETCH_FRAME_MS,
+        search_ms: int = STRETCH_SEARCH_MS,
+    ) -> None:
+        """Initialize the stretcher."""
+        self.rate = rate
+        self._frame = sample_rate * frame_ms // 1000 // 2 * 2
+        self._hop = self._frame // 2
+        self._analysis_hop = self._hop * rate
+        self._tolerance = sample_rate * search_ms // 1000
+        # Periodic Hann windows at half overlap add up to exactly one
+        self._window = np.hanning(self._frame + 1)[:-1].astype(np.float32)
+
+        # Input starts with half a frame of silence so the first output
+        # samples get the full window weight
+        self._input = np.zeros(self._hop, dtype=np.float32)
+        self._input_start = -self._hop
+        self._output = np.zeros(self._frame, dtype=np.float32)
+        self._frame_index = 0
+        self._previous: int | None = None
+        self._pending = b""
+        self._samples_in = 0
+        self._samples_out = 0
+
+    def process(self, pcm: bytes) -> bytes:
+        """Stretch a chunk, returning all output that can be produced yet."""
+        data = self._pending + pcm if self._pending else pcm
+        usable = len(data) - len(data) % 2
+        self._pending = data[usable:]
+        if self.rate == 1:
+            return data[:usable]
+
+        samples = np.frombuffer(data, dtype="<i2", count=usable // 2)
+        self._samples_in += len(samples)
+        self._input = np.concatenate([self._input, samples.astype(np.float32)])
+        return self._run(final=False)
+
+    def flush(self) -> bytes:
+        """Return the remaining output once the input has ended."""
+        if self.rate == 1:
+            return b""
+        padding = self._frame + self._tolerance + int(self._analysis_hop) + 1
+        self._input = np.concatenate(
+            [self._input, np.zeros(padding, dtype=np.float32)]
+        )
+        return self._run(final=True)
+
+    def _run(self, final: bool) -> bytes:
+        frame, hop, tolerance = self._frame, self._hop, self._tolerance
+        total_out = round(self._samples_in / self.rate)
+        input_end = self._input_start + len(self._input)
+        emitted: list[np.ndarray] = []
+        produced = self._samples_out
+
+        while not final or produced < total_out:
+            position = round(self._frame_index * self._analysis_hop) - hop
+            needed = position + tolerance + frame
+            if self._previous is not None:
+                needed = max(needed, self._previous + hop + frame)
+            if needed > input_end:
+                break
+
+            if self._previous is None:
+                best = position
+            else:
+                # Continuation of the previous frame, and the candidates
+                natural = self._previous + hop - self._input_start
+                template = self._input[natural : natural + frame]
+                low = max(position - tolerance, self._input_start)
+                region = self._input[
+                    low - self._input_start : position + tolerance + frame
+                    - self._input_start
+                ]
+                scores = np.correlate(region, template, mode="valid")
+                best = low + int(np.argmax(scores))
+
+            start = best - self._input_start
+            self._output += self._window * self._input[start : start + frame]
+            self._previous = best
+            self._frame_index += 1
+
+            # The first hop of the output is complete, output before the
+            # start of the stream belongs to the leading silence
+            if self._frame_index > 1:
+                emitted.append(self._output[:hop].copy())
+                produced += hop
+            self._output = np.concatenate(
+                [self._output[hop:], np.zeros(hop, dtype=np.float32)]
+            )
+
+            keep_from = min(
+                self._previous,
+                round(self._frame_index * self._analysis_hop) - hop - tolerance,
+            )
+            if keep_from > self._input_start:
+                self._input = self._input[keep_from - self._input_start :]
+                self._input_start = keep_from
+
+        if not emitted:
+            return b""
+        result = np.concatenate(emitted)
+        if final:
+            result = result[: max(total_out - self._samples_out, 0)]
+        self._samples_out += len(result)
+        return np.clip(np.rint(result), -32768, 32767).astype("<i2").tobytes()
+
+
+class Crossfader:
+    """Join consecutive 16-bit mono PCM clips with short crossfades.
+
+    The last fade_ms of audio is held back until it is known whether another
+    clip follows. If one does, its start fades in over that end with
+    equal-power gains, which hides the step between separately synthesized
+    phrases. The joined audio is shorter by the overlap at every seam.
+    """
+
+    def __init__(self, sample_rate: int, fade_ms: int = TTS_CROSSFADE_MS) -> None:
+        """Initialize the crossfader."""
+        self._fade = sample_rate * fade_ms // 1000
+        self._pending = np.empty(0, dtype=np.float32)
+        # Start of the current clip, collected until it covers _pending
+        self._head: np.ndarray | None = None
+        self._remainder = b""
+
+    def next_clip(self) -> bytes:
+        """Start a new clip, returning output of a previous short clip."""
+        output = b""
+        if self._head is not None:
+            # The clip was shorter than the fade, blend what there is
+            output = self._emit(self._mix(self._pending, self._head))
+        self._remainder = b""
+        self._head = np.empty(0, dtype=np.float32) if len(self._pending) else None
+        return output
+
+    def process(self, pcm: bytes) -> bytes:
+        """Add a chunk of the current clip, returning the output ready."""
+        data = self._remainder + pcm if self._remainder else pcm
+        usable = len(data) - len(data) % 2
+        self._remainder = data[usable:]
+        samples = np.frombuffer(data, dtype="<i2", count=usable // 2).astype(
+            np.float32
+        )
+        if self._head is None:
+            return self._emit(np.concatenate([self._pending, samples]))
+        self._head = np.concatenate([self._head, samples])
+        if len(self._head) < len(self._pending):
+            return b""
+        samples = self._mix(self._pending, self._head)
+        self._head = None
+        return self._emit(samples)
+
+    def flush(self) -> bytes:
+        """Return the held back audio once the last clip has ended."""
+        samples = self._pending
+        if self._head is not None:
+            samples = self._mix(samples, self._head)
+        self._pending = np.empty(0, dtype=np.float32)
+        self._head = None
+        return _to_pcm(samples)
+
+    def _emit(self, samples: np.ndarray) -> bytes:
+        keep = min(self._fade, len(samples))
+        self._pending = samples[len(samples) - keep :]
+        self._head = None
+        return _to_pcm(samples[: len(samples) - keep])
+
+    @staticmethod
+    def _mix(tail: np.ndarray, head: np.ndarray) -> np.ndarray:
+        """Overlap the end of tail with the start of head."""
+        overlap = min(len(tail), len(head))
+        angle = (np.arange(overlap, dtype=np.float32) + 0.5) * (
+            np.pi / 2 / max(overlap, 1)
+        )
+        mixed = (
+            tail[len(tail) - overlap :] * np.cos(angle)
+            + head[:overlap] * np.sin(angle)
+        )
+        return np.concatenate([tail[: len(tail) - overlap], mixed, head[overlap:]])
+
+
+def _to_pcm(samples: np.ndarray) -> bytes:
+    return np.clip(np.rint(samples), -32768, 32767).astype("<i2").tobytes()
+
+
+def resample_wav(data: bytes, sample_rate: int) -> bytes:
+    """Resample a 16-bit mono WAV file."""
+    info, pcm = parse_wav(data)
+    if info.sample_rate == sample_rate:
+        return data
+    if info.channels != 1 or info.sample_width != 2:
+        raise ValueError("Only 16-bit mono WAV audio can be resampled")
+    converter = PcmConverter(info.sample_rate, 1, sample_rate)
+    resampled = converter.convert(bytes(pcm)) + converter.flush()
+    return wav_header(sample_rate, data_size=len(resampled)) + resampled
+
+
+def stretch_wav(data: bytes, rate: float) -> bytes:
+    """Time-stretch a 16-bit mono WAV file, keeping its pitch."""
+    info, pcm = parse_wav(data)
+    if info.channels != 1 or info.sample_width != 2:
+        raise ValueError("Only 16-bit mono WAV audio can be stretched")
+    stretcher = TimeStretcher(info.sample_rate, rate)
+    stretched = stretcher.process(bytes(pcm)) + stretcher.flush()
+    return wav_header(info.sample_rate, data_size=len(stretched)) + stretched
+
+
+async def async_encode_ogg_opus(
+    ffmpeg_binary: str,
+    pcm: bytes | bytearray,
+    sample_rate: int,
+    bitrate: str = "24k",
+) -> bytes:
+    """Encode 16-bit mono PCM to Opus in an Ogg container with ffmpeg."""
+    process = await asyncio.create_subprocess_exec(
+        ffmpeg_binary,
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        "-f",
+        "s16le",
+        "-ar",
+        str(sample_rate),
+        "-ac",
+        "1",
+        "-i",
+        "pipe:",
+        "-c:a",
+        "libopus",
+        "-b:a",
+        bitrate,
+        "-application",
+        "voip",
+        "-f",
+        "ogg",
+        "pipe:",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stdout, stderr = await process.communicate(pcm)
+    if process.returncode != 0 or not stdout:
+        raise AudioEncodeError(stderr.decode(errors="replace").strip())
+    return stdout
+
+
+def _ffmpeg_transcode_command(
+    ffmpeg_binary: str, input_args: list[str], output_format: str, sample_rate: int
+) -> list[str]:
+    """Return the ffmpeg command encoding stdin to mono audio on stdout."""
+    muxer, encoder = _FFMPEG_CODECS[output_format]
+    if encoder == "libopus" and sample_rate not in _OPUS_SAMPLE_RATES:
+        sample_rate = min(
+            (rate for rate in _OPUS_SAMPLE_RATES if rate >= sample_rate), default=48000
+        )
+    return [
+        ffmpeg_binary,
+        "-hide_banner",
+        "-loglevel",
+        "error",
+        *input_args,
+        "-i",
+        "pipe:",
+        "-ac",
+        "1",
+        "-ar",
+        str(sample_rate),
+        "-c:a",
+        encoder,
+        "-f",
+        muxer,
+        "pipe:",
+    ]
+
+
+async def async_transcode(
+    ffmpeg_binary: str,
+    data: bytes,
+    input_format: str,
+    output_format: str,
+    sample_rate: int,
+) -> bytes:
+    """Convert a complete audio file to another format with ffmpeg."""
+    process = await asyncio.create_subprocess_exec(
+        *_ffmpeg_transcode_command(
+            ffmpeg_binary, ["-f", input_format], output_format, sample_rate
+        ),
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    stdout, stderr = await process.communicate(data)
+    if process.returncode != 0 or not stdout:
+        raise AudioEncodeError(stderr.decode(errors="replace").strip())
+    return stdout
+
+
+async def async_transcode_stream(
+    ffmpeg_binary: str,
+    pcm: AsyncIterator[bytes],
+    input_rate: int,
+    output_format: str,
+    sample_rate: int,
+) -> AsyncGenerator[bytes]:
+    """Prepare encoding a 16-bit mono PCM stream with ffmpeg.
+
+    Returns a generator of the encoded audio as ffmpeg produces it, while
+    the PCM is fed from a task. Raises OSError if ffmpeg cannot be found.
+    ffmpeg is only started once the generator is read, so a stream that is
+    never played leaves no process behind; the generator raises OSError if
+    ffmpeg cannot be started then, AudioEncodeError if it fails later.
+    """
+    if shutil.which(ffmpeg_binary) is None:
+        raise FileNotFoundError(f"ffmpeg not found: {ffmpeg_binary}")
+
+    async def output() -> AsyncGenerator[bytes]:
+        process = await asyncio.create_subprocess_exec(
+            *_ffmpeg_transcode_command(
+                ffmpeg_binary,
+                ["-f", "s16le", "-ar", str(input_rate), "-ac", "1"],
+                output_format,
+                sample_rate,
+            ),
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.DEVNULL,
+        )
+        assert process.stdin is not None and process.stdout is not None
+        stdin, stdout = process.stdin, process.stdout
+
+        async def feed() -> None:
+            try:
+                async for chunk in pcm:
+                    stdin.write(chunk)
+                    await stdin.drain()
+            finally:
+                # Lets ffmpeg finish, also when the input failed
+                stdin.close()
+
+        feeder = asyncio.create_task(feed())
+        try:
+            while chunk := await stdout.read(_FFMPEG_READ_SIZE):
+                yield chunk
+            await feeder
+            if await process.wait() != 0:
+                raise AudioEncodeError(f"ffmpeg exited with {process.returncode}")
+        finally:
+            feeder.cancel()
+            if process.returncode is None:
+                process.kill()
+                await process.wait()
+
+    return output()
+
+
+class AudioEncodeError(Exception):
+    """Error to indicate audio could not be encoded."""
@@ -0,0 +1,363 @@
+"""Persistent audio cache for the Qwen3 Speech integration."""
+from __future__ import annotations
+
+from collections import OrderedDict
+from collections.abc import Iterable
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+from typing import Any, BinaryIO, NamedTuple
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import STORAGE_DIR, Store
+
+from .const import CACHE_SAVE_DELAY, CACHE_STORAGE_VERSION, DOMAIN
+from .text import normalize_text
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class CacheEntry(NamedTuple):
+    """Index entry of a cached clip."""
+
+    audio_format: str
+    size: int
+
+
+def cache_dir(hass: HomeAssistant, entry_id: str) -> str:
+    """Return the directory holding cached audio of a config entry."""
+    return hass.config.path(STORAGE_DIR, f"{DOMAIN}_cache", entry_id)
+
+
+class TTSCache:
+    """Size-bounded LRU cache of synthesized audio.
+
+    Audio files live in their own directory under .storage while the LRU
+    index is kept in memory (and persisted through a Store), so lookups
+    never touch the disk unless they hit. Pinned clips are never evicted
+    and do not count against the size limit.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry_id: str, max_bytes: int) -> None:
+        """Initialize the cache."""
+        self.hass = hass
+        self.max_bytes = max_bytes
+        self.directory = cache_dir(hass, entry_id)
+        self._store: Store[dict[str, Any]] = Store(
+            hass, CACHE_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.cache"
+        )
+        self._index: OrderedDict[str, CacheEntry] = OrderedDict()
+        # Phrase key -> key of the audio last stored for that phrase
+        self._latest: dict[str, str] = {}
+        self._pinned: set[str] = set()
+        self.total_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def make_key(model: str, voice: str, language_type: str, text: str) -> str:
+        """Return the cache key of a synthesis request.
+
+        Audio is cached as synthesized, the speed option is applied locally
+        on the way out, so it is not part of the key.
+        """
+        raw = "\x1f".join((model, voice, language_type, normalize_text(text)))
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    @staticmethod
+    def make_output_key(
+        key: str, audio_format: str, sample_rate: int, speed: float
+    ) -> str:
+        """Return the cache key of synthesized audio encoded for output.
+
+        Encoded audio is cached next to the synthesized original, which is
+        still needed for other formats and speeds.
+        """
+        raw = "\x1f".join((key, audio_format, str(sample_rate), str(speed)))
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    @staticmethod
+    def make_phrase_key(voice: str, language_type: str, text: str) -> str:
+        """Return the key of a phrase, the same for every model."""
+        raw = "\x1f".join((voice, language_type, normalize_text(text)))
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    @property
+    def stats(self) -> dict[str, int]:
+        """Return cache counters."""
+        return {
+            "entries": len(self._index),
+            "pinned": len(self._pinned & self._index.keys()),
+            "bytes": self.total_bytes,
+            "max_bytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
+
+    def __contains__(self, key: str) -> bool:
+        """Return whether audio is cached for a key."""
+        return key in self._index
+
+    def _path(self, key: str, entry: CacheEntry) -> str:
+        return os.path.join(self.directory, f"{key}.{entry.audio_format}")
+
+    async def async_load(self) -> None:
+        """Load the index and drop entries whose files went missing."""
+        data = await self._store.async_load() or {}
+        index = OrderedDict(
+            (key, CacheEntry(audio_format, size))
+            for key, audio_format, size in data.get("entries", [])
+        )
+        self._latest = data.get("latest", {})
+        self._pinned = set(data.get("pinned", []))
+
+        def _sync_files() -> set[str]:
+            os.makedirs(self.directory, exist_ok=True)
+            files = set(os.listdir(self.directory))
+            expected = {f"{key}.{entry.audio_format}" for key, entry in index.items()}
+            for orphan in files - expected:
+                os.remove(os.path.join(self.directory, orphan))
+            return files
+
+        files = await self.hass.async_add_executor_job(_sync_files)
+        for key, entry in index.items():
+            if f"{key}.{entry.audio_format}" in files:
+                self._index[key] = entry
+                self.total_bytes += entry.size
+
+        _LOGGER.debug(
+            "Loaded TTS cache: %d entries, %d bytes", len(self._index), self.total_bytes
+        )
+        await self._async_evict()
+
+    async def async_get(self, key: str) -> tuple[str, bytes] | None:
+        """Return (audio_format, data) for a key, or None on a miss."""
+        if (entry := self._index.get(key)) is None:
+            self.misses += 1
+            return None
+
+        def _read() -> bytes:
+            with open(self._path(key, entry), "rb") as file:
+                return file.read()
+
+        try:
+            data = await self.hass.async_add_executor_job(_read)
+        except OSError as err:
+            _LOGGER.warning("Dropping unreadable TTS cache entry: %s", err)
+            self._remove(key)
+            self.misses += 1
+            return None
+
+        self._index.move_to_end(key)
+        self._schedule_save()
+        self.hits += 1
+        return entry.audio_format, data
+
+    def link(self, phrase_key: str, key: str) -> None:
+        """Remember key as the latest audio of a phrase, if it is cached."""
+        if key in self._index and self._latest.get(phrase_key) != key:
+            self._latest[phrase_key] = key
+            self._schedule_save()
+
+    def has_stale(self, phrase_key: str) -> bool:
+        """Return whether audio was stored for a phrase before."""
+        return self._latest.get(phrase_key) in self._index
+
+    async def async_get_stale(self, phrase_key: str) -> tuple[str, bytes] | None:
+        """Return the audio last stored for a phrase, whatever its model."""
+        if (key := self._latest.get(phrase_key)) is None:
+            return None
+        return await self.async_get(key)
+
+    async def async_pin(self, keys: Iterable[str]) -> None:
+        """Pin the clips of keys (also ones stored later), unpinning others."""
+        self._pinned = set(keys)
+        self._schedule_save()
+        await self._async_evict()
+
+    def _accepts(self, key: str, size: int) -> bool:
+        """Return whether a clip fits in the cache, pinned clips always do."""
+        return key in self._pinned or (self.max_bytes > 0 and size <= self.max_bytes)
+
+    async def async_set(self, key: str, audio_format: str, data: bytes) -> None:
+        """Store audio for a key, evicting least recently used entries."""
+        if not self._accepts(key, len(data)):
+            return
+
+        entry = CacheEntry(audio_format, len(data))
+        path = self._path(key, entry)
+
+        def _write() -> None:
+            tmp_path = f"{path}.tmp"
+            with open(tmp_path, "wb") as file:
+                file.write(data)
+            os.replace(tmp_path, path)
+
+        try:
+            await self.hass.async_add_executor_job(_write)
+        except OSError as err:
+            _LOGGER.warning("Failed to write TTS cache entry: %s", err)
+            return
+
+        await self._async_add(key, entry)
+
+    def writer(self, key: str, audio_format: str) -> CacheWriter:
+        """Return a writer storing audio for a key while it is received."""
+        return CacheWriter(self, key, audio_format)
+
+    async def _async_add(self, key: str, entry: CacheEntry) -> None:
+        """Index a clip whose file has been written."""
+        if (old := self._index.pop(key, None)) is not None:
+            self.total_bytes -= old.size
+        self._index[key] = entry
+        self.total_bytes += entry.size
+        await self._async_evict()
+        self._schedule_save()
+
+    async def _async_evict(self) -> None:
+        """Drop least recently used entries until within budget."""
+        budget = self.max_bytes + sum(
+            entry.size for key, entry in self._index.items() if key in self._pinned
+        )
+        evicted: list[str] = []
+        for key in [key for key in self._index if key not in self._pinned]:
+            if self.total_bytes <= budget:
+                break
+            entry = self._index.pop(key)
+            self.total_bytes -= entry.size
+            self.evictions += 1
+            evicted.append(self._path(key, entry))
+
+        if not evicted:
+            return
+        self._latest = {
+            phrase_key: key
+            for phrase_key, key in self._latest.items()
+            if key in self._index
+        }
+
+        def _delete() -> None:
+            for path in evicted:
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+
+        await self.hass.async_add_executor_job(_delete)
+        self._schedule_save()
+
+    def _remove(self, key: str) -> None:
+        if (entry := self._index.pop(key, None)) is not None:
+            self.total_bytes -= entry.size
+            self._schedule_save()
+
+    def _data_to_save(self) -> dict[str, Any]:
+        return {
+            "entries": [
+                [key, entry.audio_format, entry.size]
+                for key, entry in self._index.items()
+            ],
+            "latest": self._latest,
+            "pinned": sorted(self._pinned),
+        }
+
+    def _schedule_save(self) -> None:
+        self._store.async_delay_save(self._data_to_save, CACHE_SAVE_DELAY)
+
+    async def async_flush(self) -> None:
+        """Persist the index right away."""
+        await self._store.async_save(self._data_to_save())
+
+
+class CacheWriter:
+    """Write a clip to the cache chunk by chunk.
+
+    Chunks go to a temporary file in the executor as they arrive, so the
+    clip never has to be held in memory. Only committed clips are indexed.
+    """
+
+    def __init__(self, cache: TTSCache, key: str, audio_format: str) -> None:
+        """Initialize the writer."""
+        self._cache = cache
+        self._key = key
+        self._audio_format = audio_format
+        self._file: BinaryIO | None = None
+        self._tmp_path = ""
+        self._failed = not cache._accepts(key, 0)
+        self.size = 0
+
+    async def async_write(self, data: bytes) -> None:
+        """Append a chunk of the clip."""
+        if self._failed:
+            return
+        if not self._cache._accepts(self._key, self.size + len(data)):
+            await self.async_abort()
+            return
+
+        def _write() -> None:
+            if self._file is None:
+                # Left-over temporary files are removed when the cache loads
+                fd, self._tmp_path = tempfile.mkstemp(
+                    suffix=".tmp", dir=self._cache.directory
+                )
+                self._file = os.fdopen(fd, "wb")
+            self._file.write(data)
+
+        try:
+            await self._cache.hass.async_add_executor_job(_write)
+        except OSError as err:
+            _LOGGER.warning("Failed to write TTS cache entry: %s", err)
+            await self.async_abort()
+            return
+        self.size += len(data)
+
+    async def async_commit(self) -> None:
+        """Store the complete clip in the cache."""
+        if self._failed or self._file is None:
+            return
+        self._failed = True
+        entry = CacheEntry(self._audio_format, self.size)
+        file = self._file
+        self._file = None
+        path = self._cache._path(self._key, entry)
+
+        def _finish() -> None:
+            file.close()
+            os.replace(self._tmp_path, path)
+
+        try:
+            await self._cache.hass.async_add_executor_job(_finish)
+        except OSError as err:
+            _LOGGER.warning("Failed to write TTS cache entry: %s", err)
+            return
+        await self._cache._async_add(self._key, entry)
+
+    async def async_abort(self) -> None:
+        """Discard the clip."""
+        self._failed = True
+        if (file := self._file) is None:
+            return
+        self._file = None
+
+        def _discard() -> None:
+            file.close()
+            os.remove(self._tmp_path)
+
+        try:
+            await self._cache.hass.async_add_executor_job(_discard)
+        except OSError as err:
+            _LOGGER.debug("Failed to remove partial TTS cache entry: %s", err)
+
+
+async def async_remove_cache(hass: HomeAssistant, entry_id: str) -> None:
+    """Delete all cached audio and the index of a config entry."""
+    await Store(
+        hass, CACHE_STORAGE_VERSION, f"{DOMAIN}.{entry_id}.cache"
+    ).async_remove()
+    await hass.async_add_executor_job(
+        shutil.rmtree, cache_dir(hass, entry_id), True
+    )
@@ -0,0 +1,132 @@
+"""Coalescing of identical concurrent requests for the Qwen3 Speech integration."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncGenerator, Awaitable, Callable, Hashable
+from typing import Generic, TypeVar
+
+_T = TypeVar("_T")
+
+
+class _Call(Generic[_T]):
+    """A call in flight and the number of callers waiting for it."""
+
+    def __init__(self, task: asyncio.Task[_T]) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight(Generic[_T]):
+    """Run identical concurrent calls only once.
+
+    The first caller of a key starts the call in its own task, everyone who
+    asks for the same key while it runs awaits that task and gets the same
+    result (or error). A caller that is cancelled only stops waiting; the
+    call itself is cancelled once no caller is left waiting for it.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the coalescer."""
+        self._calls: dict[Hashable, _Call[_T]] = {}
+        self.coalesced = 0
+
+    async def async_run(
+        self, key: Hashable, factory: Callable[[], Awaitable[_T]]
+    ) -> _T:
+        """Return the result of the call for key, starting it if needed."""
+        if (call := self._calls.get(key)) is None:
+            call = self._calls[key] = _Call(asyncio.create_task(factory()))
+            call.task.add_done_callback(lambda _: self._forget(key, call))
+        else:
+            self.coalesced += 1
+
+        call.waiters += 1
+        try:
+            return await asyncio.shield(call.task)
+        finally:
+            call.waiters -= 1
+            if not call.waiters and not call.task.done():
+                self._forget(key, call)
+                call.task.cancel()
+
+    def _forget(self, key: Hashable, call: _Call[_T]) -> None:
+        if self._calls.get(key) is call:
+            del self._calls[key]
+
+
+class _SharedStream:
+    """A stream read once and replayed to every subscriber."""
+
+    def __init__(self, source: AsyncGenerator[bytes]) -> None:
+        self.chunks: list[bytes] = []
+        self.done = False
+        self.error: Exception | None = None
+        self.subscribers = 0
+        self._changed = asyncio.Event()
+        self.task = asyncio.create_task(self._async_read(source))
+
+    async def _async_read(self, source: AsyncGenerator[bytes]) -> None:
+        try:
+            async for chunk in source:
+                self.chunks.append(chunk)
+                self._notify()
+        except Exception as err:  # handed to the subscribers and re-raised
+            self.error = err
+        finally:
+            self.done = True
+            self._notify()
+            await source.aclose()
+
+    def _notify(self) -> None:
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+    async def async_iterate(self) -> AsyncGenerator[bytes]:
+        """Yield all chunks so far, then the new ones as they arrive."""
+        index = 0
+        while True:
+            while index < len(self.chunks):
+                yield self.chunks[index]
+                index += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await self._changed.wait()
+
+
+class StreamFlight:
+    """Share one stream among identical concurrent requests.
+
+    Subscribers that join late first get the chunks they missed. The source
+    is cancelled once every subscriber is gone.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the coalescer."""
+        self._streams: dict[Hashable, _SharedStream] = {}
+        self.coalesced = 0
+
+    async def async_subscribe(
+        self, key: Hashable, factory: Callable[[], AsyncGenerator[bytes]]
+    ) -> AsyncGenerator[bytes]:
+        """Yield the chunks of the stream for key, starting it if needed."""
+        if (stream := self._streams.get(key)) is None:
+            stream = self._streams[key] = _SharedStream(factory())
+            stream.task.add_done_callback(lambda _: self._forget(key, stream))
+        else:
+            self.coalesced += 1
+
+        stream.subscribers += 1
+        try:
+            async for chunk in stream.async_iterate():
+                yield chunk
+        finally:
+            stream.subscribers -= 1
+            if not stream.subscribers and not stream.done:
+                self._forget(key, stream)
+                stream.task.cancel()
+
+    def _forget(self, key: Hashable, stream: _SharedStream) -> None:
+        if self._streams.get(key) is stream:
+            del self._streams[key]
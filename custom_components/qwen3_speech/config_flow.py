@@ -2,7 +2,10 @@
 from __future__ import annotations
 
 import asyncio
+from collections.abc import Iterable, Mapping, Sequence
+import hashlib
 import logging
+import time
 from typing import Any
 
 import aiohttp
@@ -11,24 +14,69 @@ import voluptuous as vol
 from homeassistant import config_entries
 from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
+from homeassistant.helpers import selector
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
+from .api import DashScopeClient
 from .const import (
     CONF_API_KEY,
+    CONF_CACHE_SIZE,
+    CONF_CRITICAL_PHRASES,
+    CONF_ENDPOINTS,
+    CONF_EXTRA_API_KEYS,
+    CONF_MAX_CONCURRENT,
+    CONF_SEGMENT_CACHE,
     CONF_SPEED,
+    CONF_STREAMING,
     CONF_STT_MODEL,
+    CONF_STT_OPUS,
+    CONF_STT_REALTIME_MODEL,
+    CONF_STT_SEGMENTATION,
+    CONF_STT_STREAMING,
+    CONF_TRAFFIC_LOG,
+    CONF_VAD,
+    CONF_VAD_SILENCE_MS,
+    CONF_TTS_DEADLINE_MS,
+    CONF_TTS_FORMAT,
     CONF_TTS_MODEL,
+    CONF_TTS_SAMPLE_RATE,
     CONF_VOICE,
-    DASHSCOPE_API_URL,
+    DATA_PROBES,
+    DEFAULT_CACHE_SIZE,
+    DEFAULT_CRITICAL_PHRASES,
+    DEFAULT_ENDPOINTS,
+    DEFAULT_EXTRA_API_KEYS,
+    DEFAULT_MAX_CONCURRENT,
+    DEFAULT_SEGMENT_CACHE,
     DEFAULT_SPEED,
+    DEFAULT_STREAMING,
     DEFAULT_STT_MODEL,
+    DEFAULT_STT_OPUS,
+    DEFAULT_STT_REALTIME_MODEL,
+    DEFAULT_STT_SEGMENTATION,
+    DEFAULT_STT_STREAMING,
+    DEFAULT_TRAFFIC_LOG,
+    DEFAULT_VAD,
+    DEFAULT_VAD_SILENCE_MS,
+    DEFAULT_TTS_DEADLINE_MS,
+    DEFAULT_TTS_FORMAT,
     DEFAULT_TTS_MODEL,
+    DEFAULT_TTS_SAMPLE_RATE,
     DEFAULT_VOICE,
     DOMAIN,
+    MAX_CACHE_SIZE,
+    MAX_CONCURRENT,
     MAX_SPEED,
+    MAX_TTS_DEADLINE_MS,
+    MAX_VAD_SILENCE_MS,
     MIN_SPEED,
+    PROBE_CACHE_TTL,
+    TTS_FORMATS,
+    TTS_SAMPLE_RATES,
     VOICES,
 )
+from .resilience import ApiError
+from .router import Endpoint, parse_endpoints, split_list
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -41,41 +89,75 @@ STEP_USER_DATA_SCHEMA = vol.Schema(
         vol.Optional(CONF_SPEED, default=DEFAULT_SPEED): vol.All(
             vol.Coerce(float), vol.Range(min=MIN_SPEED, max=MAX_SPEED)
         ),
+        vol.Optional(CONF_ENDPOINTS, default=DEFAULT_ENDPOINTS): str,
     }
 )
 
 
+async def _validate_input(hass: HomeAssistant, data: Mapping[str, Any]) -> None:
+    """Validate the endpoints and every API key of the user input."""
+    try:
+        endpoints = parse_endpoints(data.get(CONF_ENDPOINTS, DEFAULT_ENDPOINTS))
+    except ValueError as err:
+        raise InvalidEndpoint(str(err)) from err
+    models = (
+        data.get(CONF_TTS_MODEL, DEFAULT_TTS_MODEL),
+        data.get(CONF_STT_MODEL, DEFAULT_STT_MODEL),
+    )
+    api_keys = [
+        data[CONF_API_KEY],
+        *split_list(data.get(CONF_EXTRA_API_KEYS, DEFAULT_EXTRA_API_KEYS)),
+    ]
+    for api_key in dict.fromkeys(api_keys):
+        await _validate_api_key(hass, api_key, endpoints, models)
+
+
 async def _validate_api_key(
-    hass: HomeAssistant, api_key: str, tts_model: str, voice: str
+    hass: HomeAssistant,
+    api_key: str,
+    endpoints: Sequence[Endpoint],
+    models: Iterable[str],
 ) -> None:
-    """Validate API key by making a test TTS call."""
-    headers = {
-        "Authorization": f"Bearer {api_key}",
-        "Content-Type": "application/json",
-    }
-    payload = {
-        "model": tts_model,
-        "input": {
-            "text": "test",
-            "voice": voice,
-            "language_type": "Auto",
-        },
-    }
-    session = async_get_clientsession(hass)
+    """Validate API key by listing the models it has access to.
+
+    A key only has to be accepted by one of the endpoints, as keys are
+    bound to a region. The models are remembered per API key and endpoints
+    for PROBE_CACHE_TTL, so the options can be saved again without another
+    request.
+    """
+    probes: dict[str, tuple[float, frozenset[str]]] = hass.data.setdefault(
+        DATA_PROBES, {}
+    )
+    urls = " ".join(endpoint.api_url for endpoint in endpoints)
+    key = hashlib.sha256(f"{api_key} {urls}".encode()).hexdigest()
+    now = time.monotonic()
+    if (probe := probes.get(key)) is None or probe[0] < now:
+        available = await _async_list_models(hass, api_key, endpoints)
+        probe = probes[key] = (now + PROBE_CACHE_TTL, frozenset(available))
+
+    for model in models:
+        # The list is not guaranteed to be complete, so this is no error
+        if model not in probe[1]:
+            _LOGGER.warning("Model %s is not listed for this API key", model)
+
+
+async def _async_list_models(
+    hass: HomeAssistant, api_key: str, endpoints: Sequence[Endpoint]
+) -> set[str]:
+    """Return the models available to an API key.
+
+    The client moves on to the next endpoint if one rejects the key.
+    """
+    client = DashScopeClient(
+        hass, api_key, async_get_clientsession(hass), endpoints=endpoints
+    )
     try:
-        async with asyncio.timeout(15):
-            async with session.post(
-                DASHSCOPE_API_URL, json=payload, headers=headers
-            ) as response:
-                if response.status == 401:
-                    raise InvalidAuth("Invalid API key")
-                if response.status != 200:
-                    error_text = await response.text()
-                    _LOGGER.error("API validation failed: %s", error_text)
-                    raise CannotConnect(f"API returned status {response.status}")
-                result = await response.json()
-                if "output" not in result:
-                    raise CannotConnect("Unexpected API response format")
+        return await client.async_list_models()
+    except ApiError as err:
+        if err.status in (401, 403):
+            raise InvalidAuth("Invalid API key") from err
+        _LOGGER.error("API validation failed: %s", err)
+        raise CannotConnect(str(err)) from err
     except asyncio.TimeoutError as err:
         raise CannotConnect("Timeout connecting to DashScope API") from err
     except aiohttp.ClientError as err:
@@ -103,12 +185,9 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
 
         if user_input is not None:
             try:
-                await _validate_api_key(
-                    self.hass,
-                    user_input[CONF_API_KEY],
-                    user_input.get(CONF_TTS_MODEL, DEFAULT_TTS_MODEL),
-                    user_input.get(CONF_VOICE, DEFAULT_VOICE),
-                )
+                await _validate_input(self.hass, user_input)
+            except InvalidEndpoint:
+                errors["base"] = "invalid_endpoint"
             except CannotConnect:
                 errors["base"] = "cannot_connect"
             except InvalidAuth:
@@ -146,12 +225,10 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
         errors: dict[str, str] = {}
 
         if user_input is not None:
-            api_key = user_input[CONF_API_KEY]
-            tts_model = user_input.get(CONF_TTS_MODEL, DEFAULT_TTS_MODEL)
-            voice = user_input.get(CONF_VOICE, DEFAULT_VOICE)
-
             try:
-                await _validate_api_key(self.hass, api_key, tts_model, voice)
+                await _validate_input(self.hass, user_input)
+            except InvalidEndpoint:
+                errors["base"] = "invalid_endpoint"
             except CannotConnect:
                 errors["base"] = "cannot_connect"
             except InvalidAuth:
@@ -160,7 +237,8 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 _LOGGER.exception("Unexpected exception")
                 errors["base"] = "unknown"
             else:
-                # Update entry data with all new values
+                # Update entry data with all new values, the update listener
+                # decides whether the entry needs to be reloaded for them
                 self.hass.config_entries.async_update_entry(
                     self._config_entry,
                     data={**self._config_entry.data, **user_input},
@@ -193,6 +271,86 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 ): vol.All(
                     vol.Coerce(float), vol.Range(min=MIN_SPEED, max=MAX_SPEED)
                 ),
+                vol.Optional(
+                    CONF_STREAMING,
+                    default=current.get(CONF_STREAMING, DEFAULT_STREAMING),
+                ): bool,
+                vol.Optional(
+                    CONF_TTS_FORMAT,
+                    default=current.get(CONF_TTS_FORMAT, DEFAULT_TTS_FORMAT),
+                ): vol.In(TTS_FORMATS),
+                vol.Optional(
+                    CONF_TTS_SAMPLE_RATE,
+                    default=current.get(CONF_TTS_SAMPLE_RATE, DEFAULT_TTS_SAMPLE_RATE),
+                ): vol.All(vol.Coerce(int), vol.In(TTS_SAMPLE_RATES)),
+                vol.Optional(
+                    CONF_CACHE_SIZE,
+                    default=current.get(CONF_CACHE_SIZE, DEFAULT_CACHE_SIZE),
+                ): vol.All(vol.Coerce(int), vol.Range(min=0, max=MAX_CACHE_SIZE)),
+                vol.Optional(
+                    CONF_SEGMENT_CACHE,
+                    default=current.get(CONF_SEGMENT_CACHE, DEFAULT_SEGMENT_CACHE),
+                ): bool,
+                vol.Optional(
+                    CONF_TTS_DEADLINE_MS,
+                    default=current.get(CONF_TTS_DEADLINE_MS, DEFAULT_TTS_DEADLINE_MS),
+                ): vol.All(
+                    vol.Coerce(int), vol.Range(min=0, max=MAX_TTS_DEADLINE_MS)
+                ),
+                vol.Optional(
+                    CONF_CRITICAL_PHRASES,
+                    default=current.get(
+                        CONF_CRITICAL_PHRASES, DEFAULT_CRITICAL_PHRASES
+                    ),
+                ): selector.TextSelector(
+                    selector.TextSelectorConfig(multiline=True)
+                ),
+                vol.Optional(
+                    CONF_STT_STREAMING,
+                    default=current.get(CONF_STT_STREAMING, DEFAULT_STT_STREAMING),
+                ): bool,
+                vol.Optional(
+                    CONF_STT_REALTIME_MODEL,
+                    default=current.get(
+                        CONF_STT_REALTIME_MODEL, DEFAULT_STT_REALTIME_MODEL
+                    ),
+                ): str,
+                vol.Optional(
+                    CONF_VAD,
+                    default=current.get(CONF_VAD, DEFAULT_VAD),
+                ): bool,
+                vol.Optional(
+                    CONF_VAD_SILENCE_MS,
+                    default=current.get(CONF_VAD_SILENCE_MS, DEFAULT_VAD_SILENCE_MS),
+                ): vol.All(
+                    vol.Coerce(int), vol.Range(min=0, max=MAX_VAD_SILENCE_MS)
+                ),
+                vol.Optional(
+                    CONF_STT_OPUS,
+                    default=current.get(CONF_STT_OPUS, DEFAULT_STT_OPUS),
+                ): bool,
+                vol.Optional(
+                    CONF_STT_SEGMENTATION,
+                    default=current.get(
+                        CONF_STT_SEGMENTATION, DEFAULT_STT_SEGMENTATION
+                    ),
+                ): bool,
+                vol.Optional(
+                    CONF_MAX_CONCURRENT,
+                    default=current.get(CONF_MAX_CONCURRENT, DEFAULT_MAX_CONCURRENT),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=MAX_CONCURRENT)),
+                vol.Optional(
+                    CONF_ENDPOINTS,
+                    default=current.get(CONF_ENDPOINTS, DEFAULT_ENDPOINTS),
+                ): str,
+                vol.Optional(
+                    CONF_EXTRA_API_KEYS,
+                    default=current.get(CONF_EXTRA_API_KEYS, DEFAULT_EXTRA_API_KEYS),
+                ): str,
+                vol.Optional(
+                    CONF_TRAFFIC_LOG,
+                    default=current.get(CONF_TRAFFIC_LOG, DEFAULT_TRAFFIC_LOG),
+                ): bool,
             }
         )
 
@@ -209,3 +367,7 @@ class CannotConnect(Exception):
 
 class InvalidAuth(Exception):
     """Error to indicate invalid authentication."""
+
+
+class InvalidEndpoint(Exception):
+    """Error to indicate an endpoint is not a valid URL."""
@@ -2,10 +2,90 @@
 
 DOMAIN = "qwen3_speech"
 
-# DashScope API
-DASHSCOPE_API_URL = (
-    "https://dashscope.aliyuncs.com/api/v1/services/aigc/multimodal-generation/generation"
-)
+# DashScope API, paths relative to the base URL of an endpoint (region or
+# compatible gateway). The realtime API uses the websocket scheme.
+DASHSCOPE_BASE_URL = "https://dashscope.aliyuncs.com"
+DASHSCOPE_API_PATH = "/api/v1/services/aigc/multimodal-generation/generation"
+DASHSCOPE_REALTIME_PATH = "/api-ws/v1/realtime"
+DASHSCOPE_MODELS_PATH = "/compatible-mode/v1/models"
+
+# API key validation lists the available models, which costs no quota. The
+# result is kept per API key, so saving the options again skips the request.
+PROBE_TIMEOUT = 10.0
+PROBE_CACHE_TTL = 3600
+
+# Connection pool of the DashScope client, kept warm by a periodic request
+CLIENT_MAX_CONNECTIONS_PER_HOST = 10
+CLIENT_KEEPALIVE_TIMEOUT = 120
+CLIENT_DNS_CACHE_TTL = 600
+CLIENT_PING_INTERVAL = 45
+CLIENT_PING_TIMEOUT = 10
+
+# Retries of transient API failures (seconds), within a deadline per request
+RETRY_ATTEMPTS = 3
+RETRY_BASE_DELAY = 0.25
+RETRY_MAX_DELAY = 4.0
+RETRY_DEADLINE = 20.0
+
+# Circuit breaker per host: consecutive failures to open, seconds until probing
+BREAKER_FAILURE_THRESHOLD = 5
+BREAKER_RECOVERY_TIME = 30.0
+
+# Characters of a non-JSON error response kept in logs
+ERROR_BODY_MAX_CHARS = 200
+
+# Router across endpoints and API keys: weight of a new latency or error
+# sample in the moving averages, seconds of latency a failed request is
+# worth, share of requests sent to another target to keep its numbers
+# fresh, and seconds a key is left alone after a 429 without Retry-After or
+# after being rejected
+ROUTER_EWMA_ALPHA = 0.2
+ROUTER_ERROR_PENALTY = 2.0
+ROUTER_EXPLORE_RATE = 0.05
+ROUTER_RATE_LIMIT_COOLDOWN = 30.0
+ROUTER_REJECTED_COOLDOWN = 3600.0
+
+# Rate shaping per API key and operation: multiplier of the request rate on
+# a 429 (applied at most once per interval, seconds), growth per successful
+# request, the lowest rate (per second), seconds of burst, the window
+# (seconds) the sending rate is measured over, the one rate limit headers
+# are assumed to count over, and seconds without a 429 until a learned rate
+# is forgotten
+SHAPER_DECREASE = 0.7
+SHAPER_DECREASE_INTERVAL = 2.0
+SHAPER_INCREASE = 0.01
+SHAPER_MIN_RATE = 0.1
+SHAPER_BURST_SECONDS = 1.0
+SHAPER_WINDOW = 60.0
+SHAPER_HEADER_WINDOW = 60.0
+SHAPER_FORGET_AFTER = 300.0
+# Operations sharing a quota, others (validation, downloads) are not shaped
+SHAPER_BUCKETS = {"tts": "tts", "tts_stream": "tts", "asr": "stt", "realtime": "stt"}
+
+# Request scheduler: slots per entry kept free of lower priority requests
+SCHEDULER_INTERACTIVE_RESERVE = 1
+MAX_CONCURRENT = 16
+
+# Request metrics: latency histogram buckets (ms) and the request rate window
+METRICS_MIN_MS = 1.0
+METRICS_MAX_MS = 120_000.0
+METRICS_BUCKET_FACTOR = 1.25
+METRICS_RATE_WINDOW = 300
+METRICS_RATE_MAX_SAMPLES = 10_000
+
+# Traffic log: bytes per file, rotated files kept and seconds records are
+# buffered for before they are written
+TRAFFIC_LOG_MAX_BYTES = 2 * 1024 * 1024
+TRAFFIC_LOG_BACKUPS = 2
+TRAFFIC_LOG_FLUSH_DELAY = 10.0
+
+# TTS "priority" option values, announcements to many rooms should use bulk
+PRIORITIES = ["interactive", "bulk"]
+
+# TTS output formats and sample rates. DashScope only returns 24 kHz WAV/PCM,
+# other formats are encoded locally with ffmpeg, other rates resampled
+TTS_FORMATS = ["wav", "mp3", "ogg", "flac"]
+TTS_SAMPLE_RATES = [8000, 16000, 22050, 24000, 44100, 48000]
 
 # Config keys
 CONF_API_KEY = "api_key"
@@ -13,13 +93,78 @@ CONF_TTS_MODEL = "tts_model"
 CONF_STT_MODEL = "stt_model"
 CONF_VOICE = "voice"
 CONF_SPEED = "speed"
+CONF_STREAMING = "streaming"
+CONF_TTS_FORMAT = "tts_format"
+CONF_TTS_SAMPLE_RATE = "tts_sample_rate"
+CONF_CACHE_SIZE = "cache_size"
+CONF_SEGMENT_CACHE = "segment_cache"
+CONF_TTS_DEADLINE_MS = "tts_deadline_ms"
+CONF_CRITICAL_PHRASES = "critical_phrases"
+CONF_STT_STREAMING = "stt_streaming"
+CONF_STT_REALTIME_MODEL = "stt_realtime_model"
+CONF_STT_OPUS = "stt_opus"
+CONF_STT_SEGMENTATION = "stt_segmentation"
+CONF_VAD = "vad"
+CONF_VAD_SILENCE_MS = "vad_silence_ms"
+CONF_MAX_CONCURRENT = "max_concurrent"
+CONF_PRIORITY = "priority"
+CONF_ENDPOINTS = "endpoints"
+CONF_EXTRA_API_KEYS = "extra_api_keys"
+CONF_TRAFFIC_LOG = "traffic_log"
 
 # Defaults
 DEFAULT_TTS_MODEL = "qwen3-tts-flash"
 DEFAULT_STT_MODEL = "qwen3-asr-flash"
 DEFAULT_VOICE = "Cherry"
 DEFAULT_LANGUAGE = "Auto"
+DEFAULT_LANGUAGE_HINT = "zh"
 DEFAULT_SPEED = 1.0
+DEFAULT_STREAMING = True
+DEFAULT_TTS_FORMAT = "wav"
+DEFAULT_TTS_SAMPLE_RATE = 24000
+DEFAULT_CACHE_SIZE = 50
+DEFAULT_SEGMENT_CACHE = False
+DEFAULT_TTS_DEADLINE_MS = 0
+DEFAULT_CRITICAL_PHRASES = ""
+DEFAULT_STT_STREAMING = True
+DEFAULT_STT_REALTIME_MODEL = "qwen3-asr-flash-realtime"
+DEFAULT_STT_OPUS = False
+DEFAULT_STT_SEGMENTATION = True
+DEFAULT_VAD = True
+DEFAULT_VAD_SILENCE_MS = 800
+DEFAULT_MAX_CONCURRENT = 4
+DEFAULT_PRIORITY = "interactive"
+DEFAULT_ENDPOINTS = DASHSCOPE_BASE_URL
+DEFAULT_EXTRA_API_KEYS = ""
+DEFAULT_TRAFFIC_LOG = False
+
+# Keys in hass.data[DOMAIN][entry_id]
+DATA_CACHE = "cache"
+DATA_CLIENT = "client"
+DATA_RECORDER = "recorder"
+DATA_TTS_ENTITY = "tts_entity"
+DATA_SETUP_OPTIONS = "setup_options"
+
+# Key in hass.data of the API key probe results, shared by all entries
+DATA_PROBES = f"{DOMAIN}_probes"
+
+# Options only read when an entry is set up, changing them reloads the entry.
+# The entities read all others on every request.
+RELOAD_OPTIONS = (
+    CONF_API_KEY,
+    CONF_CACHE_SIZE,
+    CONF_MAX_CONCURRENT,
+    CONF_ENDPOINTS,
+    CONF_EXTRA_API_KEYS,
+)
+
+# Services
+SERVICE_PRELOAD = "preload"
+ATTR_MESSAGES = "messages"
+ATTR_FILE = "file"
+ATTR_LANGUAGE = "language"
+PRELOAD_MAX_PARALLEL = 2
+PRELOAD_PROGRESS_EVENT = f"{DOMAIN}_preload_progress"
 
 # Speed range
 MIN_SPEED = 0.5
@@ -91,5 +236,82 @@ LANGUAGE_MAP = {
 # Supported language codes
 SUPPORT_LANGUAGES = list(LANGUAGE_MAP.keys())
 
-# TTS text limit
-TTS_MAX_CHARS = 600
+# Long messages are split into chunks of at most TTS_CHUNK_CHARS (the first
+# at most TTS_FIRST_CHUNK_CHARS) that are synthesized in parallel
+TTS_CHUNK_CHARS = 200
+TTS_FIRST_CHUNK_CHARS = 60
+TTS_MAX_PARALLEL = 3
+# Time (seconds) a TTS request, retries included, may take
+TTS_REQUEST_TIMEOUT = 30
+
+# Streaming TTS output (SSE), 16-bit mono PCM
+TTS_SAMPLE_RATE = 24000
+TTS_STREAM_READ_TIMEOUT = 30
+
+# Synthesized audio files are downloaded in chunks, the format is detected
+# from the magic bytes at the start of the file
+TTS_DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# Downloaded audio not played yet moves to a temporary file beyond this
+TTS_DOWNLOAD_MEMORY_BYTES = 256 * 1024
+TTS_SNIFF_BYTES = 12
+
+# Segment cache: messages are cached phrase by phrase and the audio of the
+# phrases joined with short equal-power crossfades
+TTS_CROSSFADE_MS = 20
+
+# Latency budget: past this many ms audio rendered before for the same
+# phrase (by another model, say) is played while synthesis goes on
+MAX_TTS_DEADLINE_MS = 30000
+
+# Local time-stretch (WSOLA) applying the TTS speed option to PCM output
+STRETCH_FRAME_MS = 30
+STRETCH_SEARCH_MS = 10
+
+# Persistent TTS audio cache, size configured in MB
+CACHE_STORAGE_VERSION = 1
+CACHE_SAVE_DELAY = 30
+MAX_CACHE_SIZE = 2048
+
+# Time (seconds) a one-shot ASR request, retries and upload included, may take
+STT_REQUEST_TIMEOUT = 60
+
+# Realtime (websocket) STT timeouts
+STT_REALTIME_CONNECT_TIMEOUT = 10
+STT_REALTIME_FINISH_TIMEOUT = 15
+
+# Client-side voice activity detection on 16-bit PCM
+VAD_FRAME_MS = 30
+VAD_ENERGY_MARGIN_DB = 12.0
+VAD_MIN_ENERGY_DB = -55.0
+# Noise floor assumed before a quieter frame is seen, so speech right at the
+# start of a stream is not taken for noise; it rises this many dB a second
+# towards louder background noise
+VAD_NOISE_FLOOR_DB = -60.0
+VAD_NOISE_FLOOR_RISE_DB = 2.0
+VAD_ZCR_THRESHOLD = 0.25
+VAD_MIN_SPEECH_MS = 90
+VAD_PADDING_MS = 240
+# Speech found this early keeps all audio before it, its onset may have
+# been missed
+VAD_LEAD_IN_MS = 500
+MAX_VAD_SILENCE_MS = 5000
+
+# STT uploads are converted to 16 kHz mono 16-bit PCM
+STT_SAMPLE_RATE = 16000
+# Raw bytes base64-encoded at a time while audio arrives (multiple of 3)
+STT_B64_BLOCK_SIZE = 3 * 4096
+# Long one-shot recordings are cut at silences into segments of at least
+# STT_SEGMENT_SECONDS (at most STT_SEGMENT_MAX_SECONDS, at the quietest
+# frame if there is no silence), which overlap by STT_SEGMENT_OVERLAP_MS and
+# are transcribed in parallel
+STT_SEGMENT_SECONDS = 20
+STT_SEGMENT_MAX_SECONDS = 30
+STT_SEGMENT_SILENCE_MS = 300
+STT_SEGMENT_OVERLAP_MS = 1000
+STT_SEGMENT_MAX_PARALLEL = 3
+# Recorded audio moves to a temporary file beyond this size (about two
+# minutes of 16 kHz PCM), and is then written in blocks of this size
+STT_SPOOL_MEMORY_BYTES = 4 * 1024 * 1024
+STT_SPOOL_WRITE_SIZE = 256 * 1024
+RESAMPLE_ZERO_CROSSINGS = 10
+RESAMPLE_KAISER_BETA = 6.0
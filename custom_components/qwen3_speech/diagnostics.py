@@ -0,0 +1,38 @@
+"""Diagnostics support for the Qwen3 Speech integration."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import (
+    CONF_API_KEY,
+    CONF_EXTRA_API_KEYS,
+    DATA_CACHE,
+    DATA_CLIENT,
+    DATA_TTS_ENTITY,
+    DOMAIN,
+)
+
+TO_REDACT = {CONF_API_KEY, CONF_EXTRA_API_KEYS}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics of a config entry."""
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    client = entry_data[DATA_CLIENT]
+    tts_entity = entry_data.get(DATA_TTS_ENTITY)
+    return {
+        "config": async_redact_data(dict(entry.data), TO_REDACT),
+        "metrics": client.metrics.as_dict(),
+        "scheduler": client.scheduler.stats if client.scheduler else None,
+        "breakers": client.breakers,
+        "routes": client.router.stats,
+        "rate_limits": client.router.rate_limits,
+        "cache": entry_data[DATA_CACHE].stats,
+        "coalesced": tts_entity.coalesced if tts_entity else None,
+    }
@@ -0,0 +1,279 @@
+"""Request metrics for the Qwen3 Speech integration."""
+from __future__ import annotations
+
+from bisect import bisect_left
+from collections import Counter, deque
+from collections.abc import Callable
+import time
+from types import SimpleNamespace
+from typing import Any
+
+import aiohttp
+
+from .const import (
+    METRICS_BUCKET_FACTOR,
+    METRICS_MAX_MS,
+    METRICS_MIN_MS,
+    METRICS_RATE_MAX_SAMPLES,
+    METRICS_RATE_WINDOW,
+)
+
+# Stages of a request, in order
+STAGES = ("queue", "connect", "upload", "server", "download", "total")
+
+
+def _bucket_bounds() -> list[float]:
+    bounds = [METRICS_MIN_MS]
+    while bounds[-1] < METRICS_MAX_MS:
+        bounds.append(bounds[-1] * METRICS_BUCKET_FACTOR)
+    return bounds
+
+
+_BOUNDS = _bucket_bounds()
+
+
+class Histogram:
+    """Fixed-size latency histogram with log-spaced buckets (milliseconds).
+
+    Memory does not grow with the number of samples. Percentiles are
+    interpolated within a bucket, so they are accurate to the bucket width
+    (METRICS_BUCKET_FACTOR).
+    """
+
+    def __init__(self) -> None:
+        """Initialize the histogram."""
+        # One bucket per bound plus one for everything above the last bound
+        self.buckets = [0] * (len(_BOUNDS) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, value_ms: float) -> None:
+        """Add a sample."""
+        self.buckets[bisect_left(_BOUNDS, value_ms)] += 1
+        self.count += 1
+        self.total += value_ms
+        self.max = max(self.max, value_ms)
+
+    def percentile(self, fraction: float) -> float | None:
+        """Return the value below which fraction of the samples fall."""
+        if not self.count:
+            return None
+        rank = fraction * self.count
+        seen = 0
+        for index, count in enumerate(self.buckets):
+            if count and seen + count >= rank:
+                low = _BOUNDS[index - 1] if index else 0.0
+                high = _BOUNDS[index] if index < len(_BOUNDS) else self.max
+                value = low + (high - low) * (rank - seen) / count
+                return round(min(value, self.max), 1)
+            seen += count
+        return round(self.max, 1)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return a summary of the samples."""
+        return {
+            "count": self.count,
+            "mean": round(self.total / self.count, 1) if self.count else None,
+            "p50": self.percentile(0.5),
+            "p95": self.percentile(0.95),
+            "p99": self.percentile(0.99),
+            "max": round(self.max, 1),
+        }
+
+
+class RequestTimer:
+    """Timestamps and sizes of a single HTTP request, filled in by tracing.
+
+    Tracing only sees bodies read as a whole, so bytes_in is taken from the
+    response stream when the response is released, which also counts SSE
+    lines and downloads read chunk by chunk.
+    """
+
+    def __init__(self, operation: str) -> None:
+        """Initialize the timer."""
+        self.operation = operation
+        self.created = time.monotonic()
+        self.slot_acquired: float | None = None
+        self.sent: float | None = None
+        self.connect = 0.0
+        self.pool_wait = 0.0
+        self.uploaded: float | None = None
+        self.headers_received: float | None = None
+        self.bytes_out = 0
+        self.bytes_in = 0
+        self._mark: float | None = None
+
+    def stages(self, finished: float) -> dict[str, float]:
+        """Return the duration of each known stage in milliseconds."""
+        stages = {"total": finished - self.created}
+        sent = self.sent if self.sent is not None else self.slot_acquired
+        if sent is not None:
+            stages["queue"] = sent - self.created + self.pool_wait
+        if self.sent is not None:
+            stages["connect"] = self.connect
+        if self.sent is not None and self.uploaded is not None:
+            stages["upload"] = max(
+                self.uploaded - self.sent - self.connect - self.pool_wait, 0.0
+            )
+        if self.uploaded is not None and self.headers_received is not None:
+            stages["server"] = self.headers_received - self.uploaded
+        if self.headers_received is not None:
+            stages["download"] = finished - self.headers_received
+        return {stage: value * 1000 for stage, value in stages.items()}
+
+
+class EntryMetrics:
+    """Request metrics of one config entry."""
+
+    def __init__(self) -> None:
+        """Initialize the metrics."""
+        self.stages = {stage: Histogram() for stage in STAGES}
+        self.operations: dict[str, Histogram] = {}
+        self.status_codes: Counter[str] = Counter()
+        self.errors: Counter[str] = Counter()
+        self.requests = 0
+        self.bytes_in = 0
+        self.bytes_out = 0
+        self._recent: deque[float] = deque(maxlen=METRICS_RATE_MAX_SAMPLES)
+        # Called with every finished attempt and its stages, e.g. to log it
+        self.on_request: (
+            Callable[[RequestTimer, int | None, dict[str, float]], None] | None
+        ) = None
+
+    def record_request(self, timer: RequestTimer, status: int | None) -> None:
+        """Record a finished request attempt."""
+        now = time.monotonic()
+        stages = timer.stages(now)
+        for stage, value in stages.items():
+            self.stages[stage].record(value)
+        if (histogram := self.operations.get(timer.operation)) is None:
+            histogram = self.operations[timer.operation] = Histogram()
+        histogram.record(stages["total"])
+        if status is not None:
+            self.status_codes[str(status)] += 1
+        self.requests += 1
+        self.bytes_in += timer.bytes_in
+        self.bytes_out += timer.bytes_out
+        self._recent.append(now)
+        if self.on_request is not None:
+            self.on_request(timer, status, stages)
+
+    def record_error(self, error_class: str) -> None:
+        """Count a failed request attempt by class."""
+        self.errors[error_class] += 1
+
+    @property
+    def requests_per_minute(self) -> float:
+        """Return the request rate over the last METRICS_RATE_WINDOW seconds."""
+        cutoff = time.monotonic() - METRICS_RATE_WINDOW
+        while self._recent and self._recent[0] < cutoff:
+            self._recent.popleft()
+        return round(len(self._recent) * 60 / METRICS_RATE_WINDOW, 1)
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return all metrics."""
+        return {
+            "requests": self.requests,
+            "requests_per_minute": self.requests_per_minute,
+            "bytes_in": self.bytes_in,
+            "bytes_out": self.bytes_out,
+            "stages_ms": {
+                stage: histogram.as_dict() for stage, histogram in self.stages.items()
+            },
+            "operations_ms": {
+                operation: histogram.as_dict()
+                for operation, histogram in self.operations.items()
+            },
+            "status_codes": dict(self.status_codes),
+            "errors": dict(self.errors),
+        }
+
+
+def _timer(trace_config_ctx: SimpleNamespace) -> RequestTimer | None:
+    timer = trace_config_ctx.trace_request_ctx
+    return timer if isinstance(timer, RequestTimer) else None
+
+
+async def _on_request_start(
+    session: aiohttp.ClientSession, ctx: SimpleNamespace, params: Any
+) -> None:
+    if timer := _timer(ctx):
+        timer.sent = time.monotonic()
+
+
+async def _on_queued_start(
+    session: aiohttp.ClientSession, ctx: SimpleNamespace, params: Any
+) -> None:
+    if timer := _timer(ctx):
+        timer._mark = time.monotonic()
+
+
+async def _on_queued_end(
+    session: aiohttp.ClientSession, ctx: SimpleNamespace, params: Any
+) -> None:
+    if (timer := _timer(ctx)) and timer._mark is not None:
+        timer.pool_wait += time.monotonic() - timer._mark
+
+
+async def _on_create_start(
+    session: aiohttp.ClientSession, ctx: SimpleNamespace, params: Any
+) -> None:
+    if timer := _timer(ctx):
+        timer._mark = time.monotonic()
+
+
+async def _on_create_end(
+    session: aiohttp.ClientSession, ctx: SimpleNamespace, params: Any
+) -> None:
+    if (timer := _timer(ctx)) and timer._mark is not None:
+        timer.connect += time.monotonic() - timer._mark
+
+
+async def _on_headers_sent(
+    session: aiohttp.ClientSession, ctx: SimpleNamespace, params: Any
+) -> None:
+    if timer := _timer(ctx):
+        timer.uploaded = time.monotonic()
+
+
+async def _on_chunk_sent(
+    session: aiohttp.ClientSession,
+    ctx: SimpleNamespace,
+    params: aiohttp.TraceRequestChunkSentParams,
+) -> None:
+    if timer := _timer(ctx):
+        timer.uploaded = time.monotonic()
+        timer.bytes_out += len(params.chunk)
+
+
+async def _on_request_end(
+    session: aiohttp.ClientSession, ctx: SimpleNamespace, params: Any
+) -> None:
+    if timer := _timer(ctx):
+        timer.headers_received = time.monotonic()
+
+
+def trace_config() -> aiohttp.TraceConfig:
+    """Return a trace config filling in the RequestTimer of each request.
+
+    The timer is passed to a request as its trace_request_ctx.
+    """
+    config = aiohttp.TraceConfig()
+    config.on_request_start.append(_on_request_start)
+    config.on_connection_queued_start.append(_on_queued_start)
+    config.on_connection_queued_end.append(_on_queued_end)
+    config.on_connection_create_start.append(_on_create_start)
+    config.on_connection_create_end.append(_on_create_end)
+    config.on_request_headers_sent.append(_on_headers_sent)
+    config.on_request_chunk_sent.append(_on_chunk_sent)
+    config.on_request_end.append(_on_request_end)
+    config.freeze()
+    return config
+
+
+def http_error_class(status: int) -> str:
+    """Return the error class of a failed HTTP status for counting."""
+    if status == 429:
+        return "rate_limited"
+    return f"http_{status // 100}xx"
@@ -0,0 +1,173 @@
+"""Traffic log of the Qwen3 Speech integration."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncGenerator
+from datetime import datetime
+import json
+import logging
+import os
+import time
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant
+from homeassistant.helpers.event import async_call_later
+
+from .const import (
+    CONF_TRAFFIC_LOG,
+    DEFAULT_TRAFFIC_LOG,
+    DOMAIN,
+    TRAFFIC_LOG_BACKUPS,
+    TRAFFIC_LOG_FLUSH_DELAY,
+    TRAFFIC_LOG_MAX_BYTES,
+)
+from .metrics import RequestTimer
+
+_LOGGER = logging.getLogger(__name__)
+
+
+def traffic_log_path(hass: HomeAssistant, entry_id: str) -> str:
+    """Return the traffic log of a config entry, rotated ones end in .1, .2."""
+    return hass.config.path(f"{DOMAIN}_traffic", f"{entry_id}.jsonl")
+
+
+class TrafficRecorder:
+    """Log the shape of TTS and STT traffic while the option is on.
+
+    Every TTS or STT call and every API request attempt is a JSON line,
+    holding what makes up the load (text length, audio size, format, sample
+    rate, language, timings of each stage) but never text, audio or API
+    keys. Calls carry the start time "t" in seconds, so the log can be
+    replayed with the same timing by benchmarks/replay.py.
+
+    Lines are buffered and written in the executor every
+    TRAFFIC_LOG_FLUSH_DELAY, the file is rotated at TRAFFIC_LOG_MAX_BYTES.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry) -> None:
+        """Initialize the recorder."""
+        self.hass = hass
+        self._entry = entry
+        self.path = traffic_log_path(hass, entry.entry_id)
+        self._lines: list[str] = []
+        self._lock = asyncio.Lock()
+        self._unsub_flush: CALLBACK_TYPE | None = None
+
+    @property
+    def enabled(self) -> bool:
+        """Return whether traffic is logged."""
+        return self._entry.data.get(CONF_TRAFFIC_LOG, DEFAULT_TRAFFIC_LOG)
+
+    def record_call(self, kind: str, start: float, **fields: Any) -> None:
+        """Log a TTS or STT call that started at monotonic time start."""
+        now = time.monotonic()
+        self._add(
+            {
+                "t": round(time.time() - (now - start), 3),
+                "type": "call",
+                "kind": kind,
+                **fields,
+                "ms": round((now - start) * 1000, 1),
+            }
+        )
+
+    def record_request(
+        self, timer: RequestTimer, status: int | None, stages: dict[str, float]
+    ) -> None:
+        """Log a finished API request attempt, see EntryMetrics.on_request."""
+        if not self.enabled:
+            return
+        self._add(
+            {
+                "t": round(time.time() - stages["total"] / 1000, 3),
+                "type": "request",
+                "op": timer.operation,
+                "status": status,
+                **{f"{stage}_ms": round(value, 1) for stage, value in stages.items()},
+                "bytes_out": timer.bytes_out,
+                "bytes_in": timer.bytes_in,
+            }
+        )
+
+    async def async_record_text(
+        self, text_gen: AsyncGenerator[str], start: float, fields: dict[str, Any]
+    ) -> AsyncGenerator[str]:
+        """Pass streamed text on, counting it into fields of its call.
+
+        "text_ms" is when the last text arrived, so a replay can spread the
+        text over the same time.
+        """
+        async for text in text_gen:
+            fields["chars"] += len(text)
+            yield text
+        fields["text_ms"] = round((time.monotonic() - start) * 1000, 1)
+
+    async def async_record_stream(
+        self,
+        stream: AsyncGenerator[bytes],
+        kind: str,
+        start: float,
+        fields: dict[str, Any],
+    ) -> AsyncGenerator[bytes]:
+        """Pass a stream of audio on and log the call once it ends.
+
+        fields are read at the end, they may still change while streaming.
+        """
+        first_ms: float | None = None
+        size = 0
+        error: str | None = None
+        try:
+            async for chunk in stream:
+                if first_ms is None:
+                    first_ms = round((time.monotonic() - start) * 1000, 1)
+                size += len(chunk)
+                yield chunk
+        except Exception as err:
+            error = type(err).__name__
+            raise
+        finally:
+            self.record_call(
+                kind, start, **fields, bytes=size, first_ms=first_ms, error=error
+            )
+
+    def _add(self, record: dict[str, Any]) -> None:
+        self._lines.append(json.dumps(record, separators=(",", ":")))
+        if self._unsub_flush is None:
+            self._unsub_flush = async_call_later(
+                self.hass, TRAFFIC_LOG_FLUSH_DELAY, self._async_flush_later
+            )
+
+    async def _async_flush_later(self, _now: datetime) -> None:
+        self._unsub_flush = None
+        await self.async_flush()
+
+    async def async_flush(self) -> None:
+        """Write the buffered lines right away."""
+        if self._unsub_flush is not None:
+            self._unsub_flush()
+            self._unsub_flush = None
+        if not self._lines:
+            return
+        data = "\n".join(self._lines) + "\n"
+        self._lines = []
+
+        def _write() -> None:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            try:
+                size = os.path.getsize(self.path)
+            except FileNotFoundError:
+                size = 0
+            if size and size + len(data) > TRAFFIC_LOG_MAX_BYTES:
+                for index in range(TRAFFIC_LOG_BACKUPS, 0, -1):
+                    source = self.path if index == 1 else f"{self.path}.{index - 1}"
+                    if os.path.exists(source):
+                        os.replace(source, f"{self.path}.{index}")
+            with open(self.path, "a", encoding="utf-8") as file:
+                file.write(data)
+
+        async with self._lock:
+            try:
+                await self.hass.async_add_executor_job(_write)
+            except OSError as err:
+                _LOGGER.warning("Failed to write traffic log: %s", err)
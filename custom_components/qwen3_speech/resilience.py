@@ -0,0 +1,123 @@
+"""Retry and circuit breaker helpers for the Qwen3 Speech integration."""
+from __future__ import annotations
+
+import random
+import time
+
+from .const import (
+    BREAKER_FAILURE_THRESHOLD,
+    BREAKER_RECOVERY_TIME,
+    RETRY_BASE_DELAY,
+    RETRY_MAX_DELAY,
+)
+
+
+def is_retryable_status(status: int) -> bool:
+    """Return whether a request failing with an HTTP status may succeed later.
+
+    Rate limiting, request timeouts and server errors are transient, any
+    other client error (bad request, invalid API key, expired URL) is not.
+    """
+    return status in (408, 429) or status >= 500
+
+
+def parse_retry_after(value: str | None) -> float | None:
+    """Return the delay in seconds of a Retry-After header, if given as such."""
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return None
+
+
+def backoff_delay(attempt: int, retry_after: float | None = None) -> float:
+    """Return how long to wait before retry number attempt (from 1).
+
+    Exponential backoff with equal jitter, so clients that failed together
+    do not retry in lockstep. A Retry-After from the server is respected.
+    """
+    delay = min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** (attempt - 1))
+    delay = delay / 2 + random.uniform(0, delay / 2)
+    if retry_after is not None:
+        delay = max(delay, retry_after)
+    return delay
+
+
+class CircuitBreaker:
+    """Fail fast while a backend keeps failing.
+
+    After BREAKER_FAILURE_THRESHOLD consecutive failures the breaker opens
+    and requests are rejected right away. Once BREAKER_RECOVERY_TIME has
+    passed it is half-open: a single request is let through as a probe and
+    closes the breaker if it succeeds, while the others keep failing fast
+    until the next probe is due.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = BREAKER_FAILURE_THRESHOLD,
+        recovery_time: float = BREAKER_RECOVERY_TIME,
+    ) -> None:
+        """Initialize the breaker."""
+        self.name = name
+        self._failure_threshold = failure_threshold
+        self._recovery_time = recovery_time
+        self.failures = 0
+        self._probe_at: float | None = None
+
+    @property
+    def state(self) -> str:
+        """Return closed, open or half_open."""
+        if self._probe_at is None:
+            return "closed"
+        if time.monotonic() < self._probe_at:
+            return "open"
+        return "half_open"
+
+    def check(self) -> None:
+        """Raise CircuitOpenError unless a request may be sent now."""
+        if self._probe_at is None:
+            return
+        now = time.monotonic()
+        if now < self._probe_at:
+            raise CircuitOpenError(
+                f"{self.name} is unavailable, retrying in "
+                f"{self._probe_at - now:.0f} s"
+            )
+        # Let this request probe the backend and hold back the others. If
+        # the probe never reports back, the next one is due after a while.
+        self._probe_at = now + self._recovery_time
+
+    def record_success(self) -> None:
+        """Record a request the backend handled."""
+        self.failures = 0
+        self._probe_at = None
+
+    def record_failure(self) -> None:
+        """Record a request the backend failed to handle."""
+        self.failures += 1
+        if self.failures >= self._failure_threshold:
+            self._probe_at = time.monotonic() + self._recovery_time
+
+
+class ApiError(Exception):
+    """Error to indicate a DashScope request failed."""
+
+    def __init__(
+        self,
+        message: str,
+        status: int | None = None,
+        retryable: bool = False,
+        retry_after: float | None = None,
+    ) -> None:
+        """Initialize the error."""
+        super().__init__(message)
+        self.status = status
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+class CircuitOpenError(ApiError):
+    """Error to indicate requests are rejected while the backend is failing."""
@@ -0,0 +1,241 @@
+"""Routing of API requests across endpoints and API keys for Qwen3 Speech."""
+from __future__ import annotations
+
+from collections.abc import Callable, Sequence
+from dataclasses import dataclass
+import random
+import re
+import time
+from typing import Any
+
+from yarl import URL
+
+from .const import (
+    DASHSCOPE_API_PATH,
+    DASHSCOPE_BASE_URL,
+    DASHSCOPE_MODELS_PATH,
+    DASHSCOPE_REALTIME_PATH,
+    ROUTER_ERROR_PENALTY,
+    ROUTER_EWMA_ALPHA,
+    ROUTER_EXPLORE_RATE,
+    ROUTER_RATE_LIMIT_COOLDOWN,
+    ROUTER_REJECTED_COOLDOWN,
+    SHAPER_BUCKETS,
+)
+from .shaper import TokenBucket
+
+
+def split_list(value: str) -> list[str]:
+    """Return the items of a comma, space or newline separated option."""
+    return [item for item in re.split(r"[\s,;]+", value) if item]
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    """URLs of one DashScope region or compatible gateway."""
+
+    api_url: str
+    realtime_url: str
+    models_url: str
+
+    @classmethod
+    def from_base(cls, base_url: str) -> Endpoint:
+        """Return the endpoint served under a base URL.
+
+        Raises ValueError if it is not an http(s) URL.
+        """
+        url = URL(base_url.rstrip("/"))
+        if url.scheme not in ("http", "https") or not url.host:
+            raise ValueError(f"Not an http(s) URL: {base_url}")
+        realtime = url.with_scheme("wss" if url.scheme == "https" else "ws")
+        return cls(
+            api_url=str(url) + DASHSCOPE_API_PATH,
+            realtime_url=str(realtime) + DASHSCOPE_REALTIME_PATH,
+            models_url=str(url) + DASHSCOPE_MODELS_PATH,
+        )
+
+
+DEFAULT_ENDPOINT = Endpoint.from_base(DASHSCOPE_BASE_URL)
+
+
+def parse_endpoints(value: str) -> list[Endpoint]:
+    """Return the endpoints of the endpoints option, raising ValueError."""
+    endpoints = [Endpoint.from_base(base_url) for base_url in split_list(value)]
+    if not endpoints:
+        raise ValueError("No endpoint")
+    return endpoints
+
+
+class Target:
+    """An endpoint with an API key, and how requests to it went lately."""
+
+    def __init__(
+        self,
+        endpoint: Endpoint,
+        api_key: str,
+        buckets: dict[str, TokenBucket] | None = None,
+    ) -> None:
+        """Initialize the target.
+
+        Targets of the same API key share its buckets, as the quota is the
+        key's.
+        """
+        self.endpoint = endpoint
+        self.headers = {"Authorization": f"Bearer {api_key}"}
+        self.sse_headers = {**self.headers, "X-DashScope-SSE": "enable"}
+        self.realtime_headers = {**self.headers, "OpenAI-Beta": "realtime=v1"}
+        # For logs and diagnostics, never the whole key
+        url = URL(endpoint.api_url)
+        host = url.host if url.is_default_port() else f"{url.host}:{url.port}"
+        self.key_name = f"key …{api_key[-4:]}"
+        self.name = f"{host} {self.key_name}"
+        self.buckets = buckets if buckets is not None else _new_buckets()
+        # Per operation, the time to headers of an ASR upload says nothing
+        # about how fast TTS starts
+        self.latencies: dict[str, float] = {}
+        self.error_rate = 0.0
+        self.ready_at = 0.0
+        self.requests = 0
+        self.rate_limited = 0
+        self.rejected = 0
+
+    def bucket(self, operation: str) -> TokenBucket | None:
+        """Return the bucket pacing an operation, None if it is not shaped."""
+        if (kind := SHAPER_BUCKETS.get(operation)) is None:
+            return None
+        return self.buckets[kind]
+
+    def ready(self, now: float) -> bool:
+        """Return whether the target is not cooling down."""
+        return now >= self.ready_at
+
+    def score(self, operation: str) -> float:
+        """Return the expected cost of a request in seconds, lower is better.
+
+        Targets without a latency sample of the operation yet count as
+        instant, so each is tried once.
+        """
+        return (
+            self.latencies.get(operation, 0.0)
+            + ROUTER_ERROR_PENALTY * self.error_rate
+        )
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state of the target."""
+        now = time.monotonic()
+        return {
+            "latency_ms": {
+                operation: round(latency * 1000)
+                for operation, latency in self.latencies.items()
+            },
+            "error_rate": round(self.error_rate, 3),
+            "cooldown_s": round(max(self.ready_at - now, 0.0), 1),
+            "requests": self.requests,
+            "rate_limited": self.rate_limited,
+            "rejected": self.rejected,
+        }
+
+
+class Router:
+    """Pick the endpoint and API key of every request.
+
+    Every combination of endpoint and key is a target. Requests go to the
+    target with the lowest moving average latency for the operation,
+    penalized by its moving average error rate; a small share goes to a random one instead, so a
+    target that got better is noticed. A key that is rate limited (429)
+    rests for the Retry-After time, one that is rejected (401/403, e.g. a
+    key of another region) for much longer, and the others take over.
+    Requests of one key share a TokenBucket per quota (TTS, STT), which
+    paces them once the key is known to be limited.
+    """
+
+    def __init__(
+        self, endpoints: Sequence[Endpoint], api_keys: Sequence[str]
+    ) -> None:
+        """Initialize the router."""
+        buckets = {api_key: _new_buckets() for api_key in api_keys}
+        self.targets = [
+            Target(endpoint, api_key, buckets[api_key])
+            for api_key in dict.fromkeys(api_keys)
+            for endpoint in dict.fromkeys(endpoints)
+        ]
+        self._random = random.Random()
+
+    @property
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Return the state of every target."""
+        return {target.name: target.as_dict() for target in self.targets}
+
+    @property
+    def rate_limits(self) -> dict[str, dict[str, dict[str, Any]]]:
+        """Return the state of the buckets of every API key."""
+        return {
+            target.key_name: {
+                kind: bucket.as_dict() for kind, bucket in target.buckets.items()
+            }
+            for target in self.targets
+        }
+
+    def choose(
+        self, operation: str, usable: Callable[[Target], bool] = lambda _: True
+    ) -> Target:
+        """Return the target to send a request of an operation to.
+
+        Targets that are cooling down or not usable (e.g. their host is
+        failing) are skipped, unless none is left, in which case the one
+        ready soonest is returned.
+        """
+        now = time.monotonic()
+        candidates = [t for t in self.targets if t.ready(now) and usable(t)]
+        if not candidates:
+            return min(self.targets, key=lambda target: target.ready_at)
+        if len(candidates) > 1 and self._random.random() < ROUTER_EXPLORE_RATE:
+            return self._random.choice(candidates)
+        return min(candidates, key=lambda target: target.score(operation))
+
+    def has_alternative(
+        self, target: Target, usable: Callable[[Target], bool] = lambda _: True
+    ) -> bool:
+        """Return whether another target could take a request right now."""
+        now = time.monotonic()
+        return any(
+            other is not target and other.ready(now) and usable(other)
+            for other in self.targets
+        )
+
+    def record_success(self, target: Target, operation: str, latency: float) -> None:
+        """Record a request the target answered after latency seconds."""
+        target.requests += 1
+        if (average := target.latencies.get(operation)) is None:
+            target.latencies[operation] = latency
+        else:
+            target.latencies[operation] = _ewma(average, latency)
+        target.error_rate = _ewma(target.error_rate, 0.0)
+
+    def record_failure(self, target: Target) -> None:
+        """Record a request the target failed to answer."""
+        target.requests += 1
+        target.error_rate = _ewma(target.error_rate, 1.0)
+
+    def record_rate_limited(
+        self, target: Target, retry_after: float | None
+    ) -> None:
+        """Let a rate limited key rest, for Retry-After if given."""
+        target.rate_limited += 1
+        cooldown = (
+            ROUTER_RATE_LIMIT_COOLDOWN if retry_after is None else retry_after
+        )
+        target.ready_at = max(target.ready_at, time.monotonic() + cooldown)
+
+    def record_rejected(self, target: Target) -> None:
+        """Let a key the endpoint does not accept rest for long."""
+        target.rejected += 1
+        target.ready_at = time.monotonic() + ROUTER_REJECTED_COOLDOWN
+
+
+def _new_buckets() -> dict[str, TokenBucket]:
+    return {kind: TokenBucket() for kind in set(SHAPER_BUCKETS.values())}
+
+
+def _ewma(average: float, sample: float) -> float:
+    return average + ROUTER_EWMA_ALPHA * (sample - average)
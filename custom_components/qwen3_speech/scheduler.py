@@ -0,0 +1,124 @@
+"""Request scheduling for the Qwen3 Speech integration."""
+from __future__ import annotations
+
+import asyncio
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from enum import IntEnum
+import heapq
+import itertools
+from typing import Any
+
+from .const import SCHEDULER_INTERACTIVE_RESERVE
+
+
+class Priority(IntEnum):
+    """Priority class of an API request, lower runs first."""
+
+    INTERACTIVE = 0
+    BULK = 1
+    PRELOAD = 2
+
+
+class _PriorityStats:
+    """Queue counters of one priority class."""
+
+    def __init__(self) -> None:
+        self.waiting = 0
+        self.max_waiting = 0
+        self.requests = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "waiting": self.waiting,
+            "max_waiting": self.max_waiting,
+            "requests": self.requests,
+            "wait_avg_ms": round(1000 * self.wait_total / max(self.requests, 1), 1),
+            "wait_max_ms": round(1000 * self.wait_max, 1),
+        }
+
+
+class RequestScheduler:
+    """Limit concurrent API requests of a config entry, by priority.
+
+    Requests wait in a priority queue (first come, first served within a
+    class) for one of limit slots. Lower priority requests never take the
+    last SCHEDULER_INTERACTIVE_RESERVE slots, so an interactive request does
+    not queue behind a burst of announcements or preloads.
+    """
+
+    def __init__(self, limit: int) -> None:
+        """Initialize the scheduler."""
+        self.limit = limit
+        self.active = 0
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._sequence = itertools.count()
+        self._stats = {priority: _PriorityStats() for priority in Priority}
+
+    @property
+    def stats(self) -> dict[str, Any]:
+        """Return slot usage and queue counters per priority class."""
+        return {
+            "limit": self.limit,
+            "active": self.active,
+            **{
+                priority.name.lower(): stats.as_dict()
+                for priority, stats in self._stats.items()
+            },
+        }
+
+    def _capacity(self, priority: Priority) -> int:
+        if priority is Priority.INTERACTIVE:
+            return self.limit
+        return max(self.limit - SCHEDULER_INTERACTIVE_RESERVE, 1)
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority) -> AsyncIterator[None]:
+        """Wait for a free slot and hold it for the duration of the block."""
+        loop = asyncio.get_running_loop()
+        stats = self._stats[priority]
+        start = loop.time()
+        future: asyncio.Future[None] = loop.create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        stats.waiting += 1
+        stats.max_waiting = max(stats.max_waiting, stats.waiting)
+        self._wake()
+
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.cancelled():
+                stats.waiting -= 1
+            else:
+                # The slot was handed over just before the cancellation
+                self._release()
+            raise
+
+        wait = loop.time() - start
+        stats.requests += 1
+        stats.wait_total += wait
+        stats.wait_max = max(stats.wait_max, wait)
+        try:
+            yield
+        finally:
+            self._release()
+
+    def _release(self) -> None:
+        self.active -= 1
+        self._wake()
+
+    def _wake(self) -> None:
+        """Hand free slots to the waiters at the head of the queue."""
+        while self._waiters:
+            priority, _, future = self._waiters[0]
+            if future.cancelled():
+                heapq.heappop(self._waiters)
+                continue
+            if self.active >= self._capacity(Priority(priority)):
+                return
+            heapq.heappop(self._waiters)
+            self._stats[Priority(priority)].waiting -= 1
+            self.active += 1
+            future.set_result(None)
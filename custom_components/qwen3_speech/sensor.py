@@ -0,0 +1,124 @@
+"""Diagnostic sensors of the Qwen3 Speech integration."""
+from __future__ import annotations
+
+from collections.abc import Callable
+from dataclasses import dataclass
+from datetime import timedelta
+from typing import Any
+
+from homeassistant.components.sensor import (
+    SensorDeviceClass,
+    SensorEntity,
+    SensorEntityDescription,
+    SensorStateClass,
+)
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import EntityCategory, UnitOfInformation, UnitOfTime
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import DATA_CLIENT, DOMAIN
+from .metrics import EntryMetrics
+
+# Metrics only change with requests, no need to refresh them more often
+SCAN_INTERVAL = timedelta(seconds=30)
+
+
+@dataclass(frozen=True, kw_only=True)
+class Qwen3SensorEntityDescription(SensorEntityDescription):
+    """Describes a Qwen3 Speech metrics sensor."""
+
+    value_fn: Callable[[EntryMetrics], float | int | None]
+    attributes_fn: Callable[[EntryMetrics], dict[str, Any]] | None = None
+
+
+def _latency(fraction: float) -> Qwen3SensorEntityDescription:
+    percent = round(fraction * 100)
+    return Qwen3SensorEntityDescription(
+        key=f"latency_p{percent}",
+        name=f"Qwen3 Speech latency p{percent}",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        device_class=SensorDeviceClass.DURATION,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics: metrics.stages["total"].percentile(fraction),
+        attributes_fn=lambda metrics: {
+            stage: histogram.percentile(fraction)
+            for stage, histogram in metrics.stages.items()
+            if stage != "total"
+        },
+    )
+
+
+SENSORS: tuple[Qwen3SensorEntityDescription, ...] = (
+    _latency(0.5),
+    _latency(0.95),
+    _latency(0.99),
+    Qwen3SensorEntityDescription(
+        key="requests_per_minute",
+        name="Qwen3 Speech requests per minute",
+        native_unit_of_measurement="requests/min",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda metrics: metrics.requests_per_minute,
+        attributes_fn=lambda metrics: {
+            "requests": metrics.requests,
+            "status_codes": dict(metrics.status_codes),
+            "errors": dict(metrics.errors),
+        },
+    ),
+    Qwen3SensorEntityDescription(
+        key="bytes_in",
+        name="Qwen3 Speech data received",
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.bytes_in,
+    ),
+    Qwen3SensorEntityDescription(
+        key="bytes_out",
+        name="Qwen3 Speech data sent",
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        device_class=SensorDeviceClass.DATA_SIZE,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        value_fn=lambda metrics: metrics.bytes_out,
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up Qwen3 Speech sensors via config entry."""
+    metrics = hass.data[DOMAIN][config_entry.entry_id][DATA_CLIENT].metrics
+    async_add_entities(
+        Qwen3MetricsSensor(config_entry, metrics, description)
+        for description in SENSORS
+    )
+
+
+class Qwen3MetricsSensor(SensorEntity):
+    """Sensor reporting request metrics of a config entry."""
+
+    entity_description: Qwen3SensorEntityDescription
+    _attr_entity_category = EntityCategory.DIAGNOSTIC
+
+    def __init__(
+        self,
+        config_entry: ConfigEntry,
+        metrics: EntryMetrics,
+        description: Qwen3SensorEntityDescription,
+    ) -> None:
+        """Initialize the sensor."""
+        self.entity_description = description
+        self._metrics = metrics
+        self._attr_unique_id = f"{DOMAIN}_{description.key}_{config_entry.entry_id}"
+
+    async def async_update(self) -> None:
+        """Read the current value from the metrics."""
+        description = self.entity_description
+        self._attr_native_value = description.value_fn(self._metrics)
+        if description.attributes_fn is not None:
+            self._attr_extra_state_attributes = description.attributes_fn(
+                self._metrics
+            )
@@ -0,0 +1,249 @@
+"""Client-side rate shaping for the Qwen3 Speech integration."""
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from collections.abc import Mapping
+import heapq
+import itertools
+import re
+import time
+from typing import Any, NamedTuple
+
+from .const import (
+    SHAPER_BURST_SECONDS,
+    SHAPER_DECREASE,
+    SHAPER_DECREASE_INTERVAL,
+    SHAPER_FORGET_AFTER,
+    SHAPER_HEADER_WINDOW,
+    SHAPER_INCREASE,
+    SHAPER_MIN_RATE,
+    SHAPER_WINDOW,
+)
+
+# Rate limit headers: OpenAI style (also sent by DashScope's compatible
+# mode) first, then the IETF RateLimit fields
+_LIMIT_HEADERS = ("x-ratelimit-limit-requests", "x-ratelimit-limit", "ratelimit-limit")
+_REMAINING_HEADERS = (
+    "x-ratelimit-remaining-requests",
+    "x-ratelimit-remaining",
+    "ratelimit-remaining",
+)
+_RESET_HEADERS = ("x-ratelimit-reset-requests", "x-ratelimit-reset", "ratelimit-reset")
+_DURATION_PART = re.compile(r"(\d+(?:\.\d+)?)(ms|h|m|s)")
+_POLICY_WINDOW = re.compile(r";\s*w=(\d+(?:\.\d+)?)")
+
+
+class RateLimit(NamedTuple):
+    """Request rate limit announced by response headers."""
+
+    rate: float | None
+    remaining: int | None
+    reset: float | None
+
+
+def parse_duration(value: str | None) -> float | None:
+    """Return the seconds of a duration like "20", "1.5s", "6m0s" or "250ms"."""
+    if value is None:
+        return None
+    value = value.strip()
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        pass
+    parts = _DURATION_PART.findall(value)
+    if not parts or "".join(number + unit for number, unit in parts) != value:
+        return None
+    scale = {"ms": 0.001, "s": 1, "m": 60, "h": 3600}
+    return sum(float(number) * scale[unit] for number, unit in parts)
+
+
+def parse_rate_limit(headers: Mapping[str, str]) -> RateLimit:
+    """Return the request rate limit announced by response headers, if any.
+
+    A limit is taken to be per SHAPER_HEADER_WINDOW seconds unless a
+    RateLimit-Policy header says otherwise.
+    """
+
+    def first(names: tuple[str, ...]) -> str | None:
+        return next(
+            (headers[name] for name in names if headers.get(name) is not None),
+            None,
+        )
+
+    rate = remaining = None
+    if (limit := first(_LIMIT_HEADERS)) is not None:
+        window = SHAPER_HEADER_WINDOW
+        if match := _POLICY_WINDOW.search(headers.get("ratelimit-policy") or ""):
+            window = float(match.group(1)) or window
+        try:
+            rate = int(limit.split(",")[0].split(";")[0]) / window
+        except ValueError:
+            rate = None
+    if (value := first(_REMAINING_HEADERS)) is not None:
+        try:
+            remaining = int(value)
+        except ValueError:
+            remaining = None
+    return RateLimit(rate, remaining, parse_duration(first(_RESET_HEADERS)))
+
+
+class TokenBucket:
+    """Pace the requests of one API key to a rate learned from the API.
+
+    Until the API first pushes back, requests go through unpaced. A 429 sets
+    the rate a bit below the rate requests were actually sent at (or cuts
+    the current rate, at most once per SHAPER_DECREASE_INTERVAL), and every
+    request that succeeds raises it a little again, so it settles just
+    below the real limit. Retry-After and exhausted rate limit headers
+    pause the bucket, an announced limit caps the rate. A learned rate is
+    forgotten after SHAPER_FORGET_AFTER without a 429, so a short spike
+    of rate limiting does not slow requests down for good.
+
+    Requests wait for a token in a priority queue (first come, first served
+    within a class), so interactive requests pass paced bulk ones.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the bucket."""
+        self.rate: float | None = None
+        self.ceiling: float | None = None
+        self._tokens = 0.0
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._last_decrease = -SHAPER_DECREASE_INTERVAL
+        self._limited_at = 0.0
+        self._sent: deque[float] = deque()
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._sequence = itertools.count()
+        self._timer: asyncio.TimerHandle | None = None
+        self.requests = 0
+        self.delayed = 0
+        self.rate_limited = 0
+        self._wait_total = 0.0
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state of the bucket."""
+        now = time.monotonic()
+        return {
+            "rate_per_min": None if self.rate is None else round(self.rate * 60, 1),
+            "limit_per_min": (
+                None if self.ceiling is None else round(self.ceiling * 60, 1)
+            ),
+            "paused_s": round(max(self._paused_until - now, 0.0), 1),
+            "waiting": sum(not future.done() for _, _, future in self._waiters),
+            "requests": self.requests,
+            "delayed": self.delayed,
+            "wait_avg_ms": round(1000 * self._wait_total / max(self.delayed, 1), 1),
+            "rate_limited": self.rate_limited,
+        }
+
+    def wait_time(self) -> float:
+        """Return how long a request would wait for a token if none queued."""
+        return self._delay(time.monotonic())
+
+    async def async_acquire(self, priority: int) -> None:
+        """Wait until a request may be sent."""
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[None] = loop.create_future()
+        heapq.heappush(self._waiters, (priority, next(self._sequence), future))
+        start = loop.time()
+        self._wake()
+        if not future.done():
+            await future
+            self.delayed += 1
+            self._wait_total += loop.time() - start
+
+    def record_success(self) -> None:
+        """Let the rate grow a little after a request got through."""
+        if self.rate is not None:
+            self.rate *= 1 + SHAPER_INCREASE
+            if self.ceiling is not None:
+                self.rate = min(self.rate, self.ceiling)
+
+    def record_rate_limited(self, retry_after: float | None) -> None:
+        """Slow down after a 429, pausing for Retry-After if given.
+
+        A Retry-After of 0 asks for a plain retry, like the router the
+        bucket does not hold back for it.
+        """
+        now = time.monotonic()
+        self.rate_limited += 1
+        if retry_after == 0:
+            return
+        self._limited_at = now
+        if retry_after:
+            self._paused_until = max(self._paused_until, now + retry_after)
+        if now - self._last_decrease >= SHAPER_DECREASE_INTERVAL:
+            self._last_decrease = now
+            rate = self._sending_rate(now)
+            if self.rate is not None:
+                rate = min(rate, self.rate)
+            self.rate = max(rate * SHAPER_DECREASE, SHAPER_MIN_RATE)
+        self._tokens = 0.0
+        self._updated = now
+        self._wake()
+
+    def record_limit(self, limit: RateLimit) -> None:
+        """Apply a rate limit announced by response headers."""
+        now = time.monotonic()
+        if limit.rate:
+            self._refill(now)
+            self.ceiling = limit.rate
+            self.rate = limit.rate if self.rate is None else min(self.rate, limit.rate)
+        if limit.remaining == 0 and limit.reset:
+            self._paused_until = max(self._paused_until, now + limit.reset)
+        self._wake()
+
+    def _sending_rate(self, now: float) -> float:
+        """Return the rate requests were sent at lately."""
+        self._trim(now)
+        if len(self._sent) < 2:
+            return SHAPER_MIN_RATE
+        return len(self._sent) / max(now - self._sent[0], 1.0)
+
+    def _trim(self, now: float) -> None:
+        while self._sent and self._sent[0] < now - SHAPER_WINDOW:
+            self._sent.popleft()
+
+    def _refill(self, now: float) -> None:
+        if self.rate is not None:
+            capacity = max(1.0, self.rate * SHAPER_BURST_SECONDS)
+            elapsed = now - self._updated
+            self._tokens = min(capacity, self._tokens + elapsed * self.rate)
+        self._updated = now
+
+    def _delay(self, now: float) -> float:
+        """Return how long the next request has to wait for a token."""
+        if now < self._paused_until:
+            return self._paused_until - now
+        if self.rate is not None and now - self._limited_at > SHAPER_FORGET_AFTER:
+            self.rate = self.ceiling
+        if self.rate is None:
+            return 0.0
+        self._refill(now)
+        return 0.0 if self._tokens >= 1 else (1 - self._tokens) / self.rate
+
+    def _wake(self) -> None:
+        """Hand tokens to the waiters at the head of the queue."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        now = time.monotonic()
+        while self._waiters:
+            _, _, future = self._waiters[0]
+            if future.cancelled():
+                heapq.heappop(self._waiters)
+                continue
+            if (delay := self._delay(now)) > 0:
+                self._timer = asyncio.get_running_loop().call_later(
+                    delay, self._wake
+                )
+                return
+            heapq.heappop(self._waiters)
+            self.requests += 1
+            self._sent.append(now)
+            self._trim(now)
+            if self.rate is not None:
+                self._tokens -= 1
+            future.set_result(None)
@@ -3,11 +3,16 @@ from __future__ import annotations
 
 import asyncio
 import base64
+import json
 import logging
-from collections.abc import AsyncIterable
+import time
+from collections.abc import AsyncGenerator, AsyncIterable
 
 import aiohttp
+from aiohttp.abc import AbstractStreamWriter
+from aiohttp.payload import Payload
 
+from homeassistant.components.ffmpeg import get_ffmpeg_manager
 from homeassistant.components.stt import (
     AudioBitRates,
     AudioChannels,
@@ -21,18 +26,54 @@ from homeassistant.components.stt import (
 )
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
+from .api import DashScopeClient, describe_error
+from .audio import (
+    AudioEncodeError,
+    PcmConverter,
+    PcmSpool,
+    SilenceSegmenter,
+    VoiceActivityDetector,
+    async_encode_ogg_opus,
+    parse_wav,
+    wav_header,
+)
 from .const import (
-    CONF_API_KEY,
     CONF_STT_MODEL,
-    DASHSCOPE_API_URL,
+    CONF_STT_OPUS,
+    CONF_STT_REALTIME_MODEL,
+    CONF_STT_SEGMENTATION,
+    CONF_STT_STREAMING,
+    CONF_VAD,
+    CONF_VAD_SILENCE_MS,
+    DATA_CLIENT,
+    DATA_RECORDER,
+    DEFAULT_LANGUAGE_HINT,
     DEFAULT_STT_MODEL,
+    DEFAULT_STT_OPUS,
+    DEFAULT_STT_REALTIME_MODEL,
+    DEFAULT_STT_SEGMENTATION,
+    DEFAULT_STT_STREAMING,
+    DEFAULT_VAD,
+    DEFAULT_VAD_SILENCE_MS,
     DOMAIN,
     LANGUAGE_MAP,
+    STT_B64_BLOCK_SIZE,
+    STT_REALTIME_CONNECT_TIMEOUT,
+    STT_REALTIME_FINISH_TIMEOUT,
+    STT_REQUEST_TIMEOUT,
+    STT_SAMPLE_RATE,
+    STT_SEGMENT_MAX_PARALLEL,
+    STT_SEGMENT_OVERLAP_MS,
     SUPPORT_LANGUAGES,
+    VAD_LEAD_IN_MS,
+    VAD_MIN_SPEECH_MS,
+    VAD_PADDING_MS,
 )
+from .recorder import TrafficRecorder
+from .resilience import ApiError
+from .text import stitch_transcripts
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -43,6 +84,357 @@ MIME_MAP = {
 }
 
 
+# A WAV header plus one byte is a whole number of base64 groups, so the
+# header can be re-encoded once its sizes are known
+_WAV_HEADER_SIZE = 44
+_WAV_HEAD_SIZE = 45
+_AUDIO_PLACEHOLDER = "__AUDIO__"
+
+
+class AsrRequestBody(Payload):
+    """One-shot ASR request body, base64-encoding the audio as it arrives.
+
+    Audio is encoded in 3-byte aligned blocks while it is being fed, and the
+    JSON envelope is written around the encoded blocks straight into the
+    request. Audio is never joined, encoded or serialized as a whole.
+    """
+
+    def __init__(
+        self,
+        model: str,
+        language: str,
+        mime_type: str,
+        *,
+        wav_sample_rate: int | None = None,
+        defer_encoding: bool = False,
+    ) -> None:
+        """Initialize the body.
+
+        With wav_sample_rate the fed audio is raw PCM that gets a WAV header.
+        With defer_encoding the raw audio is kept until finish(), so it can
+        still be replaced (e.g. by a compressed version).
+        """
+        super().__init__(None, content_type="application/json")
+        self._model = model
+        self._language = language
+        self._mime_type = mime_type
+        self._wav_sample_rate = wav_sample_rate
+        self._head = bytearray()
+        self._head_size = 0
+        if wav_sample_rate is not None:
+            self._head += wav_header(wav_sample_rate, data_size=0)
+            self._head_size = _WAV_HEAD_SIZE
+        self._pending = bytearray()
+        self._encoded: list[bytes] = []
+        self._parts: list[bytes] = []
+        self.deferred_audio: bytearray | None = (
+            bytearray() if defer_encoding else None
+        )
+        self.audio_size = 0
+
+    def feed(self, data: bytes | memoryview) -> None:
+        """Add audio to the body."""
+        self.audio_size += len(data)
+        if self.deferred_audio is not None:
+            self.deferred_audio += data
+            return
+
+        if len(self._head) < self._head_size:
+            take = self._head_size - len(self._head)
+            self._head += data[:take]
+            data = data[take:]
+        self._pending += data
+        if len(self._pending) >= STT_B64_BLOCK_SIZE:
+            self._encode_pending(final=False)
+
+    def replace_audio(self, data: bytes, mime_type: str) -> None:
+        """Replace deferred raw audio with an already encoded file."""
+        self._mime_type = mime_type
+        self._wav_sample_rate = None
+        self._head = bytearray()
+        self._head_size = 0
+        self.deferred_audio = None
+        self.audio_size = 0
+        self.feed(data)
+
+    def _encode_pending(self, final: bool) -> None:
+        size = len(self._pending)
+        if not final:
+            size -= size % 3
+        if not size:
+            return
+        with memoryview(self._pending) as view, view[:size] as block:
+            self._encoded.append(base64.b64encode(block))
+        del self._pending[:size]
+
+    def finish(self) -> None:
+        """Encode what is left and build the JSON envelope."""
+        if (deferred := self.deferred_audio) is not None:
+            self.deferred_audio = None
+            self.audio_size = 0
+            with memoryview(deferred) as view:
+                for start in range(0, len(view), STT_B64_BLOCK_SIZE):
+                    with view[start : start + STT_B64_BLOCK_SIZE] as block:
+                        self.feed(block)
+
+        if self._wav_sample_rate is not None:
+            self._head[:_WAV_HEADER_SIZE] = wav_header(
+                self._wav_sample_rate, data_size=self.audio_size
+            )
+        self._encode_pending(final=True)
+
+        envelope = json.dumps(
+            {
+                "model": self._model,
+                "input": {
+                    "messages": [
+                        {"role": "system", "content": [{"text": ""}]},
+                        {
+                            "role": "user",
+                            "content": [
+                                {
+                                    "audio": f"data:{self._mime_type};base64,"
+                                    f"{_AUDIO_PLACEHOLDER}"
+                                }
+                            ],
+                        },
+                    ]
+                },
+                "parameters": {
+                    "asr_options": {
+                        "enable_itn": True,
+                        "language": self._language,
+                    }
+                },
+            }
+        )
+        prefix, suffix = envelope.split(_AUDIO_PLACEHOLDER)
+        self._parts = [
+            prefix.encode(),
+            base64.b64encode(self._head),
+            *self._encoded,
+            suffix.encode(),
+        ]
+        self._encoded = []
+        self._size = sum(len(part) for part in self._parts)
+
+    def decode(self, encoding: str = "utf-8", errors: str = "strict") -> str:
+        """Return the body as a string."""
+        return b"".join(self._parts).decode(encoding, errors)
+
+    async def write(self, writer: AbstractStreamWriter) -> None:
+        """Write the body to the request."""
+        for part in self._parts:
+            await writer.write(part)
+
+
+class SegmentedRecording:
+    """A 16 kHz PCM recording cut into overlapping segments at silences.
+
+    The audio is kept in a spool, so memory stays bounded however long the
+    recording gets. Segments are (start, end) byte ranges of the recording,
+    each starting STT_SEGMENT_OVERLAP_MS before the cut that ended the
+    previous one.
+    """
+
+    def __init__(self) -> None:
+        """Initialize the recording."""
+        self.segments: list[tuple[int, int]] = []
+        self._spool = PcmSpool()
+        self._segmenter = SilenceSegmenter(STT_SAMPLE_RATE)
+        self._overlap = STT_SAMPLE_RATE * 2 * STT_SEGMENT_OVERLAP_MS // 1000
+        self._cut = 0
+
+    @property
+    def size(self) -> int:
+        """Return the number of bytes recorded."""
+        return self._spool.size
+
+    @property
+    def spilled(self) -> bool:
+        """Return whether the audio has moved to a temporary file."""
+        return self._spool.spilled
+
+    async def async_feed(self, chunk: bytes) -> None:
+        """Add audio, adding the segments it completes."""
+        await self._spool.async_write(chunk)
+        for cut in self._segmenter.feed(chunk):
+            self.segments.append((max(self._cut - self._overlap, 0), cut))
+            self._cut = cut
+
+    def finish(self) -> None:
+        """Add the segment after the last cut, once the recording ended."""
+        if self.size > self._cut:
+            self.segments.append((max(self._cut - self._overlap, 0), self.size))
+
+    async def async_read(self, segment: tuple[int, int]) -> AsyncGenerator[bytes]:
+        """Yield the audio of a segment in blocks of STT_B64_BLOCK_SIZE.
+
+        Only a block at a time is read from the spool, so it can be encoded
+        into the request body without holding the raw segment as well.
+        """
+        start, end = segment
+        for offset in range(start, end, STT_B64_BLOCK_SIZE):
+            yield await self._spool.async_read(
+                offset, min(offset + STT_B64_BLOCK_SIZE, end)
+            )
+
+    async def async_close(self) -> None:
+        """Release the audio."""
+        await self._spool.async_close()
+
+
+def _language_hint(language: str) -> str:
+    """Map a HA language code to an ASR language hint."""
+    return language if language in LANGUAGE_MAP else DEFAULT_LANGUAGE_HINT
+
+
+def _is_pcm16(metadata: SpeechMetadata) -> bool:
+    """Return whether the stream carries 16-bit PCM samples."""
+    return (
+        metadata.codec == AudioCodecs.PCM
+        and metadata.bit_rate == AudioBitRates.BITRATE_16
+    )
+
+
+async def _async_normalize_pcm(
+    stream: AsyncIterable[bytes], sample_rate: int, channels: int
+) -> AsyncGenerator[bytes]:
+    """Turn a 16-bit PCM stream into raw 16 kHz mono PCM.
+
+    A WAV header at the start of the stream is dropped, stereo is downmixed
+    and other sample rates are resampled.
+    """
+    converter = None
+    if sample_rate != STT_SAMPLE_RATE or channels != 1:
+        converter = PcmConverter(sample_rate, channels, STT_SAMPLE_RATE)
+    first_chunk = True
+
+    async for chunk in stream:
+        if first_chunk:
+            first_chunk = False
+            if chunk[:4] == b"RIFF":
+                try:
+                    chunk = bytes(parse_wav(chunk)[1])
+                except ValueError as err:
+                    _LOGGER.warning("Ignoring unparsable WAV header: %s", err)
+        if converter is not None:
+            chunk = converter.convert(chunk)
+        if chunk:
+            yield chunk
+
+    if converter is not None and (tail := converter.flush()):
+        yield tail
+
+
+async def _async_trim_silence(
+    stream: AsyncIterable[bytes], vad: VoiceActivityDetector, silence_ms: int
+) -> AsyncGenerator[bytes]:
+    """Drop leading/trailing silence from a PCM stream and end it early.
+
+    The stream ends once silence_ms of silence follows detected speech
+    (0 disables endpointing). A little padding is kept around the speech so
+    word onsets and endings are not clipped, and all audio before speech
+    found within VAD_LEAD_IN_MS of the start. If no speech is detected at
+    all, the audio is passed on unchanged and left to the ASR model.
+    """
+    frame_bytes = vad.frame_bytes
+    min_speech_frames = max(1, VAD_MIN_SPEECH_MS // vad.frame_ms)
+    padding_frames = VAD_PADDING_MS // vad.frame_ms
+    lead_in_frames = VAD_LEAD_IN_MS // vad.frame_ms
+    silence_frames = silence_ms // vad.frame_ms
+
+    pending = bytearray()
+    leading: list[bytes] = []
+    trailing: list[bytes] = []
+    speech_run = 0
+    speech_started = False
+    received = sent = 0
+
+    async for chunk in stream:
+        received += len(chunk)
+        pending += chunk
+        usable = len(pending) - len(pending) % frame_bytes
+        if not usable:
+            continue
+
+        frames = bytes(pending[:usable])
+        del pending[:usable]
+        output: list[bytes] = []
+        for index, is_speech in enumerate(vad.classify(frames)):
+            frame = frames[index * frame_bytes : (index + 1) * frame_bytes]
+            if not speech_started:
+                leading.append(frame)
+                speech_run = speech_run + 1 if is_speech else 0
+                if speech_run >= min_speech_frames:
+                    speech_started = True
+                    if len(leading) - speech_run < lead_in_frames:
+                        output.extend(leading)
+                    else:
+                        output.extend(leading[-(padding_frames + speech_run) :])
+                    leading.clear()
+            elif is_speech:
+                output.extend(trailing)
+                trailing.clear()
+                output.append(frame)
+            else:
+                trailing.append(frame)
+                if silence_frames and len(trailing) >= silence_frames:
+                    output.extend(trailing[:padding_frames])
+                    sent += sum(len(part) for part in output)
+                    _LOGGER.debug(
+                        "VAD endpoint after %d ms of silence: kept %d of %d bytes",
+                        silence_ms,
+                        sent,
+                        received,
+                    )
+                    yield b"".join(output)
+                    return
+
+        if output:
+            data = b"".join(output)
+            sent += len(data)
+            yield data
+
+    if speech_started:
+        tail = b"".join(trailing[:padding_frames])
+    else:
+        _LOGGER.debug("VAD found no speech, passing audio through")
+        tail = b"".join([*leading, pending])
+    sent += len(tail)
+    _LOGGER.debug("VAD trimmed silence: kept %d of %d bytes", sent, received)
+    if tail:
+        yield tail
+
+
+async def _async_receive_transcript(ws: aiohttp.ClientWebSocketResponse) -> str:
+    """Collect transcripts from realtime ASR events until the session ends."""
+    transcripts: list[str] = []
+    async for msg in ws:
+        if msg.type != aiohttp.WSMsgType.TEXT:
+            continue
+        try:
+            event = json.loads(msg.data)
+        except ValueError as err:
+            raise RealtimeASRError("Invalid realtime ASR event") from err
+        if not isinstance(event, dict):
+            raise RealtimeASRError("Invalid realtime ASR event")
+        event_type = event.get("type")
+        if event_type == "conversation.item.input_audio_transcription.completed":
+            transcripts.append(event.get("transcript", ""))
+        elif event_type == "session.finished":
+            return "".join(transcripts)
+        elif event_type in (
+            "error",
+            "conversation.item.input_audio_transcription.failed",
+        ):
+            error = event.get("error")
+            message = error.get("message") if isinstance(error, dict) else error
+            raise RealtimeASRError(message or event_type)
+
+    raise RealtimeASRError("Connection closed before the session finished")
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     config_entry: ConfigEntry,
@@ -67,13 +459,45 @@ class Qwen3STTEntity(SpeechToTextEntity):
         self._attr_unique_id = f"{DOMAIN}_stt_{config_entry.entry_id}"
 
     @property
-    def _api_key(self) -> str:
-        return self._entry.data[CONF_API_KEY]
+    def _client(self) -> DashScopeClient:
+        return self.hass.data[DOMAIN][self._entry.entry_id][DATA_CLIENT]
+
+    @property
+    def _recorder(self) -> TrafficRecorder | None:
+        """Return the traffic recorder, if traffic is logged."""
+        recorder = self.hass.data[DOMAIN][self._entry.entry_id].get(DATA_RECORDER)
+        return recorder if recorder is not None and recorder.enabled else None
 
     @property
     def _stt_model(self) -> str:
         return self._entry.data.get(CONF_STT_MODEL, DEFAULT_STT_MODEL)
 
+    @property
+    def _stt_streaming(self) -> bool:
+        return self._entry.data.get(CONF_STT_STREAMING, DEFAULT_STT_STREAMING)
+
+    @property
+    def _stt_realtime_model(self) -> str:
+        return self._entry.data.get(
+            CONF_STT_REALTIME_MODEL, DEFAULT_STT_REALTIME_MODEL
+        )
+
+    @property
+    def _stt_opus(self) -> bool:
+        return self._entry.data.get(CONF_STT_OPUS, DEFAULT_STT_OPUS)
+
+    @property
+    def _stt_segmentation(self) -> bool:
+        return self._entry.data.get(CONF_STT_SEGMENTATION, DEFAULT_STT_SEGMENTATION)
+
+    @property
+    def _vad(self) -> bool:
+        return self._entry.data.get(CONF_VAD, DEFAULT_VAD)
+
+    @property
+    def _vad_silence_ms(self) -> int:
+        return self._entry.data.get(CONF_VAD_SILENCE_MS, DEFAULT_VAD_SILENCE_MS)
+
     @property
     def supported_languages(self) -> list[str]:
         """Return a list of supported languages."""
@@ -97,7 +521,11 @@ class Qwen3STTEntity(SpeechToTextEntity):
     @property
     def supported_sample_rates(self) -> list[AudioSampleRates]:
         """Return a list of supported sample rates."""
-        return [AudioSampleRates.SAMPLERATE_16000, AudioSampleRates.SAMPLERATE_44100]
+        return [
+            AudioSampleRates.SAMPLERATE_16000,
+            AudioSampleRates.SAMPLERATE_44100,
+            AudioSampleRates.SAMPLERATE_48000,
+        ]
 
     @property
     def supported_channels(self) -> list[AudioChannels]:
@@ -108,92 +536,373 @@ class Qwen3STTEntity(SpeechToTextEntity):
         self, metadata: SpeechMetadata, stream: AsyncIterable[bytes]
     ) -> SpeechResult:
         """Process an audio stream to STT service."""
-        # Collect all audio data from the stream
-        audio_chunks: list[bytes] = []
+        if (recorder := self._recorder) is None:
+            return await self._async_process_audio_stream(metadata, stream)
+
+        start = time.monotonic()
+        received = 0
+        ended: float | None = None
+
+        async def measured() -> AsyncGenerator[bytes]:
+            nonlocal received, ended
+            async for chunk in stream:
+                received += len(chunk)
+                yield chunk
+            ended = time.monotonic()
+
+        result = await self._async_process_audio_stream(metadata, measured())
+        recorder.record_call(
+            "stt_realtime" if self._stt_streaming and _is_pcm16(metadata) else "stt",
+            start,
+            language=metadata.language,
+            format=metadata.format.value,
+            codec=metadata.codec.value,
+            bit_rate=metadata.bit_rate.value,
+            sample_rate=metadata.sample_rate.value,
+            channels=metadata.channel.value,
+            bytes=received,
+            # What the user waits for, from the end of speech to the text
+            after_audio_ms=(
+                None if ended is None else round((time.monotonic() - ended) * 1000, 1)
+            ),
+            chars=len(result.text or ""),
+            error=None if result.result is SpeechResultState.SUCCESS else "NoText",
+        )
+        return result
+
+    async def _async_process_audio_stream(
+        self, metadata: SpeechMetadata, stream: AsyncIterable[bytes]
+    ) -> SpeechResult:
+        """Transcribe an audio stream, the way the options ask for."""
+        if is_pcm := _is_pcm16(metadata):
+            stream = _async_normalize_pcm(
+                stream, metadata.sample_rate, metadata.channel
+            )
+            if self._vad:
+                stream = _async_trim_silence(
+                    stream,
+                    VoiceActivityDetector(STT_SAMPLE_RATE),
+                    self._vad_silence_ms,
+                )
+
+        if is_pcm and self._stt_segmentation:
+            recording = SegmentedRecording()
+            try:
+                if self._stt_streaming:
+                    return await self._async_process_realtime(
+                        metadata, stream, recording
+                    )
+                return await self._async_process_segmented(
+                    metadata, stream, recording
+                )
+            finally:
+                await recording.async_close()
+
+        if self._stt_streaming and is_pcm:
+            return await self._async_process_realtime(metadata, stream)
+
+        upload = self._create_upload(metadata)
         async for chunk in stream:
-            audio_chunks.append(chunk)
+            upload.feed(chunk)
+
+        return await self._async_recognize(metadata, upload)
+
+    def _create_upload(self, metadata: SpeechMetadata) -> AsrRequestBody:
+        """Return the body collecting audio for a one-shot request.
+
+        Normalized PCM gets a WAV header, or is kept raw for Opus encoding
+        when enabled. Other formats are uploaded as received.
+        """
+        language_hint = _language_hint(metadata.language)
+        if not _is_pcm16(metadata):
+            return AsrRequestBody(
+                self._stt_model,
+                language_hint,
+                MIME_MAP.get(metadata.format, "audio/wav"),
+            )
+        return AsrRequestBody(
+            self._stt_model,
+            language_hint,
+            MIME_MAP[AudioFormats.WAV],
+            wav_sample_rate=STT_SAMPLE_RATE,
+            defer_encoding=self._stt_opus,
+        )
 
-        audio_data = b"".join(audio_chunks)
-        if not audio_data:
-            _LOGGER.error("Received empty audio stream")
+    async def _async_process_segmented(
+        self,
+        metadata: SpeechMetadata,
+        stream: AsyncIterable[bytes],
+        recording: SegmentedRecording,
+    ) -> SpeechResult:
+        """Recognize a long recording segment by segment.
+
+        Segments are transcribed as soon as they are cut, while the rest is
+        still being recorded, so once the recording ends only the segments
+        still in flight are waited for.
+        """
+        semaphore = asyncio.Semaphore(STT_SEGMENT_MAX_PARALLEL)
+        tasks: list[asyncio.Task[str | None]] = []
+        try:
+            async for chunk in stream:
+                await recording.async_feed(chunk)
+                for segment in recording.segments[len(tasks) :]:
+                    tasks.append(
+                        asyncio.create_task(
+                            self._async_transcribe_segment(
+                                metadata, recording, segment, semaphore
+                            )
+                        )
+                    )
+            return await self._async_recognize_recording(
+                metadata, recording, tasks, semaphore
+            )
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    async def _async_recognize_recording(
+        self,
+        metadata: SpeechMetadata,
+        recording: SegmentedRecording,
+        tasks: list[asyncio.Task[str | None]] | None = None,
+        semaphore: asyncio.Semaphore | None = None,
+    ) -> SpeechResult:
+        """Recognize a whole recording, given the tasks of its first segments.
+
+        A recording that was never cut is sent as one request, longer ones
+        segment by segment, at most STT_SEGMENT_MAX_PARALLEL at a time, and
+        the transcripts stitched together.
+        """
+        recording.finish()
+        if len(recording.segments) <= 1:
+            upload = self._create_upload(metadata)
+            for segment in recording.segments:
+                async for block in recording.async_read(segment):
+                    upload.feed(block)
+            return await self._async_recognize(metadata, upload)
+
+        _LOGGER.debug(
+            "Recognizing %d bytes of audio in %d segments%s",
+            recording.size,
+            len(recording.segments),
+            " (spilled to disk)" if recording.spilled else "",
+        )
+        tasks = tasks if tasks is not None else []
+        semaphore = semaphore or asyncio.Semaphore(STT_SEGMENT_MAX_PARALLEL)
+        for segment in recording.segments[len(tasks) :]:
+            tasks.append(
+                asyncio.create_task(
+                    self._async_transcribe_segment(
+                        metadata, recording, segment, semaphore
+                    )
+                )
+            )
+        texts = await asyncio.gather(*tasks)
+        if any(text is None for text in texts):
+            return SpeechResult("", SpeechResultState.ERROR)
+
+        text = stitch_transcripts(texts)
+        if not text:
+            _LOGGER.warning("Empty text in ASR responses of all segments")
+            return SpeechResult("", SpeechResultState.ERROR)
+
+        _LOGGER.debug("ASR result: %s", text)
+        return SpeechResult(text, SpeechResultState.SUCCESS)
+
+    async def _async_transcribe_segment(
+        self,
+        metadata: SpeechMetadata,
+        recording: SegmentedRecording,
+        segment: tuple[int, int],
+        semaphore: asyncio.Semaphore,
+    ) -> str | None:
+        """Return the text of a segment, or None if the request failed."""
+        async with semaphore:
+            upload = self._create_upload(metadata)
+            async for block in recording.async_read(segment):
+                upload.feed(block)
+            return await self._async_transcribe(metadata, upload)
+
+    async def _async_process_realtime(
+        self,
+        metadata: SpeechMetadata,
+        stream: AsyncIterable[bytes],
+        recording: SegmentedRecording | None = None,
+    ) -> SpeechResult:
+        """Recognize speech over the realtime websocket while it is recorded.
+
+        Audio is also collected, in the recording if given, so one-shot
+        requests can take over if the realtime session fails at any point.
+        """
+        upload = self._create_upload(metadata)
+        language_hint = _language_hint(metadata.language)
+
+        async def async_collect(chunk: bytes) -> None:
+            if recording is None:
+                upload.feed(chunk)
+            else:
+                await recording.async_feed(chunk)
+
+        async def async_fallback() -> SpeechResult:
+            if recording is None:
+                return await self._async_recognize(metadata, upload)
+            return await self._async_recognize_recording(metadata, recording)
+
+        try:
+            async with asyncio.timeout(STT_REALTIME_CONNECT_TIMEOUT):
+                ws = await self._client.ws_connect(self._stt_realtime_model)
+        except (asyncio.TimeoutError, aiohttp.ClientError, ApiError) as err:
+            _LOGGER.warning("Realtime ASR unavailable, using one-shot request: %s", err)
+            async for chunk in stream:
+                await async_collect(chunk)
+            return await async_fallback()
+
+        async with ws:
+            receiver = asyncio.create_task(_async_receive_transcript(ws))
+            try:
+                # Manual turn detection: the utterance ends when the stream does
+                await ws.send_json(
+                    {
+                        "type": "session.update",
+                        "session": {
+                            "modalities": ["text"],
+                            "input_audio_format": "pcm",
+                            "sample_rate": STT_SAMPLE_RATE,
+                            "input_audio_transcription": {"language": language_hint},
+                            "turn_detection": None,
+                        },
+                    }
+                )
+            except (aiohttp.ClientError, ConnectionResetError) as err:
+                _LOGGER.warning("Realtime ASR connection lost: %s", err)
+                realtime_ok = False
+            else:
+                realtime_ok = True
+
+            async for chunk in stream:
+                await async_collect(chunk)
+                if not realtime_ok or not chunk:
+                    continue
+                if receiver.done():
+                    realtime_ok = False
+                    continue
+                try:
+                    await ws.send_json(
+                        {
+                            "type": "input_audio_buffer.append",
+                            "audio": base64.b64encode(chunk).decode("ascii"),
+                        }
+                    )
+                except (aiohttp.ClientError, ConnectionResetError) as err:
+                    _LOGGER.warning("Realtime ASR connection lost: %s", err)
+                    realtime_ok = False
+
+            if realtime_ok and not receiver.done():
+                try:
+                    await ws.send_json({"type": "input_audio_buffer.commit"})
+                    await ws.send_json({"type": "session.finish"})
+                    async with asyncio.timeout(STT_REALTIME_FINISH_TIMEOUT):
+                        text = await receiver
+                except (
+                    asyncio.TimeoutError,
+                    aiohttp.ClientError,
+                    ConnectionResetError,
+                    RealtimeASRError,
+                ) as err:
+                    _LOGGER.warning("Realtime ASR failed: %s", err)
+                else:
+                    if not text:
+                        _LOGGER.warning("Empty text in realtime ASR response")
+                        return SpeechResult("", SpeechResultState.ERROR)
+                    _LOGGER.debug("Realtime ASR result: %s", text)
+                    return SpeechResult(text, SpeechResultState.SUCCESS)
+            elif receiver.done() and not receiver.cancelled():
+                if err := receiver.exception():
+                    _LOGGER.warning("Realtime ASR failed: %s", err)
+
+            receiver.cancel()
+
+        _LOGGER.debug("Falling back to one-shot ASR request")
+        return await async_fallback()
+
+    async def _async_recognize(
+        self, metadata: SpeechMetadata, upload: AsrRequestBody
+    ) -> SpeechResult:
+        """Recognize complete audio with a single API request."""
+        text = await self._async_transcribe(metadata, upload)
+        if text is None:
+            return SpeechResult("", SpeechResultState.ERROR)
+        if not text:
+            _LOGGER.warning("Empty text in ASR response")
             return SpeechResult("", SpeechResultState.ERROR)
 
+        _LOGGER.debug("ASR result: %s", text)
+        return SpeechResult(text, SpeechResultState.SUCCESS)
+
+    async def _async_transcribe(
+        self, metadata: SpeechMetadata, upload: AsrRequestBody
+    ) -> str | None:
+        """Return the text of complete audio, or None if the request failed."""
+        if not upload.audio_size:
+            _LOGGER.error("Received empty audio stream")
+            return None
+
         _LOGGER.debug(
             "Processing audio: %d bytes, format=%s, language=%s",
-            len(audio_data),
+            upload.audio_size,
             metadata.format,
             metadata.language,
         )
 
-        # Base64 encode audio data
-        audio_b64 = base64.b64encode(audio_data).decode("utf-8")
-        mime_type = MIME_MAP.get(metadata.format, "audio/wav")
-        audio_uri = f"data:{mime_type};base64,{audio_b64}"
-
-        # Map HA language code to ASR language hint
-        language_hint = metadata.language if metadata.language in LANGUAGE_MAP else "zh"
-
-        payload = {
-            "model": self._stt_model,
-            "input": {
-                "messages": [
-                    {"role": "system", "content": [{"text": ""}]},
-                    {"role": "user", "content": [{"audio": audio_uri}]},
-                ]
-            },
-            "parameters": {
-                "asr_options": {
-                    "enable_itn": True,
-                    "language": language_hint,
-                }
-            },
-        }
-
-        headers = {
-            "Authorization": f"Bearer {self._api_key}",
-            "Content-Type": "application/json",
-        }
-
-        session = async_get_clientsession(self.hass)
+        if upload.deferred_audio is not None:
+            try:
+                encoded = await async_encode_ogg_opus(
+                    get_ffmpeg_manager(self.hass).binary,
+                    upload.deferred_audio,
+                    STT_SAMPLE_RATE,
+                )
+            except (AudioEncodeError, OSError, ValueError) as err:
+                _LOGGER.warning("Opus encoding failed, uploading WAV: %s", err)
+            else:
+                _LOGGER.debug(
+                    "Encoded %d bytes of PCM to %d bytes of Opus",
+                    upload.audio_size,
+                    len(encoded),
+                )
+                upload.replace_audio(encoded, MIME_MAP[AudioFormats.OGG])
+
+        upload.finish()
 
         try:
-            async with asyncio.timeout(60):
-                async with session.post(
-                    DASHSCOPE_API_URL, json=payload, headers=headers
+            async with asyncio.timeout(STT_REQUEST_TIMEOUT):
+                async with self._client.post(
+                    deadline=STT_REQUEST_TIMEOUT, operation="asr", data=upload
                 ) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        _LOGGER.error(
-                            "ASR API request failed (status %s): %s",
-                            response.status,
-                            error_text,
-                        )
-                        return SpeechResult("", SpeechResultState.ERROR)
-
                     data = await response.json()
 
             # Extract recognized text from response
             choices = data.get("output", {}).get("choices", [])
             if not choices:
-                _LOGGER.error("No choices in ASR response: %s", data)
-                return SpeechResult("", SpeechResultState.ERROR)
+                _LOGGER.error("No choices in ASR response: %s", describe_error(data))
+                return None
 
             content = choices[0].get("message", {}).get("content", [])
             if not content:
-                _LOGGER.error("No content in ASR response: %s", data)
-                return SpeechResult("", SpeechResultState.ERROR)
-
-            text = content[0].get("text", "")
-            if not text:
-                _LOGGER.warning("Empty text in ASR response")
-                return SpeechResult("", SpeechResultState.ERROR)
+                _LOGGER.error("No content in ASR response: %s", describe_error(data))
+                return None
 
-            _LOGGER.debug("ASR result: %s", text)
-            return SpeechResult(text, SpeechResultState.SUCCESS)
+            return content[0].get("text", "")
 
+        except ApiError as err:
+            _LOGGER.error("ASR API request failed: %s", err)
+            return None
         except asyncio.TimeoutError:
             _LOGGER.error("Timeout during ASR request")
-            return SpeechResult("", SpeechResultState.ERROR)
+            return None
         except aiohttp.ClientError as err:
             _LOGGER.error("HTTP error during ASR request: %s", err)
-            return SpeechResult("", SpeechResultState.ERROR)
+            return None
+
+
+class RealtimeASRError(Exception):
+    """Error to indicate the realtime ASR session failed."""
@@ -0,0 +1,202 @@
+"""Text helpers for the Qwen3 Speech integration."""
+from __future__ import annotations
+
+import re
+import unicodedata
+
+# Sentence ends: CJK and Latin terminators (a Latin period only when followed
+# by whitespace, so "23.5" stays intact), plus any trailing quotes/brackets
+_SENTENCE_END = re.compile(
+    r"(?:[。！？；!?;…]+|\.+(?=\s|$)|\n+)[”’」』）)\]\"']*\s*"
+)
+# Sentence ends that are final when text arrives in pieces, unlike a "."
+# that may turn out to be a decimal point
+_FINAL_END = ("。", "！", "？", "；", "!", "?", ";", "…")
+# Clause boundaries, used to split sentences that are too long on their own
+_CLAUSE_END = re.compile(r"(?:[，、：,:](?!\d)|——)\s*")
+# Words compared when stitching transcripts: single CJK characters (kana,
+# ideographs, hangul syllables), or runs of other letters and digits
+_CJK = "\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+_STITCH_WORD = re.compile(rf"[{_CJK}]|[^\W_{_CJK}]+")
+# Characters not separated by a space, including fullwidth punctuation
+_NO_SPACE = re.compile(rf"[{_CJK}\u3000-\u303f\uff00-\uffef]")
+_LEADING_PUNCTUATION = re.compile(r"^[\W_]+")
+# Numbers, including decimals, times and dates, not part of a Latin word
+# ("PM2.5", "5G"); they are the part of templated messages that changes
+_NUMBER = re.compile(
+    r"(?<![A-Za-z\d.,:/-])-?\d+(?:[.,:/-]\d+)*%?(?![A-Za-z\d]|[.,:/-]\d)"
+)
+
+
+def _split_after(pattern: re.Pattern[str], text: str) -> list[str]:
+    """Split text after every match of pattern, keeping the delimiters."""
+    pieces: list[str] = []
+    start = 0
+    for match in pattern.finditer(text):
+        if match.end() > start:
+            pieces.append(text[start : match.end()])
+            start = match.end()
+    if start < len(text):
+        pieces.append(text[start:])
+    return pieces
+
+
+def _hard_split(text: str, max_chars: int) -> list[str]:
+    """Split text without punctuation, preferring whitespace."""
+    pieces: list[str] = []
+    while len(text) > max_chars:
+        cut = text.rfind(" ", max_chars // 2, max_chars)
+        if cut <= 0:
+            cut = max_chars
+        pieces.append(text[:cut])
+        text = text[cut:]
+    pieces.append(text)
+    return pieces
+
+
+def _pieces(text: str, max_chars: int) -> list[str]:
+    """Return sentences, breaking up any longer than max_chars."""
+    pieces: list[str] = []
+    for sentence in _split_after(_SENTENCE_END, text):
+        if len(sentence) <= max_chars:
+            pieces.append(sentence)
+            continue
+        for clause in _split_after(_CLAUSE_END, sentence):
+            if len(clause) <= max_chars:
+                pieces.append(clause)
+            else:
+                pieces.extend(_hard_split(clause, max_chars))
+    return pieces
+
+
+def split_text(
+    text: str, max_chars: int, first_chars: int | None = None
+) -> list[str]:
+    """Split text into chunks at sentence and clause boundaries.
+
+    Sentences are packed together up to max_chars per chunk. When first_chars
+    is given the first chunk is kept at most that long, so synthesis of the
+    opening words can finish (and playback start) as early as possible.
+    """
+    chunks: list[str] = []
+    current = ""
+    limit = min(first_chars or max_chars, max_chars)
+    for piece in _pieces(text, max_chars):
+        if current and len(current) + len(piece) > limit:
+            chunks.append(current)
+            current = ""
+            limit = max_chars
+        current += piece
+    chunks.append(current)
+
+    # Drop chunks with nothing to pronounce, e.g. a stray "..."
+    return [
+        chunk.strip()
+        for chunk in chunks
+        if any(char.isalnum() for char in chunk)
+    ]
+
+
+class SentenceBuffer:
+    """Collect text that arrives in pieces and hand out complete sentences.
+
+    A sentence is complete at a final sentence end, or else once more text
+    follows it: a period at the end of what arrived so far may still turn
+    out to be a decimal point. Sentences longer than max_chars are handed
+    out clause by clause.
+    """
+
+    def __init__(self, max_chars: int) -> None:
+        """Initialize the buffer."""
+        self.max_chars = max_chars
+        self._text = ""
+
+    def feed(self, text: str) -> list[str]:
+        """Add text, returning the sentences it completed."""
+        self._text += text
+        pieces = _pieces(self._text, self.max_chars)
+        if pieces and not pieces[-1].rstrip().endswith(_FINAL_END):
+            self._text = pieces.pop()
+        else:
+            self._text = ""
+        return [
+            piece.strip()
+            for piece in pieces
+            if any(char.isalnum() for char in piece)
+        ]
+
+    def flush(self) -> list[str]:
+        """Return the rest of the text, at the end of the stream."""
+        text, self._text = self._text, ""
+        return split_text(text, self.max_chars)
+
+
+def split_segments(text: str, max_chars: int) -> list[str]:
+    """Split text into phrases that are synthesized and cached separately.
+
+    Text is cut at every sentence and clause boundary, and numbers become
+    phrases of their own, so messages built from the same template share
+    the audio of everything but the values filled in.
+    """
+    segments: list[str] = []
+    for piece in _pieces(text, max_chars):
+        for clause in _split_after(_CLAUSE_END, piece):
+            start = 0
+            for match in _NUMBER.finditer(clause):
+                segments.extend((clause[start : match.start()], match.group()))
+                start = match.end()
+            segments.append(clause[start:])
+
+    return [
+        segment.strip()
+        for segment in segments
+        if any(char.isalnum() for char in segment)
+    ]
+
+
+def normalize_text(text: str) -> str:
+    """Normalize text so trivially different messages compare equal."""
+    return " ".join(unicodedata.normalize("NFKC", text).split())
+
+
+def _overlap_end(left: str, right: str, max_words: int) -> int:
+    """Return where the words repeating the end of left end in right."""
+    tail = list(_STITCH_WORD.finditer(left))[-max_words:]
+    head = []
+    for match in _STITCH_WORD.finditer(right):
+        head.append(match)
+        if len(head) == max_words:
+            break
+    tail_words = [match.group().casefold() for match in tail]
+    head_words = [match.group().casefold() for match in head]
+    for count in range(min(len(tail), len(head)), 0, -1):
+        words = head_words[:count]
+        # A single short word may just have been said twice
+        if tail_words[-count:] == words and sum(map(len, words)) >= 2:
+            return head[count - 1].end()
+    return 0
+
+
+def stitch_transcripts(texts: list[str], max_words: int = 12) -> str:
+    """Join the transcripts of overlapping audio segments.
+
+    Words at the start of a transcript that repeat the end of the previous
+    one were heard twice in the overlap and are dropped. The longest such
+    run of up to max_words wins.
+    """
+    result = ""
+    for text in texts:
+        text = text.strip()
+        if result and (end := _overlap_end(result, text, max_words)):
+            text = text[end:].lstrip()
+            # Keep the punctuation after the words unless there already is
+            if _LEADING_PUNCTUATION.match(result[-1]):
+                text = _LEADING_PUNCTUATION.sub("", text)
+        if not text:
+            continue
+        if result and not (
+            _NO_SPACE.match(result[-1]) or _NO_SPACE.match(text[0])
+        ):
+            result += " "
+        result += text
+    return result
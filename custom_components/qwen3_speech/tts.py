@@ -2,37 +2,102 @@
 from __future__ import annotations
 
 import asyncio
+import base64
+import json
 import logging
-from typing import Any
+import time
+from collections.abc import AsyncGenerator, AsyncIterable, Iterable
+from contextlib import AsyncExitStack
+from typing import Any, TypeVar
 
 import aiohttp
 
-from homeassistant.components.tts import TextToSpeechEntity, TtsAudioType
+from homeassistant.components.ffmpeg import get_ffmpeg_manager
+from homeassistant.components.tts import (
+    ATTR_PREFERRED_FORMAT,
+    TextToSpeechEntity,
+    TTSAudioRequest,
+    TTSAudioResponse,
+    TtsAudioType,
+)
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
-from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.exceptions import HomeAssistantError
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 
 from .const import (
-    CONF_API_KEY,
+    CONF_CRITICAL_PHRASES,
+    CONF_PRIORITY,
+    CONF_SEGMENT_CACHE,
     CONF_SPEED,
+    CONF_STREAMING,
+    CONF_TTS_DEADLINE_MS,
+    CONF_TTS_FORMAT,
     CONF_TTS_MODEL,
+    CONF_TTS_SAMPLE_RATE,
     CONF_VOICE,
-    DASHSCOPE_API_URL,
+    DATA_CACHE,
+    DATA_CLIENT,
+    DATA_RECORDER,
+    DATA_TTS_ENTITY,
+    DEFAULT_CRITICAL_PHRASES,
     DEFAULT_LANGUAGE,
+    DEFAULT_PRIORITY,
+    DEFAULT_SEGMENT_CACHE,
     DEFAULT_SPEED,
+    DEFAULT_STREAMING,
+    DEFAULT_TTS_DEADLINE_MS,
+    DEFAULT_TTS_FORMAT,
     DEFAULT_TTS_MODEL,
+    DEFAULT_TTS_SAMPLE_RATE,
     DEFAULT_VOICE,
     DOMAIN,
     LANGUAGE_MAP,
     MAX_SPEED,
     MIN_SPEED,
+    PRIORITIES,
     SUPPORT_LANGUAGES,
-    TTS_MAX_CHARS,
+    TTS_CHUNK_CHARS,
+    TTS_DOWNLOAD_CHUNK_SIZE,
+    TTS_DOWNLOAD_MEMORY_BYTES,
+    TTS_FIRST_CHUNK_CHARS,
+    TTS_FORMATS,
+    TTS_MAX_PARALLEL,
+    TTS_REQUEST_TIMEOUT,
+    TTS_SAMPLE_RATE,
+    TTS_SNIFF_BYTES,
+    TTS_STREAM_READ_TIMEOUT,
+)
+from .api import DashScopeClient, describe_error
+from .audio import (
+    AudioEncodeError,
+    Crossfader,
+    PcmConverter,
+    PcmSpool,
+    TimeStretcher,
+    async_transcode,
+    async_transcode_stream,
+    join_audio,
+    parse_wav,
+    resample_wav,
+    sniff_audio_format,
+    stretch_wav,
+    wav_header,
 )
+from .cache import TTSCache
+from .coalesce import SingleFlight, StreamFlight
+from .recorder import TrafficRecorder
+from .resilience import ApiError
+from .scheduler import Priority
+from .text import SentenceBuffer, split_segments, split_text
 
 _LOGGER = logging.getLogger(__name__)
 
+_T = TypeVar("_T")
+
+# Format and sample rate of the audio DashScope returns
+_NATIVE_OUTPUT = ("wav", TTS_SAMPLE_RATE)
+
 
 async def async_setup_entry(
     hass: HomeAssistant,
@@ -40,7 +105,144 @@ async def async_setup_entry(
     async_add_entities: AddEntitiesCallback,
 ) -> None:
     """Set up Qwen3 TTS platform via config entry."""
-    async_add_entities([Qwen3TTSEntity(hass, config_entry)])
+    entity = Qwen3TTSEntity(hass, config_entry)
+    hass.data[DOMAIN][config_entry.entry_id][DATA_TTS_ENTITY] = entity
+    async_add_entities([entity])
+
+
+async def _async_single_chunk(data: bytes) -> AsyncGenerator[bytes]:
+    """Yield complete audio as a single chunk."""
+    yield data
+
+
+async def _async_iter(items: Iterable[_T]) -> AsyncGenerator[_T]:
+    """Yield the items of a list from an async generator."""
+    for item in items:
+        yield item
+
+
+async def _async_ordered_streams(
+    streams: Iterable[AsyncGenerator[_T]] | AsyncIterable[AsyncGenerator[_T]],
+    limit: int,
+) -> AsyncGenerator[_T]:
+    """Run up to limit streams at once and yield their chunks in order.
+
+    Chunks of the stream currently being played are passed through as they
+    arrive, later streams are buffered until their turn. Streams may still
+    be coming in (an async iterable), each starts as soon as it does.
+    """
+    semaphore = asyncio.Semaphore(limit)
+
+    async def drain(stream: AsyncGenerator[_T], queue: asyncio.Queue) -> None:
+        async with semaphore:
+            try:
+                async for chunk in stream:
+                    queue.put_nowait(chunk)
+            except Exception as err:  # handed to the consumer and re-raised
+                queue.put_nowait(err)
+            else:
+                queue.put_nowait(None)
+
+    # One queue per stream, in order, then None (or the error of streams)
+    queues: asyncio.Queue = asyncio.Queue()
+    tasks: list[asyncio.Task] = []
+
+    def start(stream: AsyncGenerator[_T]) -> None:
+        queue: asyncio.Queue = asyncio.Queue()
+        queues.put_nowait(queue)
+        tasks.append(asyncio.create_task(drain(stream, queue)))
+
+    async def start_all() -> None:
+        try:
+            if isinstance(streams, AsyncIterable):
+                async for stream in streams:
+                    start(stream)
+            else:
+                for stream in streams:
+                    start(stream)
+        except Exception as err:  # handed to the consumer and re-raised
+            queues.put_nowait(err)
+        else:
+            queues.put_nowait(None)
+
+    tasks.append(asyncio.create_task(start_all()))
+    try:
+        while (queue := await queues.get()) is not None:
+            if isinstance(queue, Exception):
+                raise queue
+            while (item := await queue.get()) is not None:
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def _native_pcm(audio_format: str, data: bytes) -> bytes | None:
+    """Return the PCM of audio in the format DashScope streams, else None."""
+    if audio_format != "wav":
+        return None
+    try:
+        info, pcm = parse_wav(data)
+    except ValueError:
+        return None
+    if info != (TTS_SAMPLE_RATE, 1, 2):
+        return None
+    return bytes(pcm)
+
+
+async def _async_first_chunk(stream: AsyncGenerator[bytes]) -> bytes:
+    """Return the first chunk of a stream, which must not be empty."""
+    try:
+        return await anext(stream)
+    except StopAsyncIteration as err:
+        raise HomeAssistantError("TTS stream ended without audio") from err
+
+
+async def _async_refresh(
+    first_chunk: asyncio.Task[bytes],
+    stream: AsyncGenerator[bytes],
+    cache: TTSCache,
+    phrase_key: str,
+    cache_key: str,
+) -> None:
+    """Read a stream nobody plays to its end, so its audio gets cached.
+
+    The refreshed audio then becomes the latest clip of the phrase.
+    """
+    try:
+        await first_chunk
+        async for _ in stream:
+            pass
+    except Exception as err:  # nobody waits for the task, only logged
+        _LOGGER.warning("Refreshing TTS audio failed: %s", err)
+        return
+    cache.link(phrase_key, cache_key)
+
+
+async def _async_time_stretch(
+    hass: HomeAssistant, stream: AsyncGenerator[bytes], rate: float
+) -> AsyncGenerator[bytes]:
+    """Change the tempo of a PCM stream chunk by chunk in the executor."""
+    stretcher = TimeStretcher(TTS_SAMPLE_RATE, rate)
+    async for chunk in stream:
+        if stretched := await hass.async_add_executor_job(stretcher.process, chunk):
+            yield stretched
+    if stretched := await hass.async_add_executor_job(stretcher.flush):
+        yield stretched
+
+
+async def _async_resample(
+    hass: HomeAssistant, stream: AsyncGenerator[bytes], sample_rate: int
+) -> AsyncGenerator[bytes]:
+    """Resample a PCM stream chunk by chunk in the executor."""
+    converter = PcmConverter(TTS_SAMPLE_RATE, 1, sample_rate)
+    async for chunk in stream:
+        if resampled := await hass.async_add_executor_job(converter.convert, chunk):
+            yield resampled
+    if resampled := await hass.async_add_executor_job(converter.flush):
+        yield resampled
 
 
 class Qwen3TTSEntity(TextToSpeechEntity):
@@ -56,10 +258,17 @@ class Qwen3TTSEntity(TextToSpeechEntity):
         self._entry = config_entry
         self._attr_name = "Qwen3 TTS"
         self._attr_unique_id = f"{DOMAIN}_tts_{config_entry.entry_id}"
+        # Identical requests in flight, e.g. one announcement to many rooms
+        self._flights: SingleFlight[TtsAudioType] = SingleFlight()
+        self._stream_flights = StreamFlight()
 
     @property
-    def _api_key(self) -> str:
-        return self._entry.data[CONF_API_KEY]
+    def coalesced(self) -> dict[str, int]:
+        """Return how many requests joined an identical one in flight."""
+        return {
+            "requests": self._flights.coalesced,
+            "streams": self._stream_flights.coalesced,
+        }
 
     @property
     def _tts_model(self) -> str:
@@ -73,6 +282,48 @@ class Qwen3TTSEntity(TextToSpeechEntity):
     def _default_speed(self) -> float:
         return self._entry.data.get(CONF_SPEED, DEFAULT_SPEED)
 
+    @property
+    def _streaming(self) -> bool:
+        return self._entry.data.get(CONF_STREAMING, DEFAULT_STREAMING)
+
+    @property
+    def _segment_cache(self) -> bool:
+        return (
+            self._entry.data.get(CONF_SEGMENT_CACHE, DEFAULT_SEGMENT_CACHE)
+            and self._cache.max_bytes > 0
+        )
+
+    @property
+    def _tts_deadline_ms(self) -> int:
+        return self._entry.data.get(CONF_TTS_DEADLINE_MS, DEFAULT_TTS_DEADLINE_MS)
+
+    @property
+    def _critical_phrases(self) -> list[str]:
+        phrases = self._entry.data.get(CONF_CRITICAL_PHRASES, DEFAULT_CRITICAL_PHRASES)
+        return [line.strip() for line in phrases.splitlines() if line.strip()]
+
+    @property
+    def _tts_format(self) -> str:
+        return self._entry.data.get(CONF_TTS_FORMAT, DEFAULT_TTS_FORMAT)
+
+    @property
+    def _tts_sample_rate(self) -> int:
+        return self._entry.data.get(CONF_TTS_SAMPLE_RATE, DEFAULT_TTS_SAMPLE_RATE)
+
+    @property
+    def _cache(self) -> TTSCache:
+        return self.hass.data[DOMAIN][self._entry.entry_id][DATA_CACHE]
+
+    @property
+    def _client(self) -> DashScopeClient:
+        return self.hass.data[DOMAIN][self._entry.entry_id][DATA_CLIENT]
+
+    @property
+    def _recorder(self) -> TrafficRecorder | None:
+        """Return the traffic recorder, if traffic is logged."""
+        recorder = self.hass.data[DOMAIN][self._entry.entry_id].get(DATA_RECORDER)
+        return recorder if recorder is not None and recorder.enabled else None
+
     @property
     def default_language(self) -> str:
         """Return the default language."""
@@ -86,17 +337,17 @@ class Qwen3TTSEntity(TextToSpeechEntity):
     @property
     def supported_options(self) -> list[str]:
         """Return list of supported options."""
-        return [CONF_VOICE, CONF_SPEED]
+        return [CONF_VOICE, CONF_SPEED, CONF_PRIORITY, ATTR_PREFERRED_FORMAT]
 
     @property
     def default_options(self) -> dict[str, Any]:
         """Return default options."""
         return {CONF_VOICE: self._default_voice, CONF_SPEED: self._default_speed}
 
-    async def async_get_tts_audio(
-        self, message: str, language: str, options: dict[str, Any]
-    ) -> TtsAudioType:
-        """Load TTS audio from DashScope API."""
+    def _resolve_request(
+        self, language: str, options: dict[str, Any]
+    ) -> tuple[str, float, str]:
+        """Return (voice, speed, language_type) for a request."""
         voice = options.get(CONF_VOICE, self._default_voice)
         speed = options.get(CONF_SPEED, self._default_speed)
         language_type = LANGUAGE_MAP.get(language, DEFAULT_LANGUAGE)
@@ -108,15 +359,91 @@ class Qwen3TTSEntity(TextToSpeechEntity):
             )
             speed = self._default_speed
 
-        if len(message) > TTS_MAX_CHARS:
-            _LOGGER.warning(
-                "Text length %d exceeds limit %d, truncating",
-                len(message),
-                TTS_MAX_CHARS,
+        return voice, speed, language_type
+
+    def _resolve_output(self, options: dict[str, Any]) -> tuple[str, int]:
+        """Return the format and sample rate to deliver audio in.
+
+        A format preferred by the caller (e.g. an Assist pipeline) wins over
+        the configured one, so Home Assistant does not convert it again.
+        """
+        audio_format = options.get(ATTR_PREFERRED_FORMAT, self._tts_format)
+        if audio_format not in TTS_FORMATS:
+            _LOGGER.debug(
+                "Format %s not supported, using %s", audio_format, self._tts_format
             )
-            message = message[:TTS_MAX_CHARS]
+            audio_format = self._tts_format
+        return audio_format, self._tts_sample_rate
+
+    def _output_key(
+        self, cache_key: str, output: tuple[str, int], speed: float
+    ) -> str | None:
+        """Return the cache key of encoded output, None if it is not cached.
+
+        Resampling WAV is cheap, only audio encoded by ffmpeg is cached. In
+        segment mode messages rarely repeat in full, so nothing is.
+        """
+        if output[0] == "wav" or self._segment_cache:
+            return None
+        return TTSCache.make_output_key(cache_key, *output, speed)
+
+    async def _async_get_output(
+        self, output_key: str | None
+    ) -> tuple[str, bytes] | None:
+        """Return audio already encoded for output, if it is cached."""
+        if output_key is None or output_key not in self._cache:
+            return None
+        return await self._cache.async_get(output_key)
+
+    def _stale_deadline(self, phrase_key: str) -> float | None:
+        """Return how long to wait before playing stale audio of a phrase.
+
+        None when there is no latency budget or nothing rendered before.
+        """
+        if not self._tts_deadline_ms or not self._cache.has_stale(phrase_key):
+            return None
+        return self._tts_deadline_ms / 1000
 
-        payload = {
+    def _link_refreshed(
+        self, task: asyncio.Task[TtsAudioType], phrase_key: str, cache_key: str
+    ) -> None:
+        """Make audio refreshed in the background the phrase's latest clip."""
+        if task.cancelled() or task.exception() is not None:
+            return
+        if task.result()[1] is not None:
+            self._cache.link(phrase_key, cache_key)
+
+    async def _async_get_stale(
+        self, phrase_key: str, speed: float, output: tuple[str, int]
+    ) -> tuple[str, bytes] | None:
+        """Return the audio last rendered for a phrase, ready to play.
+
+        It may have been made by another model, so it is converted for
+        output but the result is not cached.
+        """
+        if (stale := await self._cache.async_get_stale(phrase_key)) is None:
+            return None
+        _LOGGER.warning(
+            "TTS failed or took over %d ms, playing audio rendered before",
+            self._tts_deadline_ms,
+        )
+        return await self._async_convert_output(
+            *await self._async_apply_speed(*stale, speed), output, None
+        )
+
+    def _resolve_priority(self, options: dict[str, Any]) -> Priority:
+        """Return the scheduling priority requested in options."""
+        priority = options.get(CONF_PRIORITY, DEFAULT_PRIORITY)
+        if priority not in PRIORITIES:
+            _LOGGER.warning("Unknown priority %s, using default", priority)
+            priority = DEFAULT_PRIORITY
+        return Priority[priority.upper()]
+
+    def _build_payload(
+        self, message: str, voice: str, language_type: str
+    ) -> dict[str, Any]:
+        """Build the DashScope synthesis payload."""
+        return {
             "model": self._tts_model,
             "input": {
                 "text": message,
@@ -125,72 +452,931 @@ class Qwen3TTSEntity(TextToSpeechEntity):
             },
         }
 
-        headers = {
-            "Authorization": f"Bearer {self._api_key}",
-            "Content-Type": "application/json",
+    def _traffic_fields(
+        self, message: str | None, language: str, options: dict[str, Any]
+    ) -> dict[str, Any]:
+        """Return what the traffic log keeps of a request, not the text.
+
+        The cache key tells repeated messages apart, it is in the cache
+        file names anyway. Text still streaming in is counted as it comes.
+        """
+        voice, speed, language_type = self._resolve_request(language, options)
+        audio_format, sample_rate = self._resolve_output(options)
+        if message is None:
+            fields: dict[str, Any] = {"chars": 0}
+        else:
+            fields = {
+                "chars": len(message),
+                "key": TTSCache.make_key(
+                    self._tts_model, voice, language_type, message
+                )[:16],
+            }
+        return {
+            **fields,
+            "language": language,
+            "voice": voice,
+            "speed": speed,
+            "format": audio_format,
+            "sample_rate": sample_rate,
+            "priority": self._resolve_priority(options).name.lower(),
         }
 
-        session = async_get_clientsession(self.hass)
+    async def async_stream_tts_audio(
+        self, request: TTSAudioRequest
+    ) -> TTSAudioResponse:
+        """Stream TTS audio from DashScope while it is being synthesized.
 
+        A message that comes in one piece is synthesized as a whole. Text
+        streamed in several pieces, e.g. the reply of a conversation agent,
+        is synthesized sentence by sentence while the rest is generated.
+        """
+        start = time.monotonic()
+        recorder = self._recorder
+        message_gen = request.message_gen
+        message = await anext(message_gen, "")
+        if (more := await anext(message_gen, None)) is None:
+            kind = "tts_stream" if self._streaming else "tts_download"
+            if recorder is not None:
+                fields = self._traffic_fields(
+                    message, request.language, request.options
+                )
+            response = self._async_stream_tts_audio(
+                message, request.language, request.options
+            )
+        else:
+
+            async def text_gen() -> AsyncGenerator[str]:
+                yield message + more
+                async for text in message_gen:
+                    yield text
+
+            kind = "tts_text"
+            text = text_gen()
+            if recorder is not None:
+                fields = self._traffic_fields(None, request.language, request.options)
+                text = recorder.async_record_text(text, start, fields)
+            response = self._async_stream_text(
+                text, request.language, request.options
+            )
+
+        if recorder is None:
+            return await response
         try:
-            # Step 1: Request TTS synthesis
-            async with asyncio.timeout(30):
-                async with session.post(
-                    DASHSCOPE_API_URL, json=payload, headers=headers
-                ) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        _LOGGER.error(
-                            "TTS API request failed (status %s): %s",
-                            response.status,
-                            error_text,
-                        )
-                        return None, None
+            audio = await response
+        except HomeAssistantError as err:
+            recorder.record_call(
+                kind, start, **fields, bytes=0, error=type(err).__name__
+            )
+            raise
+        return TTSAudioResponse(
+            audio.extension,
+            recorder.async_record_stream(audio.data_gen, kind, start, fields),
+        )
 
-                    data = await response.json()
+    async def _async_stream_text(
+        self, text_gen: AsyncGenerator[str], language: str, options: dict[str, Any]
+    ) -> TTSAudioResponse:
+        """Stream the audio of text that is still coming in.
 
-            # Extract audio URL from response
-            audio_url = data.get("output", {}).get("audio", {}).get("url")
-            if not audio_url:
-                _LOGGER.error("No audio URL in TTS response: %s", data)
-                return None, None
+        Every sentence is synthesized as soon as it is complete, at most
+        TTS_MAX_PARALLEL at once, and played in order while later ones are
+        still being generated. Sentences (or their phrases, with the phrase
+        cache on) are cached on their own, the whole text is not.
+        """
+        voice, speed, language_type = self._resolve_request(language, options)
 
-            # Step 2: Download audio file
-            async with asyncio.timeout(30):
-                async with session.get(audio_url) as audio_response:
-                    if audio_response.status != 200:
+        def split(sentences: list[str]) -> list[str]:
+            if not self._segment_cache:
+                return sentences
+            return [
+                segment
+                for sentence in sentences
+                for segment in split_segments(sentence, TTS_CHUNK_CHARS)
+            ]
+
+        async def segments() -> AsyncGenerator[str]:
+            buffer = SentenceBuffer(TTS_CHUNK_CHARS)
+            async for text in text_gen:
+                for segment in split(buffer.feed(text)):
+                    yield segment
+            for segment in split(buffer.flush()):
+                yield segment
+
+        pcm_gen = self._async_stream_segments(
+            segments(), voice, language_type, self._resolve_priority(options)
+        )
+        if speed != 1:
+            pcm_gen = _async_time_stretch(self.hass, pcm_gen, speed)
+        first_chunk = await _async_first_chunk(pcm_gen)
+        _LOGGER.debug("TTS of streamed text started, voice=%s", voice)
+
+        async def pcm_stream() -> AsyncGenerator[bytes]:
+            yield first_chunk
+            async for chunk in pcm_gen:
+                yield chunk
+
+        return await self._async_stream_output(
+            pcm_stream(), self._resolve_output(options), None
+        )
+
+    async def _async_stream_tts_audio(
+        self, message: str, language: str, options: dict[str, Any]
+    ) -> TTSAudioResponse:
+        """Stream the audio of a message while it is being synthesized."""
+        if not self._streaming:
+            return await self._async_stream_download(message, language, options)
+
+        voice, speed, language_type = self._resolve_request(language, options)
+        output = self._resolve_output(options)
+        cache_key = TTSCache.make_key(self._tts_model, voice, language_type, message)
+        phrase_key = TTSCache.make_phrase_key(voice, language_type, message)
+        output_key = self._output_key(cache_key, output, speed)
+        if (cached := await self._async_get_output(output_key)) is not None:
+            _LOGGER.debug("TTS output cache hit: %d bytes", len(cached[1]))
+            return TTSAudioResponse(cached[0], _async_single_chunk(cached[1]))
+        if (cached := await self._cache.async_get(cache_key)) is not None:
+            _LOGGER.debug("TTS cache hit: %d bytes", len(cached[1]))
+            self._cache.link(phrase_key, cache_key)
+            extension, data = await self._async_apply_speed(*cached, speed)
+            extension, data = await self._async_convert_output(
+                extension, data, output, output_key
+            )
+            return TTSAudioResponse(extension, _async_single_chunk(data))
+
+        if self._segment_cache:
+            chunks = split_segments(message, TTS_CHUNK_CHARS)
+        else:
+            chunks = split_text(message, TTS_CHUNK_CHARS, TTS_FIRST_CHUNK_CHARS)
+        if not chunks:
+            raise HomeAssistantError("No text to synthesize")
+
+        priority = self._resolve_priority(options)
+        if self._segment_cache:
+            pcm_gen = self._stream_flights.async_subscribe(
+                ("segments", cache_key),
+                lambda: self._async_stream_segments(
+                    _async_iter(chunks), voice, language_type, priority
+                ),
+            )
+        else:
+            pcm_gen = self._stream_flights.async_subscribe(
+                cache_key,
+                lambda: self._async_stream_message(
+                    cache_key, chunks, voice, language_type, priority
+                ),
+            )
+        if speed != 1:
+            pcm_gen = _async_time_stretch(self.hass, pcm_gen, speed)
+
+        # Wait for the first chunk so failures surface before playback starts.
+        # Within a latency budget, audio rendered before is played instead if
+        # it does not come in time, the stream goes on to refresh the cache.
+        if (deadline := self._stale_deadline(phrase_key)) is None:
+            first_chunk = await _async_first_chunk(pcm_gen)
+        else:
+            task = self.hass.async_create_background_task(
+                _async_first_chunk(pcm_gen), f"{DOMAIN} tts refresh"
+            )
+            await asyncio.wait({task}, timeout=deadline)
+            if (
+                not task.done()
+                or task.cancelled()
+                or task.exception() is not None
+            ):
+                stale = await self._async_get_stale(phrase_key, speed, output)
+                if stale is not None:
+                    self.hass.async_create_background_task(
+                        _async_refresh(
+                            task, pcm_gen, self._cache, phrase_key, cache_key
+                        ),
+                        f"{DOMAIN} tts refresh",
+                    )
+                    return TTSAudioResponse(stale[0], _async_single_chunk(stale[1]))
+            first_chunk = await task
+
+        _LOGGER.debug(
+            "TTS stream started: %d chunk(s), voice=%s, speed=%.1f",
+            len(chunks),
+            voice,
+            speed,
+        )
+
+        async def pcm_stream() -> AsyncGenerator[bytes]:
+            yield first_chunk
+            async for chunk in pcm_gen:
+                yield chunk
+            self._cache.link(phrase_key, cache_key)
+
+        return await self._async_stream_output(pcm_stream(), output, output_key)
+
+    async def _async_stream_output(
+        self,
+        pcm_gen: AsyncGenerator[bytes],
+        output: tuple[str, int],
+        output_key: str | None,
+    ) -> TTSAudioResponse:
+        """Deliver a PCM stream in the output format while it arrives.
+
+        Only if ffmpeg cannot be found is WAV sent instead. ffmpeg starts
+        once the stream is read, and the format cannot change anymore after
+        that, so ffmpeg failing then ends the stream with an error.
+        """
+        audio_format, sample_rate = output
+        if audio_format != "wav":
+            try:
+                data = await async_transcode_stream(
+                    get_ffmpeg_manager(self.hass).binary,
+                    pcm_gen,
+                    TTS_SAMPLE_RATE,
+                    audio_format,
+                    sample_rate,
+                )
+            except OSError as err:
+                _LOGGER.warning(
+                    "Encoding TTS audio as %s failed, sending wav: %s",
+                    audio_format,
+                    err,
+                )
+            else:
+                if output_key is not None:
+                    data = self._async_cache_stream(data, output_key, audio_format)
+                return TTSAudioResponse(audio_format, data)
+
+        if sample_rate != TTS_SAMPLE_RATE:
+            pcm_gen = _async_resample(self.hass, pcm_gen, sample_rate)
+
+        async def data_gen() -> AsyncGenerator[bytes]:
+            yield wav_header(sample_rate)
+            async for chunk in pcm_gen:
+                yield chunk
+
+        return TTSAudioResponse("wav", data_gen())
+
+    async def _async_cache_stream(
+        self, stream: AsyncGenerator[bytes], cache_key: str, audio_format: str
+    ) -> AsyncGenerator[bytes]:
+        """Pass audio on while it arrives and cache it once complete."""
+        writer = self._cache.writer(cache_key, audio_format)
+        try:
+            async for chunk in stream:
+                yield chunk
+                await writer.async_write(chunk)
+        except BaseException:
+            await writer.async_abort()
+            raise
+        await writer.async_commit()
+
+    async def _async_stream_download(
+        self, message: str, language: str, options: dict[str, Any]
+    ) -> TTSAudioResponse:
+        """Pass the synthesized audio file on while it is being downloaded.
+
+        Used when streaming synthesis is off. Audio that is cached, needs
+        several requests, a speed change, conversion to another format or
+        assembly from cached phrases is prepared completely first.
+        """
+        voice, speed, language_type = self._resolve_request(language, options)
+        cache_key = TTSCache.make_key(self._tts_model, voice, language_type, message)
+        phrase_key = TTSCache.make_phrase_key(voice, language_type, message)
+        chunks = split_text(message, TTS_CHUNK_CHARS)
+        if (
+            len(chunks) != 1
+            or speed != 1
+            or cache_key in self._cache
+            or self._segment_cache
+            or self._stale_deadline(phrase_key) is not None
+            or self._resolve_output(options) != _NATIVE_OUTPUT
+        ):
+            extension, data = await self.async_get_tts_audio(
+                message, language, options
+            )
+            if extension is None or data is None:
+                raise HomeAssistantError(
+                    f"No TTS from {self.entity_id} for '{message}'"
+                )
+            return TTSAudioResponse(extension, _async_single_chunk(data))
+
+        priority = self._resolve_priority(options)
+        try:
+            audio_url = await self._async_request_audio_url(
+                self._build_payload(chunks[0], voice, language_type), priority
+            )
+            audio_format, download = await self._async_download_audio(
+                audio_url, priority
+            )
+        except ApiError as err:
+            _LOGGER.error("TTS API request failed: %s", err)
+            raise HomeAssistantError(f"TTS API request failed: {err}") from err
+        except asyncio.TimeoutError as err:
+            raise HomeAssistantError("Timeout during TTS request") from err
+        except aiohttp.ClientError as err:
+            raise HomeAssistantError(f"HTTP error during TTS request: {err}") from err
+
+        writer = self._cache.writer(cache_key, audio_format)
+
+        async def data_gen() -> AsyncGenerator[bytes]:
+            try:
+                async for chunk in download:
+                    yield chunk
+                    await writer.async_write(chunk)
+            except (asyncio.TimeoutError, aiohttp.ClientError) as err:
+                await writer.async_abort()
+                raise HomeAssistantError(
+                    f"Error downloading TTS audio: {err}"
+                ) from err
+            except BaseException:
+                await writer.async_abort()
+                raise
+            await writer.async_commit()
+
+        return TTSAudioResponse(audio_format, data_gen())
+
+    async def _async_stream_message(
+        self,
+        cache_key: str,
+        chunks: list[str],
+        voice: str,
+        language_type: str,
+        priority: Priority,
+    ) -> AsyncGenerator[bytes]:
+        """Yield the PCM of all chunks of a message and cache it when complete."""
+        pcm_chunks: list[bytes] = []
+        async for chunk in _async_ordered_streams(
+            (
+                self._async_stream_pcm(
+                    self._build_payload(chunk, voice, language_type), priority
+                )
+                for chunk in chunks
+            ),
+            TTS_MAX_PARALLEL,
+        ):
+            pcm_chunks.append(chunk)
+            yield chunk
+
+        data_size = sum(len(chunk) for chunk in pcm_chunks)
+        await self._cache.async_set(
+            cache_key,
+            "wav",
+            b"".join([wav_header(TTS_SAMPLE_RATE, data_size=data_size), *pcm_chunks]),
+        )
+
+    async def _async_stream_segments(
+        self,
+        segments: AsyncIterable[str],
+        voice: str,
+        language_type: str,
+        priority: Priority,
+    ) -> AsyncGenerator[bytes]:
+        """Yield the PCM of a message phrase by phrase, crossfading the seams.
+
+        Phrases found in the cache are read from it, only the others are
+        synthesized (at most TTS_MAX_PARALLEL at once, each as soon as it
+        comes in) and cached on their own. The joined message itself is not
+        cached.
+        """
+
+        async def streams() -> AsyncGenerator[AsyncGenerator[tuple[int, bytes]]]:
+            index = 0
+            async for segment in segments:
+                yield self._async_segment_pcm(
+                    index, segment, voice, language_type, priority
+                )
+                index += 1
+
+        crossfader = Crossfader(TTS_SAMPLE_RATE)
+        current = -1
+        async for index, chunk in _async_ordered_streams(
+            streams(), TTS_MAX_PARALLEL
+        ):
+            if index != current:
+                current = index
+                if pcm := crossfader.next_clip():
+                    yield pcm
+            if pcm := crossfader.process(chunk):
+                yield pcm
+        if pcm := crossfader.flush():
+            yield pcm
+
+    async def _async_segment_pcm(
+        self,
+        index: int,
+        segment: str,
+        voice: str,
+        language_type: str,
+        priority: Priority,
+    ) -> AsyncGenerator[tuple[int, bytes]]:
+        """Yield the PCM of one phrase, tagged with its index in the message."""
+        cache_key = TTSCache.make_key(self._tts_model, voice, language_type, segment)
+        if (cached := await self._cache.async_get(cache_key)) is not None and (
+            pcm := _native_pcm(*cached)
+        ) is not None:
+            yield index, pcm
+            return
+
+        if self._streaming:
+            async for chunk in self._stream_flights.async_subscribe(
+                cache_key,
+                lambda: self._async_stream_message(
+                    cache_key, [segment], voice, language_type, priority
+                ),
+            ):
+                yield index, chunk
+            return
+
+        audio_format, audio_data = await self._flights.async_run(
+            cache_key,
+            lambda: self._async_synthesize_message(
+                cache_key, segment, voice, language_type, priority
+            ),
+        )
+        if audio_format is None or audio_data is None:
+            raise HomeAssistantError(f"Failed to synthesize '{segment}'")
+        if (pcm := _native_pcm(audio_format, audio_data)) is None:
+            raise HomeAssistantError(f"Cannot join {audio_format} audio of phrases")
+        yield index, pcm
+
+    async def _async_stream_pcm(
+        self, payload: dict[str, Any], priority: Priority
+    ) -> AsyncGenerator[bytes]:
+        """Yield raw PCM chunks from the DashScope SSE synthesis stream."""
+        timeout = aiohttp.ClientTimeout(
+            total=None, sock_connect=30, sock_read=TTS_STREAM_READ_TIMEOUT
+        )
+
+        try:
+            # SSE events carry base64 audio, so allow lines beyond the 64 KiB default
+            async with self._client.post(
+                sse=True,
+                priority=priority,
+                deadline=TTS_REQUEST_TIMEOUT,
+                operation="tts_stream",
+                json=payload,
+                timeout=timeout,
+                read_bufsize=2**20,
+            ) as response:
+                total_bytes = 0
+                async for line in response.content:
+                    if not line.startswith(b"data:"):
+                        continue
+                    try:
+                        event = json.loads(line[5:])
+                    except ValueError as err:
+                        raise HomeAssistantError("Invalid TTS stream event") from err
+                    if not isinstance(event, dict):
+                        raise HomeAssistantError("Invalid TTS stream event")
+                    output = event.get("output")
+                    if output is None:
                         _LOGGER.error(
-                            "Failed to download audio (status %s)",
-                            audio_response.status,
+                            "TTS stream error: %s %s",
+                            event.get("code"),
+                            event.get("message"),
                         )
-                        return None, None
-
-                    audio_data = await audio_response.read()
-                    if not audio_data:
-                        _LOGGER.error("Received empty audio data")
-                        return None, None
-
-                    # Detect format from Content-Type or default to wav
-                    content_type = audio_response.headers.get("Content-Type", "")
-                    if "mp3" in content_type or "mpeg" in content_type:
-                        audio_format = "mp3"
-                    elif "opus" in content_type or "ogg" in content_type:
-                        audio_format = "ogg"
-                    else:
-                        audio_format = "wav"
-
-                    _LOGGER.debug(
-                        "TTS audio received: %d bytes, format=%s, voice=%s, speed=%.1f",
-                        len(audio_data),
-                        audio_format,
-                        voice,
-                        speed,
+                        raise HomeAssistantError(
+                            f"TTS stream error: {event.get('code')}"
+                        )
+
+                    if not isinstance(output, dict) or not isinstance(
+                        audio := output.get("audio") or {}, dict
+                    ):
+                        raise HomeAssistantError("Invalid TTS stream event")
+                    if audio_b64 := audio.get("data"):
+                        try:
+                            chunk = base64.b64decode(audio_b64)
+                        except (TypeError, ValueError) as err:
+                            raise HomeAssistantError(
+                                "Invalid TTS stream event"
+                            ) from err
+                        total_bytes += len(chunk)
+                        yield chunk
+
+                    if output.get("finish_reason") == "stop":
+                        break
+
+                _LOGGER.debug("TTS stream finished: %d bytes", total_bytes)
+
+        except ApiError as err:
+            _LOGGER.error("TTS stream request failed: %s", err)
+            raise HomeAssistantError(f"TTS API request failed: {err}") from err
+        except asyncio.TimeoutError as err:
+            raise HomeAssistantError("Timeout during TTS stream") from err
+        except aiohttp.ClientError as err:
+            raise HomeAssistantError(f"HTTP error during TTS stream: {err}") from err
+
+    async def async_get_tts_audio(
+        self, message: str, language: str, options: dict[str, Any]
+    ) -> TtsAudioType:
+        """Load TTS audio from DashScope API."""
+        if (recorder := self._recorder) is None:
+            return await self._async_get_tts_audio(message, language, options)
+
+        start = time.monotonic()
+        fields = self._traffic_fields(message, language, options)
+        try:
+            audio_format, data = await self._async_get_tts_audio(
+                message, language, options
+            )
+        except HomeAssistantError as err:
+            recorder.record_call(
+                "tts", start, **fields, bytes=0, error=type(err).__name__
+            )
+            raise
+        recorder.record_call(
+            "tts",
+            start,
+            **fields,
+            bytes=len(data or b""),
+            error=None if data else "NoAudio",
+        )
+        return audio_format, data
+
+    async def _async_get_tts_audio(
+        self, message: str, language: str, options: dict[str, Any]
+    ) -> TtsAudioType:
+        """Return the audio of a message, from the cache if possible."""
+        voice, speed, language_type = self._resolve_request(language, options)
+        output = self._resolve_output(options)
+        cache_key = TTSCache.make_key(self._tts_model, voice, language_type, message)
+        phrase_key = TTSCache.make_phrase_key(voice, language_type, message)
+        output_key = self._output_key(cache_key, output, speed)
+        if (cached := await self._async_get_output(output_key)) is not None:
+            _LOGGER.debug("TTS output cache hit: %d bytes", len(cached[1]))
+            return cached
+        if (cached := await self._cache.async_get(cache_key)) is not None:
+            _LOGGER.debug("TTS cache hit: %d bytes", len(cached[1]))
+            self._cache.link(phrase_key, cache_key)
+            return await self._async_convert_output(
+                *await self._async_apply_speed(*cached, speed), output, output_key
+            )
+
+        priority = self._resolve_priority(options)
+        if self._segment_cache:
+            synthesize = self._flights.async_run(
+                ("segments", cache_key),
+                lambda: self._async_synthesize_segments(
+                    message, voice, language_type, priority
+                ),
+            )
+        else:
+            synthesize = self._flights.async_run(
+                cache_key,
+                lambda: self._async_synthesize_message(
+                    cache_key, message, voice, language_type, priority
+                ),
+            )
+
+        if (deadline := self._stale_deadline(phrase_key)) is None:
+            audio_format, audio_data = await synthesize
+        else:
+            # Past the deadline or on failure audio rendered before is played,
+            # the synthesis goes on in the background to refresh the cache
+            task = self.hass.async_create_background_task(
+                synthesize, f"{DOMAIN} tts refresh"
+            )
+            await asyncio.wait({task}, timeout=deadline)
+            if not task.done() or task.cancelled() or task.result()[1] is None:
+                stale = await self._async_get_stale(phrase_key, speed, output)
+                if stale is not None:
+                    task.add_done_callback(
+                        lambda task: self._link_refreshed(task, phrase_key, cache_key)
                     )
-                    return audio_format, audio_data
+                    return stale
+            audio_format, audio_data = await task
+        if audio_format is None or audio_data is None:
+            return None, None
+        self._cache.link(phrase_key, cache_key)
+        return await self._async_convert_output(
+            *await self._async_apply_speed(audio_format, audio_data, speed),
+            output,
+            output_key,
+        )
 
+    async def async_preload(
+        self, message: str, language: str, voice: str | None = None
+    ) -> bool:
+        """Synthesize a message into the cache unless it is cached already.
+
+        Returns whether the message had to be synthesized.
+        """
+        options = {CONF_VOICE: voice} if voice else {}
+        voice, _, language_type = self._resolve_request(language, options)
+        cache_key = TTSCache.make_key(self._tts_model, voice, language_type, message)
+        phrase_key = TTSCache.make_phrase_key(voice, language_type, message)
+        if cache_key in self._cache:
+            self._cache.link(phrase_key, cache_key)
+            return False
+
+        audio_format, _ = await self._flights.async_run(
+            cache_key,
+            lambda: self._async_synthesize_message(
+                cache_key, message, voice, language_type, Priority.PRELOAD
+            ),
+        )
+        if audio_format is None:
+            raise HomeAssistantError(f"Failed to synthesize '{message}'")
+        self._cache.link(phrase_key, cache_key)
+        return True
+
+    async def async_keep_critical(self) -> None:
+        """Keep audio of the critical phrases pre-rendered in the cache.
+
+        Phrases are rendered with the default voice and language and pinned,
+        so they are never evicted. Missing ones, e.g. after the model or
+        voice changed, are rendered again in the background.
+        """
+        language = self.default_language
+        voice, _, language_type = self._resolve_request(language, {})
+        phrases = self._critical_phrases
+        await self._cache.async_pin(
+            TTSCache.make_key(self._tts_model, voice, language_type, phrase)
+            for phrase in phrases
+        )
+        rendered = 0
+        for phrase in phrases:
+            try:
+                if await self.async_preload(phrase, language):
+                    rendered += 1
+            except HomeAssistantError as err:
+                _LOGGER.warning("Critical phrase not rendered: %s", err)
+        if rendered:
+            _LOGGER.info("Rendered %d critical phrase(s)", rendered)
+
+    async def _async_apply_speed(
+        self, audio_format: str, audio_data: bytes, speed: float
+    ) -> tuple[str, bytes]:
+        """Apply the speed option to complete audio."""
+        if speed == 1:
+            return audio_format, audio_data
+        if audio_format != "wav":
+            _LOGGER.debug("Speed not applied to %s audio", audio_format)
+            return audio_format, audio_data
+        try:
+            audio_data = await self.hass.async_add_executor_job(
+                stretch_wav, audio_data, speed
+            )
+        except ValueError as err:
+            _LOGGER.warning("Speed not applied: %s", err)
+        return audio_format, audio_data
+
+    async def _async_convert_output(
+        self,
+        audio_format: str,
+        audio_data: bytes,
+        output: tuple[str, int],
+        output_key: str | None,
+    ) -> tuple[str, bytes]:
+        """Convert complete audio to the output format and sample rate.
+
+        WAV is resampled in the executor, other formats are encoded once
+        with ffmpeg and cached. If that fails the audio is sent as it is.
+        """
+        output_format, sample_rate = output
+        if audio_format == "wav" and output_format == "wav":
+            if sample_rate == TTS_SAMPLE_RATE:
+                return audio_format, audio_data
+            try:
+                audio_data = await self.hass.async_add_executor_job(
+                    resample_wav, audio_data, sample_rate
+                )
+            except ValueError as err:
+                _LOGGER.warning("Sample rate not changed: %s", err)
+            return audio_format, audio_data
+        if audio_format == output_format:
+            return audio_format, audio_data
+
+        try:
+            encoded = await async_transcode(
+                get_ffmpeg_manager(self.hass).binary,
+                audio_data,
+                audio_format,
+                output_format,
+                sample_rate,
+            )
+        except (AudioEncodeError, OSError) as err:
+            _LOGGER.warning(
+                "Encoding TTS audio as %s failed, sending %s: %s",
+                output_format,
+                audio_format,
+                err,
+            )
+            return audio_format, audio_data
+
+        _LOGGER.debug(
+            "Encoded %d bytes of %s to %d bytes of %s",
+            len(audio_data),
+            audio_format,
+            len(encoded),
+            output_format,
+        )
+        if output_key is not None:
+            await self._cache.async_set(output_key, output_format, encoded)
+        return output_format, encoded
+
+    async def _async_synthesize_message(
+        self,
+        cache_key: str,
+        message: str,
+        voice: str,
+        language_type: str,
+        priority: Priority,
+    ) -> TtsAudioType:
+        """Synthesize all chunks of a message and cache the joined audio."""
+        chunks = split_text(message, TTS_CHUNK_CHARS)
+        if not chunks:
+            _LOGGER.error("No text to synthesize")
+            return None, None
+
+        semaphore = asyncio.Semaphore(TTS_MAX_PARALLEL)
+
+        async def synthesize(chunk: str) -> TtsAudioType:
+            async with semaphore:
+                return await self._async_synthesize(
+                    self._build_payload(chunk, voice, language_type), priority
+                )
+
+        results = await asyncio.gather(*(synthesize(chunk) for chunk in chunks))
+        if any(audio_data is None for _, audio_data in results):
+            return None, None
+
+        audio_format = results[0][0]
+        if any(chunk_format != audio_format for chunk_format, _ in results):
+            _LOGGER.error("TTS chunks returned in different audio formats")
+            return None, None
+
+        try:
+            audio_data = join_audio(audio_format, [data for _, data in results])
+        except ValueError as err:
+            _LOGGER.error("Failed to join TTS audio chunks: %s", err)
+            return None, None
+
+        _LOGGER.debug(
+            "TTS audio received: %d bytes in %d chunk(s), format=%s, voice=%s",
+            len(audio_data),
+            len(chunks),
+            audio_format,
+            voice,
+        )
+        await self._cache.async_set(cache_key, audio_format, audio_data)
+        return audio_format, audio_data
+
+    async def _async_synthesize_segments(
+        self,
+        message: str,
+        voice: str,
+        language_type: str,
+        priority: Priority,
+    ) -> TtsAudioType:
+        """Assemble the audio of a message from the audio of its phrases."""
+        segments = split_segments(message, TTS_CHUNK_CHARS)
+        if not segments:
+            _LOGGER.error("No text to synthesize")
+            return None, None
+
+        try:
+            pcm = b"".join(
+                [
+                    chunk
+                    async for chunk in self._async_stream_segments(
+                        _async_iter(segments), voice, language_type, priority
+                    )
+                ]
+            )
+        except HomeAssistantError as err:
+            _LOGGER.error("TTS request failed: %s", err)
+            return None, None
+
+        _LOGGER.debug(
+            "TTS audio assembled: %d bytes from %d phrase(s), voice=%s",
+            len(pcm),
+            len(segments),
+            voice,
+        )
+        return "wav", wav_header(TTS_SAMPLE_RATE, data_size=len(pcm)) + pcm
+
+    async def _async_synthesize(
+        self, payload: dict[str, Any], priority: Priority
+    ) -> TtsAudioType:
+        """Synthesize one chunk and download the resulting audio file."""
+        try:
+            audio_url = await self._async_request_audio_url(payload, priority)
+            async with asyncio.timeout(TTS_REQUEST_TIMEOUT):
+                audio_format, download = await self._async_download_audio(
+                    audio_url, priority
+                )
+                audio_data = b"".join([chunk async for chunk in download])
+        except ApiError as err:
+            _LOGGER.error("TTS API request failed: %s", err)
+            return None, None
         except asyncio.TimeoutError:
             _LOGGER.error("Timeout during TTS request")
             return None, None
         except aiohttp.ClientError as err:
             _LOGGER.error("HTTP error during TTS request: %s", err)
             return None, None
+
+        return audio_format, audio_data
+
+    async def _async_request_audio_url(
+        self, payload: dict[str, Any], priority: Priority
+    ) -> str:
+        """Request synthesis of one chunk and return the URL of the audio."""
+        async with asyncio.timeout(TTS_REQUEST_TIMEOUT):
+            async with self._client.post(
+                priority=priority,
+                deadline=TTS_REQUEST_TIMEOUT,
+                operation="tts",
+                json=payload,
+            ) as response:
+                data = await response.json()
+
+        audio_url = data.get("output", {}).get("audio", {}).get("url")
+        if not audio_url:
+            raise ApiError(f"No audio URL in TTS response: {describe_error(data)}")
+        return audio_url
+
+    async def _async_download_audio(
+        self, audio_url: str, priority: Priority
+    ) -> tuple[str, AsyncGenerator[bytes]]:
+        """Start downloading synthesized audio.
+
+        Returns the format, sniffed from the first bytes of the file, and a
+        generator of its chunks as they arrive. The rest of the file is read
+        by a task into a spool, so the request (and its scheduler slot)
+        ends once the file is downloaded, however slowly it is played. The
+        spool moves to a temporary file beyond TTS_DOWNLOAD_MEMORY_BYTES.
+        """
+        timeout = aiohttp.ClientTimeout(
+            total=None, sock_connect=30, sock_read=TTS_STREAM_READ_TIMEOUT
+        )
+        stack = AsyncExitStack()
+        response = await stack.enter_async_context(
+            self._client.download(
+                audio_url,
+                priority=priority,
+                deadline=TTS_REQUEST_TIMEOUT,
+                timeout=timeout,
+            )
+        )
+        chunks = response.content.iter_chunked(TTS_DOWNLOAD_CHUNK_SIZE)
+        head = b""
+        try:
+            async for chunk in chunks:
+                head += chunk
+                if len(head) >= TTS_SNIFF_BYTES:
+                    break
+        except BaseException:
+            await stack.aclose()
+            raise
+        if not head:
+            await stack.aclose()
+            raise ApiError("Received empty audio data")
+
+        audio_format = sniff_audio_format(
+            head, response.headers.get("Content-Type", "")
+        )
+
+        spool = PcmSpool(TTS_DOWNLOAD_MEMORY_BYTES, TTS_DOWNLOAD_CHUNK_SIZE)
+        arrived = asyncio.Event()
+        writing: asyncio.Future[None] | None = None
+
+        async def read() -> None:
+            nonlocal writing
+            try:
+                async with stack:
+                    async for chunk in chunks:
+                        # Not cancelled midway, the spool is closed after it
+                        writing = asyncio.ensure_future(spool.async_write(chunk))
+                        await asyncio.shield(writing)
+                        arrived.set()
+            finally:
+                arrived.set()
+
+        reader = asyncio.create_task(read())
+
+        async def chunk_gen() -> AsyncGenerator[bytes]:
+            offset = 0
+            try:
+                yield head
+                while True:
+                    if offset < spool.size:
+                        end = min(spool.size, offset + TTS_DOWNLOAD_CHUNK_SIZE)
+                        chunk = await spool.async_read(offset, end)
+                        offset = end
+                        yield chunk
+                    elif reader.done():
+                        # Raises the error of the download, if any
+                        reader.result()
+                        return
+                    else:
+                        arrived.clear()
+                        await arrived.wait()
+            finally:
+                reader.cancel()
+                await asyncio.wait({reader})
+                if not reader.cancelled():
+                    # Retrieved, so an error nobody got to is not logged
+                    reader.exception()
+                if writing is not None:
+                    await asyncio.wait({writing})
+                await spool.async_close()
+
+        return audio_format, chunk_gen()